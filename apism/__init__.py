@@ -1,2 +1,19 @@
-from .youtube.YouTubeAPI import YouTubeAPI
-from .x.XAPI import xAPI
\ No newline at end of file
+# Public classes are imported on first access so that `import apism` stays cheap
+_lazy = {
+    'YouTubeAPI': '.youtube.YouTubeAPI',
+    'xAPI': '.x.XAPI',
+    'set_codec': '.codec',
+}
+
+__all__ = list(_lazy)
+
+def __getattr__(name):
+    if name in _lazy:
+        import importlib
+        value = getattr(importlib.import_module(_lazy[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
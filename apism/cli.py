@@ -0,0 +1,338 @@
+"""
+Command-line batch runner.
+
+    apism run job.json [--concurrency N] [--processes N]
+    apism plan job.json [--deadline SECONDS]
+
+A job spec is a JSON file, e.g.:
+
+    {
+        "platform": "youtube",
+        "key_env": "YOUTUBE_API_KEY",
+        "queries": ["FTX", "OpenAI"],
+        "date_range": {"start": "2024-01-01", "end": "2024-01-07", "step_days": 1},
+        "stages": ["search", "videos", "commentThreads", "transcripts"],
+        "params": {"search": {"order": "date"}},
+        "options": {"min_comments": 10, "retry_limit": 5},
+        "output": {"format": "csv", "path": "data", "default_cols": true},
+        "concurrency": 4,
+        "processes": 1,
+        "quota": 10000
+    }
+
+For X, use "platform": "x", "token_env" and the stage "search_tweets" (with "type": "recent" or "all").
+Each (query, window) pair is a job written to <path>/<query>/<window start>.
+"""
+from .codec import loads
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import datetime
+import math
+import os
+import re
+import sys
+import time
+
+_stages = {
+    'youtube': ['search', 'videos', 'commentThreads', 'transcripts', 'channels'],
+    'x': ['search_tweets']
+}
+
+def _load_spec(path):
+    """
+    Load and validate a job spec.
+    """
+    with open(path, 'rb') as f:
+        spec = loads(f.read())
+
+    spec.setdefault('platform', 'youtube')
+    assert spec['platform'] in _stages, f"platform must be one of {list(_stages)}"
+    spec.setdefault('stages', _stages[spec['platform']][:1])
+    for i in spec['stages']:
+        assert i in _stages[spec['platform']], f"Unknown stage {i} for {spec['platform']}"
+    assert spec.get('queries'), "Job spec must define queries."
+    spec.setdefault('output', {})
+    spec['output'].setdefault('format', 'json')
+    spec['output'].setdefault('path', os.getcwd())
+    return spec
+
+def _windows(spec):
+    """
+    Split the job's date range into [start, end) windows of step_days days.
+    Returns:
+        list: A list of (start, end) ISO 8601 strings, or [(None, None)] if no date range is set.
+    """
+    date_range = spec.get('date_range')
+    if not date_range:
+        return [(None, None)]
+    start = datetime.date.fromisoformat(date_range['start'])
+    end = datetime.date.fromisoformat(date_range['end'])
+    step = datetime.timedelta(days=date_range.get('step_days', 1))
+
+    windows = []
+    while start <= end:
+        stop = min(start + step, end + datetime.timedelta(days=1))
+        windows.append((f"{start}T00:00:00Z", f"{stop}T00:00:00Z"))
+        start = stop
+    return windows
+
+def _jobs(spec):
+    """
+    Returns:
+        list: One (query, start, end) tuple per query and window.
+    """
+    return [(q, start, end) for q in spec['queries'] for start, end in _windows(spec)]
+
+def _key(spec, name):
+    """
+    Read a credential from the spec, or from the environment variable named by <name>_env.
+    """
+    if spec.get(name):
+        return spec[name]
+    value = os.environ.get(spec.get(f"{name}_env", ''))
+    assert value, f"Job spec must define {name} or {name}_env."
+    return value
+
+def _per_video(comment_threads):
+    """
+    Comment threads per video, whether they are a list per video (concurrent), a dictionary of lists
+    by video ID (sequential) or a single list (one video ID).
+    """
+    if isinstance(comment_threads, dict):
+        return list(comment_threads.values())
+    if comment_threads and not any(isinstance(i, list) for i in comment_threads):
+        return [comment_threads]
+    return comment_threads or []
+
+def _quota_used(results, params):
+    """
+    Estimate the YouTube quota units used by a job from its results (a lower bound).
+    """
+    from .youtube.defaults import _quota_costs
+    used = 0
+    if 'search' in results:
+        used += _quota_costs['search'] * max(1, math.ceil(len(results['search']) / params['search'].get('maxResults', 5)))
+    if 'videos' in results:
+        used += _quota_costs['videos'] * len(results['videos'])
+    if 'commentThreads' in results:
+        page = params['commentThreads'].get('maxResults', 20)
+        used += _quota_costs['commentThreads'] * sum(max(1, math.ceil(len(i or []) / page)) for i in _per_video(results['commentThreads']))
+    if 'channels' in results:
+        used += _quota_costs['channels'] * math.ceil(len(results['channels']) / 50)
+    return used
+
+def _charge(state, results, params, charged):
+    """
+    Add the quota used by a job since it was last charged to the count shared by the jobs.
+    Returns:
+        int: The quota used by the job so far.
+    """
+    used = _quota_used(results, params)
+    state['used'] += used - charged
+    return used
+
+def _output_dir(spec, query, start):
+    path = os.path.join(spec['output']['path'], re.sub(r'[^\w.-]+', '_', query).strip('_') or 'query')
+    if start:
+        path = os.path.join(path, start[:10])
+    os.makedirs(path, exist_ok=True)
+    return path
+
+async def _run_youtube_job(spec, query, start, end, state, quota=None):
+    from .youtube.YouTubeAPI import YouTubeAPI
+    from .youtube.defaults import _default_params
+    from copy import deepcopy
+
+    params = deepcopy(_default_params)
+    for k, v in spec.get('params', {}).items():
+        params.setdefault(k, {}).update(v)
+    if start:
+        params['search']['publishedAfter'] = start
+        params['search']['publishedBefore'] = end
+
+    yt = YouTubeAPI(_key(spec, 'key'), params, **spec.get('options', {}))
+    # The quota is checked before each stage, against the units used by every job so far
+    used = 0
+    stopped = None
+    for stage in spec['stages']:
+        used = _charge(state, yt.results, params, used)
+        if quota is not None and state['used'] >= quota:
+            stopped = stage
+            break
+        if stage == 'search':
+            await yt.search(query)
+        elif stage == 'videos':
+            await yt.videos()
+        elif stage == 'commentThreads':
+            await yt.comment_threads()
+        elif stage == 'transcripts':
+            await yt.transcript()
+        elif stage == 'channels':
+            await yt.channels()
+    used = _charge(state, yt.results, params, used)
+
+    output = spec['output']
+    path = _output_dir(spec, query, start)
+    kwargs = {k: output[k] for k in ['default_cols', 'shorten_cols', 'force_output'] if k in output}
+    if output['format'] == 'csv':
+        yt.to_csv(path, **kwargs)
+    else:
+        yt.to_json(path, **kwargs)
+
+    counts = {k: len(yt._comment_thread_items()) if k == 'commentThreads' else len(v or []) for k, v in yt.results.items()}
+    return counts, used, stopped
+
+async def _run_x_job(spec, query, start, end, state, quota=None):
+    from .x.XAPI import xAPI
+
+    params = {'search_tweets': dict(spec.get('params', {}).get('search_tweets', {}), query=query)}
+    if start:
+        params['search_tweets']['start_time'] = start
+        params['search_tweets']['end_time'] = end
+
+    x = xAPI(_key(spec, 'token'), params, **spec.get('options', {}))
+    await x.search_tweets(spec.get('type', 'recent'))
+
+    output = spec['output']
+    path = _output_dir(spec, query, start)
+    kwargs = {k: output[k] for k in ['force_output'] if k in output}
+    if output['format'] == 'csv':
+        x.to_csv(path, **kwargs)
+    else:
+        x.to_json(path, **kwargs)
+
+    return {k: len(v or []) for k, v in x.results.items()}, 0, None
+
+async def _run_jobs(spec, jobs, quota=None, label=''):
+    """
+    Run jobs concurrently in one event loop, at most spec['concurrency'] at a time.
+    Returns:
+        list: One summary dict per job.
+    """
+    semaphore = asyncio.Semaphore(spec.get('concurrency', 1))
+    run_job = _run_youtube_job if spec['platform'] == 'youtube' else _run_x_job
+    state = {'used': 0, 'done': 0}
+
+    async def _run(query, start, end):
+        async with semaphore:
+            if quota is not None and state['used'] >= quota:
+                return {'query': query, 'start': start, 'status': 'skipped (quota)'}
+            t0 = time.perf_counter()
+            try:
+                # The job charges the quota it uses to state['used'] as it goes
+                counts, used, stopped = await run_job(spec, query, start, end, state, quota)
+                status = f"stopped (quota) before {stopped}" if stopped else 'done'
+                summary = {'query': query, 'start': start, 'status': status, 'counts': counts, 'quota': used}
+            except Exception as e:
+                summary = {'query': query, 'start': start, 'status': f"failed ({e})"}
+            summary['seconds'] = time.perf_counter() - t0
+            state['done'] += 1
+            print(f"[{label}{state['done']}/{len(jobs)}] {query} {start or ''}: {summary['status']} "
+                  f"{summary.get('counts', '')} in {summary['seconds']:.1f}s", flush=True)
+            return summary
+
+    return await asyncio.gather(*[_run(*i) for i in jobs])
+
+def _run_process(spec, jobs, quota, label):
+    return asyncio.run(_run_jobs(spec, jobs, quota, label))
+
+def run(spec):
+    """
+    Run every job of a spec, in one event loop or split across worker processes.
+    Returns:
+        list: One summary dict per job.
+    """
+    jobs = _jobs(spec)
+    processes = max(1, min(spec.get('processes', 1), len(jobs)))
+    quota = spec.get('quota')
+
+    if processes == 1:
+        return asyncio.run(_run_jobs(spec, jobs, quota))
+
+    # Round-robin jobs over processes, each with an equal share of the quota
+    shares = [jobs[i::processes] for i in range(processes)]
+    share_quota = quota / processes if quota is not None else None
+    with ProcessPoolExecutor(processes) as pool:
+        futures = [pool.submit(_run_process, spec, j, share_quota, f"worker {i} ") for i, j in enumerate(shares)]
+        return sum([f.result() for f in futures], [])
+
+async def _plan(spec, deadline=None):
+    """
+    Estimate the cost of a job spec without running it (one probe per query).
+    Returns:
+        dict: The estimate per platform ({'youtube': ...} or {'x': {query: ...}}).
+    """
+    if spec['platform'] == 'youtube':
+        from .youtube.YouTubeAPI import YouTubeAPI
+        from .youtube.defaults import _default_params
+        from copy import deepcopy
+
+        params = deepcopy(_default_params)
+        for k, v in spec.get('params', {}).items():
+            params.setdefault(k, {}).update(v)
+        windows = [i for i in _windows(spec) if i[0]] or None
+        yt = YouTubeAPI(_key(spec, 'key'), params, **dict(spec.get('options', {}), verbose=True))
+        return {'youtube': await yt.plan(spec['queries'], windows, spec['stages'], deadline)}
+
+    from .x.XAPI import xAPI
+    estimates = {}
+    windows = _windows(spec)
+    for query in spec['queries']:
+        params = {'search_tweets': dict(spec.get('params', {}).get('search_tweets', {}), query=query)}
+        if windows[0][0]:
+            params['search_tweets']['start_time'] = windows[0][0]
+            params['search_tweets']['end_time'] = windows[-1][1]
+        x = xAPI(_key(spec, 'token'), params, **dict(spec.get('options', {}), verbose=True))
+        print(query)
+        estimates[query] = await x.plan(spec.get('type', 'recent'), 'day', deadline)
+    return {'x': estimates}
+
+def _print_summary(summaries, seconds):
+    done = [i for i in summaries if i['status'] == 'done']
+    # Jobs stopped by the quota wrote what they collected
+    ran = [i for i in summaries if 'counts' in i]
+    items = {}
+    for i in ran:
+        for k, v in i['counts'].items():
+            items[k] = items.get(k, 0) + v
+    print(f"\n{len(done)}/{len(summaries)} jobs done in {seconds:.1f}s ({len(done) / seconds if seconds else 0:.2f} jobs/s)")
+    for k, v in items.items():
+        print(f"  {k}: {v} items ({v / seconds if seconds else 0:.1f}/s)")
+    if any(i.get('quota') for i in ran):
+        print(f"  quota: ~{sum(i.get('quota', 0) for i in ran)} units")
+    for i in summaries:
+        if i['status'] != 'done':
+            print(f"  {i['query']} {i['start'] or ''}: {i['status']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='apism', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run a job spec.')
+    run_parser.add_argument('spec', help='Path to the JSON job spec.')
+    run_parser.add_argument('--concurrency', type=int, help='Jobs run concurrently per process.')
+    run_parser.add_argument('--processes', type=int, help='Worker processes.')
+    run_parser.add_argument('--quota', type=int, help='Stop starting jobs and stages once this many quota units are used.')
+
+    plan_parser = subparsers.add_parser('plan', help='Estimate the requests, quota and time of a job spec without running it.')
+    plan_parser.add_argument('spec', help='Path to the JSON job spec.')
+    plan_parser.add_argument('--deadline', type=float, help='Target wall time in seconds, to suggest settings.')
+
+    args = parser.parse_args(argv)
+    spec = _load_spec(args.spec)
+    if args.command == 'plan':
+        asyncio.run(_plan(spec, args.deadline))
+        return 0
+
+    for k in ['concurrency', 'processes', 'quota']:
+        if getattr(args, k) is not None:
+            spec[k] = getattr(args, k)
+
+    t0 = time.perf_counter()
+    summaries = run(spec)
+    _print_summary(summaries, time.perf_counter() - t0)
+    return 0 if all(i['status'] == 'done' for i in summaries) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+JSON codec used to decode API responses and encode output files. The codec is a process-wide
+setting: the fastest installed one by default, or the one forced with set_codec().
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+_codecs = ['auto', 'orjson', 'msgspec', 'json']
+_codec = None
+
+def set_codec(name='auto'):
+    """
+    Select the JSON codec used to decode API responses and encode output files.
+    Args:
+        name (str): 'orjson', 'msgspec', 'json' (stdlib) or 'auto' to use the fastest
+            installed codec (orjson, then msgspec, then stdlib). Default='auto'
+    Returns:
+        str: The name of the codec in use.
+    """
+    global _codec
+    assert name in _codecs, f"codec must be one of {_codecs}"
+
+    if name == 'auto':
+        name = 'orjson' if orjson else 'msgspec' if msgspec else 'json'
+    if name == 'orjson' and orjson is None:
+        raise ImportError("orjson is not installed.")
+    if name == 'msgspec' and msgspec is None:
+        raise ImportError("msgspec is not installed.")
+
+    _codec = name
+    return _codec
+
+def get_codec():
+    """
+    Returns:
+        str: The name of the codec in use.
+    """
+    return _codec or set_codec()
+
+def loads(data):
+    """
+    Decode JSON from bytes or str.
+    Raises:
+        ValueError: If data is not valid JSON, whichever codec is used.
+    """
+    codec = get_codec()
+    try:
+        if codec == 'orjson':
+            return orjson.loads(data)
+        elif codec == 'msgspec':
+            return msgspec.json.decode(data)
+        else:
+            return json.loads(data)
+    except ValueError:
+        raise
+    except Exception as e:
+        # msgspec.DecodeError is not a ValueError
+        raise ValueError(str(e)) from e
+
+def dumps(obj):
+    """
+    Encode an object to JSON bytes.
+    """
+    codec = get_codec()
+    if codec == 'orjson':
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    elif codec == 'msgspec':
+        return msgspec.json.encode(obj)
+    else:
+        return json.dumps(obj).encode('utf-8')
+
+def dump(obj, file_path):
+    """
+    Write an object as JSON to file_path.
+    """
+    with open(file_path, 'wb') as json_file:
+        json_file.write(dumps(obj))
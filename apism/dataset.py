@@ -0,0 +1,231 @@
+from .codec import dumps, loads, dump
+from contextlib import contextmanager
+import csv
+import datetime
+import gzip
+import io
+import os
+import re
+import time
+import uuid
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_partitions = ['date', 'query', 'hash']
+_formats = ['jsonl', 'csv']
+_compressions = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+# Columns holding the video/tweet ID used for hash partitioning, in order of preference
+_hash_keys = ['videoId', 'snippet.videoId', 'id.videoId', 'conversation_id', 'id']
+
+def _open(path, compression):
+    """
+    Open a part for binary writing, compressing as it is written.
+    """
+    if compression == 'gzip':
+        return gzip.open(path, 'wb')
+    elif compression == 'zstd':
+        return zstandard.open(path, 'wb')
+    return open(path, 'wb')
+
+def _slug(value):
+    """
+    A directory-safe partition value.
+    """
+    return re.sub(r'[^\w\-.]+', '_', str(value)).strip('_')[:100] or '_'
+
+def _bucket(row, buckets):
+    key = next((row[i] for i in _hash_keys if row.get(i)), None)
+    return zlib.crc32(str(key).encode('utf-8')) % buckets
+
+@contextmanager
+def _locked(path, stale=60):
+    """
+    Hold the lock file `path`, created exclusively so that it excludes other processes on any platform.
+    A lock older than `stale` seconds is taken to be left by a crashed run and removed.
+    """
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > stale:
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+class _PartWriter:
+    """
+    Write rows of one partition to parts of at most `max_rows` rows.
+    """
+    def __init__(self, directory, entity, partition, columns, format, compression, max_rows, run_id):
+        self.directory = directory
+        self.entity = entity
+        self.partition = partition
+        self.columns = columns
+        self.format = format
+        self.compression = compression
+        self.max_rows = max_rows
+        self.run_id = run_id
+
+        self.parts = []
+        self._file = None
+        self._writer = None
+        self._rows = 0
+
+    def write(self, row):
+        if self._file is None or self._rows >= self.max_rows:
+            self._rotate()
+        if self.format == 'jsonl':
+            self._file.write(dumps(row) + b'\n')
+        else:
+            self._writer.writerow(row)
+        self._rows += 1
+
+    def _rotate(self):
+        self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"part-{self.run_id}-{len(self.parts):05d}.{self.format}{_compressions[self.compression]}"
+        path = os.path.join(self.directory, name)
+        self._file = _open(path, self.compression)
+        if self.format == 'csv':
+            self._text = io.TextIOWrapper(self._file, encoding='utf-8', newline='')
+            self._writer = csv.DictWriter(self._text, fieldnames=self.columns, quoting=csv.QUOTE_ALL, escapechar='\\', extrasaction='ignore')
+            self._writer.writeheader()
+        self.parts.append({'path': path, 'rows': 0})
+        self._rows = 0
+
+    def close(self):
+        if self._file is None:
+            return
+        if self.format == 'csv':
+            self._text.close()
+        else:
+            self._file.close()
+        self.parts[-1]['rows'] = self._rows
+        self._file = None
+
+def write_dataset(tables, file_path=None, **kwargs):
+    """
+    Write tables as a partitioned dataset of compressed parts, with a manifest.
+
+    Each table is written to {file_path}/{entity}/{key=value}/.../part-{run}-{n}.{format}{.gz|.zst}, with
+    at most max_rows rows per part. Parts of earlier runs are kept, and manifest.json lists every part
+    (partition values, row count, size) and the columns of each entity, so readers can prune partitions
+    and load parts in parallel. Runs writing to the same directory at once add to the manifest in turn.
+
+    Args:
+        tables (dict): Flattened rows per entity, e.g. {'videos': [{...}, ...]}.
+        file_path (str): The dataset directory. Default=current directory
+    Kwargs:
+        partition_by (str/list): Any of 'date' (run date), 'query' and 'hash' (ID hash bucket). Default=['date']
+        query (str): Value of the 'query' partition, required to partition by query. Default=None
+        buckets (int): Number of 'hash' buckets. Default=16
+        format (str): 'jsonl' or 'csv'. Default='jsonl'
+        compression (str): 'gzip', 'zstd' or None. Default='gzip'
+        max_rows (int): Rows per part. Default=100000
+        columns (dict): Columns per entity, e.g. for a fixed CSV column order. Default=columns found in the rows
+        verbose (bool): Print verbose output. Default=False
+    Returns:
+        dict: The manifest.
+    """
+    # Kwargs
+    partition_by = kwargs.get('partition_by', ['date'])
+    query        = kwargs.get('query', None)
+    buckets      = kwargs.get('buckets', 16)
+    format       = kwargs.get('format', 'jsonl')
+    compression  = kwargs.get('compression', 'gzip')
+    max_rows     = kwargs.get('max_rows', 100000)
+    columns      = kwargs.get('columns', None) or {}
+    verbose      = kwargs.get('verbose', False)
+
+    if isinstance(partition_by, str):
+        partition_by = [partition_by]
+    assert all(i in _partitions for i in partition_by), f"partition_by must be a list of {_partitions}"
+    assert 'query' not in partition_by or query, "query is required to partition by query"
+    assert format in _formats, f"format must be one of {_formats}"
+    assert compression in _compressions, f"compression must be one of {list(_compressions)}"
+    if compression == 'zstd' and zstandard is None:
+        raise ImportError("zstandard is not installed.")
+
+    # Determine file path
+    if file_path is None:
+        file_path = os.getcwd()
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    # Unique across runs started in the same microsecond, so that their parts do not collide
+    run_id = f"{now.strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+
+    files = []
+    schema = {}
+    for entity, rows in tables.items():
+        rows = [i for i in rows or [] if i]
+        if not rows:
+            continue
+        cols = columns.get(entity) or list(dict.fromkeys(key for row in rows for key in row.keys()))
+        schema[entity] = cols
+
+        writers = {}
+        for row in rows:
+            partition = {}
+            for i in partition_by:
+                if i == 'date':
+                    partition['run_date'] = now.strftime('%Y-%m-%d')
+                elif i == 'query':
+                    partition['query'] = _slug(query)
+                else:
+                    partition['bucket'] = f"{_bucket(row, buckets):03d}"
+            key = tuple(partition.items())
+            if key not in writers:
+                directory = os.path.join(file_path, entity, *[f"{k}={v}" for k, v in key])
+                writers[key] = _PartWriter(directory, entity, partition, cols, format, compression, max_rows, run_id)
+            writers[key].write(row)
+
+        for writer in writers.values():
+            writer.close()
+            for part in writer.parts:
+                files.append({
+                    'entity': entity,
+                    'path': os.path.relpath(part['path'], file_path),
+                    'partition': writer.partition,
+                    'rows': part['rows'],
+                    'format': format,
+                    'compression': compression,
+                    'bytes': os.path.getsize(part['path']),
+                    'run': run_id
+                })
+
+        if verbose:
+            print(f"{len(rows)} {entity} rows written to {sum(len(i.parts) for i in writers.values())} parts")
+
+    # Add this run to the manifest, one run at a time; write then rename so that readers never see a partial manifest
+    os.makedirs(file_path, exist_ok=True)
+    manifest_path = os.path.join(file_path, 'manifest.json')
+    with _locked(manifest_path + '.lock'):
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'rb') as f:
+                manifest = loads(f.read())
+        else:
+            manifest = {'schema': {}, 'files': []}
+
+        manifest['files'].extend(files)
+        # Columns seen across runs
+        for entity, cols in schema.items():
+            known = manifest['schema'].get(entity, [])
+            manifest['schema'][entity] = known + [i for i in cols if i not in known]
+
+        dump(manifest, f"{manifest_path}.{run_id}.tmp")
+        os.replace(f"{manifest_path}.{run_id}.tmp", manifest_path)
+    return manifest
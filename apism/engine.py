@@ -0,0 +1,220 @@
+"""
+The fetch engine shared by the YouTube and X clients: one request loop (transport, concurrency slot,
+profiling span, decode, retries and rate limiting) and one pagination loop. What differs between the
+APIs (authentication, next-page token, error signals) is described by a Platform.
+"""
+from .codec import loads
+from .failures import FetchError, QuotaExceeded
+from .limiter import _slot
+from .transport import get_transport
+from .profiler import _span
+import aiohttp
+import asyncio
+import copy
+import time
+
+class Platform:
+    """
+    How an API authenticates, pages and signals errors.
+    """
+    # Request parameter carrying the next-page token
+    page_param = None
+
+    def headers(self, credentials):
+        """
+        Returns:
+            dict: Request headers for the credentials, or None if they travel in the parameters.
+        """
+        return None
+
+    def next_token(self, data):
+        """
+        Returns:
+            str: The next-page token of a response, or None on the last page.
+        """
+        return None
+
+    def throttle_wait(self, response, retry_delay):
+        """
+        Returns:
+            float: Seconds to wait if the response is rate limited before its body is read, otherwise None.
+        """
+        return None
+
+    def check(self, response, data, slot, url, params, attempt, verbose):
+        """
+        Inspect an error response before it is retried: call `slot.throttled()` for rate limiting, raise
+        FetchError for errors that retrying cannot fix, or return True to give up quietly with (None, None).
+        """
+        return False
+
+class YouTube(Platform):
+    """
+    YouTube Data API: key in the parameters, nextPageToken, errors in the JSON body.
+    """
+    page_param = 'pageToken'
+
+    def next_token(self, data):
+        return data.get('nextPageToken')
+
+    def check(self, response, data, slot, url, params, attempt, verbose):
+        reason = _error_reason(data)
+
+        # Back off on rate limiting
+        if response.status == 429 or reason in ['rateLimitExceeded', 'userRateLimitExceeded']:
+            slot.throttled()
+
+        # Handle quota exceeded case
+        if response.status == 403 and reason in ['quotaExceeded', 'dailyLimitExceeded']:
+            print(f"API quota exceeded")
+            raise QuotaExceeded(url, response.status, attempt + 1, reason)
+
+        # Handle comments disabled case
+        if response.status == 403 and 'disabled comments' in data.get('error', {}).get('message', ''):
+            if verbose:
+                print(f"Comments are disabled for video ID: {params.get('videoId')}")
+            return True
+        return False
+
+class X(Platform):
+    """
+    X API v2: bearer token header, meta.next_token, 429 with x-rate-limit-reset.
+    """
+    page_param = 'next_token'
+
+    def headers(self, credentials):
+        return {"Authorization": f"Bearer {credentials}"}
+
+    def next_token(self, data):
+        return data.get('meta', {}).get('next_token')
+
+    def throttle_wait(self, response, retry_delay):
+        # Wait until the window resets
+        if response.status != 429:
+            return None
+        reset = response.headers.get('x-rate-limit-reset')
+        return max(float(reset) - time.time(), 0) + 1 if reset else retry_delay
+
+def _error_reason(response_data):
+    """
+    The reason of the first error of a YouTube error response (e.g. 'quotaExceeded'), if any.
+    """
+    try:
+        return response_data['error']['errors'][0]['reason']
+    except (KeyError, IndexError, TypeError):
+        return None
+
+async def fetch(platform, url, params, retry_limit=3, retry_delay=1, session=None, verbose=False, credentials=None):
+    """
+    Fetch one page with retries.
+    Args:
+        platform (Platform): The API of the URL.
+        url (str): The URL to fetch data from.
+        params (dict): Parameters to include in the request.
+        retry_limit (int): The number of attempts, rate-limited ones included. Default=3
+        retry_delay (int): The delay between retries in seconds. Default=1
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        credentials (str): Credentials sent in headers, e.g. the X bearer token. Default=None
+    Returns:
+        tuple: The response data and the next-page token, or (None, None) if the platform gave up quietly.
+    Raises:
+        FetchError: If retries are exhausted, or the platform reports an error retrying cannot fix.
+    """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await fetch(platform, url, params, retry_limit, retry_delay, session, verbose, credentials)
+
+    headers = platform.headers(credentials)
+    __params__ = copy.deepcopy(params)
+    attempt = 0
+    status = None
+
+    while attempt < retry_limit:
+        try:
+            wait = None
+            queued = time.monotonic()
+            async with _span('GET', url=url, attempt=attempt + 1) as span, _slot(url) as slot, get_transport().get(session, url, params=__params__, headers=headers) as response:
+                span['queued_ms'] = (slot.started - queued) * 1e3
+                span['status'] = response.status
+
+                wait = platform.throttle_wait(response, retry_delay)
+                if wait is not None:
+                    slot.throttled()
+                else:
+                    body = await response.read()
+                    decode = time.perf_counter()
+                    response_data = loads(body)
+                    span['decode_ms'] = (time.perf_counter() - decode) * 1e3
+
+                    if response.status == 200:
+                        return response_data, platform.next_token(response_data)
+
+                    if platform.check(response, response_data, slot, url, __params__, attempt, verbose):
+                        return None, None
+                    if verbose:
+                        print(f"Received error response: {response_data}")
+                    response.raise_for_status()
+
+            # Rate limited: wait outside the concurrency slot
+            if wait is not None:
+                if verbose:
+                    print(f"Rate limit reached. Waiting {wait:.0f} seconds...")
+                attempt += 1
+                status = 429
+                await asyncio.sleep(min(wait, 15 * 60))
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            attempt += 1
+            status = getattr(e, 'status', None)
+            if verbose:
+                print(f"Attempt {attempt} failed: {e}. Retrying in {retry_delay} seconds...")
+            await asyncio.sleep(retry_delay)
+
+    # If all retries fail, raise an exception
+    raise FetchError(url, status, attempt)
+
+class Pages:
+    """
+    Follow the next-page tokens of a paginated endpoint:
+
+        pages = Pages(fetch_page, params, YouTube())
+        async for data in pages:
+            ...
+
+    `params` (the parameters of the next request), `page_token` (the token of the page being
+    fetched, e.g. to record a failure) and `next_token` (the token of the page after the one just
+    yielded) can be read, and params changed, between pages.
+    Args:
+        fetch_page (callable): Coroutine function params -> (data, next-page token).
+        params (dict): Parameters of the first page (copied).
+        platform (Platform): The API, whose page_param carries the next-page token.
+        max_pages (int): Stop after this many pages. Default=None (all pages)
+    """
+    def __init__(self, fetch_page, params, platform, max_pages=None):
+        self.fetch_page = fetch_page
+        self.params = copy.deepcopy(params)
+        self.page_param = platform.page_param
+        self.max_pages = max_pages
+        self.pages = 0
+        self.next_token = None
+
+    @property
+    def page_token(self):
+        return self.params.get(self.page_param)
+
+    def __aiter__(self):
+        return self._pages()
+
+    async def _pages(self):
+        while self.max_pages is None or self.pages < self.max_pages:
+            data, self.next_token = await self.fetch_page(self.params)
+            self.pages += 1
+            if data:
+                yield data
+
+            # Stop when no more pages are available
+            if not self.next_token:
+                break
+            self.params[self.page_param] = self.next_token
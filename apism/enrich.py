@@ -0,0 +1,90 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+
+class Enricher:
+    """
+    Run a CPU-heavy function (language detection, scoring, normalisation, ...) on batches of records
+    in a process or thread pool while fetching continues. Batches are submitted as pages arrive; at
+    most `max_in_flight` batches wait in the pool, after which fetching pauses until one finishes.
+
+    `fn` takes a list of records (dicts) and returns a list of dicts of the same length; each returned
+    dict is merged into its record, so the new fields (listed in `fields`) are written by to_json and
+    to_csv, with default_cols=True too. With a process pool, `fn` must be defined at module level so
+    that it can be pickled.
+
+    Args:
+        fn (callable): The enrichment function, list of records -> list of dicts of new fields.
+        executor (str/Executor): 'process', 'thread' (for code that releases the GIL) or an Executor. Default='process'
+        max_workers (int): Workers of the pool, if created here. Default=None (the executor's default)
+        batch_size (int): Records per batch. Default=100
+        max_in_flight (int): Batches submitted but not yet merged. Default=4
+    """
+    def __init__(self, fn, executor='process', max_workers=None, batch_size=100, max_in_flight=4):
+        assert executor in ['process', 'thread'] or isinstance(executor, Executor), "executor must be 'process', 'thread' or an Executor"
+        self.fn = fn
+        self.executor = executor
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+
+        self.records = 0
+        self.errors = 0
+        self.fields = {}
+        self._pool = executor if isinstance(executor, Executor) else None
+        self._pending = set()
+        self._semaphore = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            pool = ProcessPoolExecutor if self.executor == 'process' else ThreadPoolExecutor
+            self._pool = pool(max_workers=self.max_workers)
+        return self._pool
+
+    async def submit(self, records):
+        """
+        Queue records for enrichment, waiting only while `max_in_flight` batches are already queued.
+        Args:
+            records (list): Records (dicts) to enrich in place.
+        """
+        # Created here so that the semaphore belongs to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        records = [i for i in records if isinstance(i, dict)]
+
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            await self._semaphore.acquire()
+            task = asyncio.ensure_future(self._run(batch))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _run(self, batch):
+        try:
+            fields = await asyncio.get_running_loop().run_in_executor(self._get_pool(), self.fn, batch)
+            for record, new in zip(batch, fields):
+                if new:
+                    record.update(new)
+                    self.fields.update(dict.fromkeys(new))
+            self.records += len(batch)
+        except Exception as e:
+            self.errors += len(batch)
+            print(f"Error enriching {len(batch)} records: {e}")
+        finally:
+            self._semaphore.release()
+
+    async def drain(self):
+        """
+        Wait for every submitted batch to be merged.
+        """
+        while self._pending:
+            await asyncio.gather(*list(self._pending))
+        # Every slot is free again; the next submit may run in another event loop
+        self._semaphore = None
+
+    def close(self):
+        """
+        Shut down the pool, if it was created here.
+        """
+        if self._pool is not None and not isinstance(self.executor, Executor):
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,96 @@
+from .codec import loads, dump
+import datetime
+import os
+
+class FetchError(Exception):
+    """Raised when a request still fails after retries, or the quota is exhausted."""
+    def __init__(self, url, status=None, attempts=0, message=''):
+        self.url = url
+        self.status = status
+        self.attempts = attempts
+        self.message = message
+        super().__init__(f"Failed to fetch data from {url} after {attempts} attempts" + (f" ({status}: {message})" if status else '') + '.')
+
+class QuotaExceeded(FetchError):
+    """Raised when the API quota is exhausted: no further request of the run can succeed."""
+
+class FailureLedger:
+    """
+    Structured record of the units of work (endpoint, ID, page token) that failed, so that only
+    those can be replayed later. Saved as failures.json next to the output.
+    Args:
+        path (str): Directory or file of a saved ledger to load. Default=None
+    """
+    def __init__(self, path=None):
+        self.entries = []
+        # The error that stopped the run (an exhausted quota): later units are skipped, not sent
+        self.stopped = None
+        if path is not None:
+            self.load(path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def record(self, endpoint, id, page_token=None, error=None, **kwargs):
+        """
+        Record a failed unit of work.
+        Args:
+            endpoint (str): The endpoint, e.g. 'videos' or a URL.
+            id (str): The video ID, query, etc. the unit was fetching.
+            page_token (str): The page that failed, if not the first. Default=None
+            error (Exception): The error raised. Default=None
+            **kwargs: Anything else needed to replay the unit (e.g. params).
+        """
+        if isinstance(error, QuotaExceeded):
+            self.stopped = error
+        self.entries.append(dict({
+            'endpoint': endpoint,
+            'id': id,
+            'pageToken': page_token,
+            'status': getattr(error, 'status', None),
+            'error': type(error).__name__ if error is not None else None,
+            'message': str(error) if error is not None else None,
+            'attempts': getattr(error, 'attempts', None),
+            'time': datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        }, **kwargs))
+
+    def skip(self, endpoint, id, page_token=None, **kwargs):
+        """
+        Record a unit of work that was not sent because the run was stopped, to replay it later.
+        """
+        self.record(endpoint, id, page_token, None, skipped=str(self.stopped), **kwargs)
+
+    def take(self, endpoint=None):
+        """
+        Remove and return the entries to replay.
+        Args:
+            endpoint (str): Only take entries of this endpoint. Default=None (all)
+        Returns:
+            list: The entries.
+        """
+        # Replaying is a new attempt
+        self.stopped = None
+        taken = [i for i in self.entries if endpoint is None or i['endpoint'] == endpoint]
+        self.entries = [i for i in self.entries if not (endpoint is None or i['endpoint'] == endpoint)]
+        return taken
+
+    def load(self, path):
+        """
+        Add the entries of a saved ledger (failures.json, or the directory holding it).
+        """
+        if os.path.isdir(path):
+            path = os.path.join(path, 'failures.json')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.entries.extend(loads(f.read()))
+        return self
+
+    def save(self, file_path=None):
+        """
+        Write the ledger to failures.json in file_path, or remove a stale one if nothing failed.
+        """
+        path = os.path.join(file_path or os.getcwd(), 'failures.json')
+        if self.entries:
+            dump(self.entries, path)
+        elif os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,214 @@
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+import asyncio
+import functools
+import time
+
+class AdaptiveLimiter:
+    """
+    Adaptive (AIMD) limit on the number of requests in flight.
+
+    The limit grows additively (by `increase` per limit's worth of healthy responses, i.e. about
+    once per round trip) while latency stays within `latency_tolerance` times the best latency
+    seen, and is cut multiplicatively by `decrease` on throttling (429, rate-limit 403s, timeouts)
+    or when the smoothed rate of errors (5xx, connection errors) rises above `error_tolerance`.
+    Requests already in flight when the limit was cut do not cut it again.
+
+    Each endpoint gets a limiter of its own from `endpoint(name)`, with the same settings, so that a
+    slow endpoint neither sets the latency baseline of a fast one nor holds its slots.
+
+    Args:
+        initial (int): The starting limit. Default=4
+        minimum (int): The lowest limit. Default=1
+        maximum (int): The highest limit. Default=64
+        increase (float): Additive increase per round trip. Default=1
+        decrease (float): Multiplicative decrease on throttling. Default=0.5
+        latency_tolerance (float): Latency, as a multiple of the best latency seen, above which
+            the limit stops growing and is cut. Default=3
+        error_tolerance (float): Smoothed share of failed requests above which the limit stops
+            growing and is cut. Default=0.1
+    """
+    def __init__(self, initial=4, minimum=1, maximum=64, increase=1, decrease=0.5, latency_tolerance=3, error_tolerance=0.1):
+        self.initial = initial
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.error_tolerance = error_tolerance
+
+        self.in_flight = 0
+        self.latency = None
+        self.min_latency = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.throttles = 0
+        self.errors = 0
+        self.endpoints = {}
+        self._last_decrease = 0
+        self._waiters = []
+
+    def __repr__(self):
+        return f"AdaptiveLimiter(limit={self.limit:.1f}, in_flight={self.in_flight}, latency={self.latency})"
+
+    def stats(self):
+        """
+        Returns:
+            dict: The current limit, requests in flight, smoothed latency and error rate and counters,
+                and the same for each endpoint under 'endpoints', for monitoring.
+        """
+        stats = {
+            'limit': int(self.limit),
+            'in_flight': self.in_flight,
+            'latency': self.latency,
+            'min_latency': self.min_latency,
+            'error_rate': self.error_rate,
+            'requests': self.requests,
+            'throttles': self.throttles,
+            'errors': self.errors
+        }
+        if self.endpoints:
+            stats['endpoints'] = {name: limiter.stats() for name, limiter in self.endpoints.items()}
+        return stats
+
+    def endpoint(self, name):
+        """
+        Args:
+            name (str): The endpoint, e.g. its URL.
+        Returns:
+            AdaptiveLimiter: The limiter of the endpoint, created with the settings of this one on first use.
+        """
+        if name not in self.endpoints:
+            self.endpoints[name] = AdaptiveLimiter(
+                self.initial, self.minimum, self.maximum, self.increase, self.decrease,
+                self.latency_tolerance, self.error_tolerance
+            )
+        return self.endpoints[name]
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Wait for a free slot and hold it for one request. Call `slot.throttled()` on the yielded
+        object if the request was throttled, or `slot.failed()` if it failed; timeouts count as
+        throttling, and other exceptions leaving the block (except 4xx responses) as failures.
+        """
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass a wake-up this waiter received on to the next one
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+        slot = _Slot()
+        try:
+            yield slot
+        except asyncio.TimeoutError:
+            slot.throttled()
+            raise
+        except asyncio.CancelledError:
+            slot.cancelled = True
+            raise
+        except Exception as e:
+            # 4xx are errors of the request, not of the load on the server
+            status = getattr(e, 'status', None)
+            if not isinstance(status, int) or status >= 500:
+                slot.failed()
+            raise
+        finally:
+            self.in_flight -= 1
+            if not slot.cancelled:
+                self._update(slot, time.monotonic() - slot.started)
+            self._wake()
+
+    def _wake(self):
+        # Wake as many waiters as there are free slots
+        free = int(self.limit) - self.in_flight
+        for waiter in list(self._waiters[:max(free, 0)]):
+            self._waiters.remove(waiter)
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _update(self, slot, latency):
+        self.requests += 1
+        if slot.is_throttled:
+            self.throttles += 1
+            self._cut(slot.started)
+            return
+
+        self.error_rate = 0.9 * self.error_rate + 0.1 * slot.is_failed
+        if slot.is_failed:
+            # A failed request says nothing about latency
+            self.errors += 1
+        else:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            self.min_latency = latency if self.min_latency is None else min(self.min_latency, latency)
+
+        if self.error_rate > self.error_tolerance or (self.latency is not None and self.latency > self.latency_tolerance * self.min_latency):
+            self._cut(slot.started)
+        else:
+            self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+
+    def _cut(self, started):
+        # Once per round trip: ignore requests that started before the last cut
+        if started < self._last_decrease:
+            return
+        self.limit = max(self.minimum, self.limit * self.decrease)
+        self._last_decrease = time.monotonic()
+
+class _Slot:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.is_throttled = False
+        self.is_failed = False
+        self.cancelled = False
+
+    def throttled(self):
+        self.is_throttled = True
+
+    def failed(self):
+        self.is_failed = True
+
+# Limiter of the client running in the current task (tasks inherit it from the method that started them)
+_current_limiter = ContextVar('apism_limiter', default=None)
+
+@contextmanager
+def _use_limiter(limiter):
+    """
+    Make `limiter` the limiter of the requests made inside the block (and the tasks it starts).
+    """
+    token = _current_limiter.set(limiter)
+    try:
+        yield limiter
+    finally:
+        _current_limiter.reset(token)
+
+@asynccontextmanager
+async def _slot(endpoint):
+    """
+    A slot of the current limiter's limiter for `endpoint`, or a no-op slot if there is none.
+    """
+    limiter = _current_limiter.get()
+    if limiter is None:
+        yield _Slot()
+    else:
+        async with limiter.endpoint(endpoint).slot() as slot:
+            yield slot
+
+def _limited(method):
+    """
+    Decorator for client methods: requests made by the method go through the client's `limiter`.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        with _use_limiter(self.limiter):
+            return await method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,280 @@
+"""
+Opt-in profiling of collection runs.
+
+A Profiler records a span for every phase (client method, flattening, writing) and every request
+attempt (time queued for a concurrency slot, time on the network, JSON decode), with cProfile and
+tracemalloc summaries per top-level phase. Top-level phases that overlap (concurrent client methods,
+or several profilers) share one cProfile run, since only one can be active at a time, and each of them
+gets its summary when the last one ends. The spans export to a Chrome trace / Perfetto JSON
+timeline (chrome://tracing or https://ui.perfetto.dev) where each concurrent request has its own lane.
+
+    yt = YouTubeAPI(key, profile=True)
+    ...
+    yt.profiler.summary()
+    yt.profiler.export('trace.json')
+
+A client's profiler only records the methods and requests of that client. set_profiler() sets the
+default of clients without one.
+"""
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from .codec import dump
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+class Profiler:
+    """
+    Collect spans and per-phase CPU and memory summaries.
+    Args:
+        cpu (bool): Run cProfile during each top-level phase. Default=True
+        memory (bool): Trace allocations with tracemalloc during each top-level phase. Default=True
+        top (int): Functions and allocation sites kept in each phase summary. Default=10
+    """
+    def __init__(self, cpu=True, memory=True, top=10):
+        self.cpu = cpu
+        self.memory = memory
+        self.top = top
+
+        self.events = []
+        self.phases = []
+        self._t0 = time.perf_counter()
+        self._lanes = []
+
+    def __repr__(self):
+        return f"Profiler({len(self.phases)} phases, {len(self.events)} spans)"
+
+    def _now(self):
+        # Microseconds since the profiler was created, the unit of Chrome traces
+        return (time.perf_counter() - self._t0) * 1e6
+
+    def _event(self, name, cat, ts, tid, args):
+        self.events.append({'name': name, 'cat': cat, 'ph': 'X', 'ts': ts, 'dur': self._now() - ts, 'pid': os.getpid(), 'tid': tid, 'args': args})
+
+    @contextmanager
+    def phase(self, name, **args):
+        """
+        Span of a collection phase. Top-level phases (of the current task) are profiled with cProfile
+        and tracemalloc.
+        """
+        phases = _open_phases.get()
+        top_level = self not in phases
+        token = _open_phases.set(phases + (self,))
+        summary = {'phase': name}
+        cpu = self.cpu and top_level
+        memory = self.memory and top_level
+        if cpu:
+            _start_cpu()
+        if memory:
+            _start_tracing()
+            before = tracemalloc.take_snapshot()
+        ts = self._now()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            summary['seconds'] = time.perf_counter() - t0
+            _open_phases.reset(token)
+            self._event(name, 'phase', ts, 'phases', args)
+            if memory:
+                summary['memory_peak'] = tracemalloc.get_traced_memory()[1]
+                summary['allocations'] = [str(i) for i in tracemalloc.take_snapshot().compare_to(before, 'lineno')[:self.top]]
+                _stop_tracing()
+            if cpu:
+                _stop_cpu(summary, self.top)
+            if top_level:
+                self.phases.append(summary)
+
+    @contextmanager
+    def span(self, name, cat='request', **args):
+        """
+        Span of one unit of concurrent work, drawn on the lowest free lane of the timeline.
+        Yields the span's args, to which results (e.g. status) can be added.
+        """
+        lane = next((i for i, busy in enumerate(self._lanes) if not busy), len(self._lanes))
+        if lane == len(self._lanes):
+            self._lanes.append(True)
+        self._lanes[lane] = True
+        ts = self._now()
+        try:
+            yield args
+        finally:
+            self._lanes[lane] = False
+            self._event(name, cat, ts, f"lane {lane:03d}", args)
+
+    def summary(self, verbose=True):
+        """
+        Args:
+            verbose (bool): Print the summary. Default=True
+        Returns:
+            list: Per top-level phase: seconds, top functions by cumulative time, peak traced memory
+                and top allocation sites.
+        """
+        if verbose:
+            for i in self.phases:
+                print(f"{i['phase']}: {i['seconds']:.3f}s" + (f", peak memory {i['memory_peak'] / 2**20:.1f} MiB" if 'memory_peak' in i else ''))
+                for j in i.get('cpu', [])[:5]:
+                    print(f"    {j['cumulative']:.3f}s  {j['function']}")
+            requests = [i for i in self.events if i['cat'] == 'request' and i['name'] == 'GET']
+            if requests:
+                print(f"{len(requests)} requests, {sum(i['dur'] for i in requests) / len(requests) / 1e3:.0f} ms on average, up to {len(self._lanes)} concurrent")
+        return self.phases
+
+    def export(self, file_path):
+        """
+        Write the spans as a Chrome trace / Perfetto JSON timeline.
+        Args:
+            file_path (str): The trace file, e.g. 'trace.json'.
+        """
+        lanes = sorted({i['tid'] for i in self.events})
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': i, 'args': {'name': i}} for i in lanes]
+        dump({'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'}, file_path)
+
+def _top_functions(profile, top):
+    """
+    The functions with the most cumulative time of a cProfile run, leaving out the event loop itself
+    (whose cumulative time is the whole phase).
+    """
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (file, line, function), (cc, nc, tt, ct, callers) in stats.stats.items():
+        if f"{os.sep}asyncio{os.sep}" in file or file.endswith('selectors.py') or (file == '~' and ('select' in function or '_contextvars' in function)):
+            continue
+        rows.append({'function': f"{function} ({os.path.basename(file)}:{line})", 'calls': nc, 'total': tt, 'cumulative': ct})
+    return sorted(rows, key=lambda i: i['cumulative'], reverse=True)[:top]
+
+# Profilers in a top-level phase in the current task
+_open_phases = ContextVar('apism_open_phases', default=())
+
+# The cProfile run shared by the top-level phases open in the process, and the summaries (with the
+# number of top functions) waiting for it to end
+_lock = threading.Lock()
+_cpu_profile = None
+_cpu_users = 0
+_cpu_summaries = []
+
+def _start_cpu():
+    global _cpu_profile, _cpu_users
+    with _lock:
+        if _cpu_users == 0:
+            _cpu_profile = cProfile.Profile()
+            _cpu_profile.enable()
+        _cpu_users += 1
+
+def _stop_cpu(summary, top):
+    global _cpu_profile, _cpu_users, _cpu_summaries
+    with _lock:
+        _cpu_summaries.append((summary, top))
+        _cpu_users -= 1
+        if _cpu_users > 0:
+            return
+        profile, summaries = _cpu_profile, _cpu_summaries
+        _cpu_profile, _cpu_summaries = None, []
+        profile.disable()
+    functions = _top_functions(profile, max(i[1] for i in summaries))
+    for summary, top in summaries:
+        summary['cpu'] = functions[:top]
+
+# tracemalloc is started by the first top-level phase and stopped by the last (unless it was already tracing)
+_tracing_users = 0
+_tracing_started = False
+
+def _start_tracing():
+    global _tracing_users, _tracing_started
+    with _lock:
+        if _tracing_users == 0:
+            _tracing_started = not tracemalloc.is_tracing()
+            if _tracing_started:
+                tracemalloc.start()
+        _tracing_users += 1
+
+def _stop_tracing():
+    global _tracing_users
+    with _lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_started:
+            tracemalloc.stop()
+
+_profiler = None
+
+# Profiler of the client running in the current task (tasks inherit it from the method that started them)
+_current_profiler = ContextVar('apism_profiler', default=None)
+
+def set_profiler(profiler=None):
+    """
+    Set the profiler of the requests and phases of clients without one.
+    Args:
+        profiler (bool/Profiler): A Profiler, True for a new one, or None/False to stop profiling. Default=None
+    Returns:
+        The Profiler in use, or None.
+    """
+    global _profiler
+    _profiler = Profiler() if profiler is True else profiler or None
+    return _profiler
+
+def get_profiler():
+    """
+    Returns:
+        The Profiler of the current client, or the default one, or None.
+    """
+    profiler = _current_profiler.get()
+    return _profiler if profiler is None else profiler
+
+@contextmanager
+def _use_profiler(profiler):
+    """
+    Make `profiler` the profiler of the phases and requests inside the block (and the tasks it starts).
+    None keeps the default profiler.
+    """
+    token = _current_profiler.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _current_profiler.reset(token)
+
+@contextmanager
+def _phase(name, **args):
+    """
+    A phase span of the current profiler, or a no-op if there is none.
+    """
+    profiler = get_profiler()
+    if profiler is None:
+        yield
+    else:
+        with profiler.phase(name, **args):
+            yield
+
+@asynccontextmanager
+async def _span(name, cat='request', **args):
+    """
+    A span of the current profiler, or a no-op if there is none. Yields the span's args (or a throwaway dict).
+    """
+    profiler = get_profiler()
+    if profiler is None:
+        yield args
+    else:
+        with profiler.span(name, cat, **args) as span_args:
+            yield span_args
+
+def _profiled(method):
+    """
+    Decorator for client methods: the call is a phase named after the method, recorded by the
+    client's `profiler` together with the requests it makes.
+    """
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            with _use_profiler(self.profiler), _phase(method.__name__):
+                return await method(self, *args, **kwargs)
+    else:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with _use_profiler(self.profiler), _phase(method.__name__):
+                return method(self, *args, **kwargs)
+    return wrapper
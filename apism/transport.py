@@ -0,0 +1,192 @@
+"""
+Pluggable transport under the fetch engine (apism.engine) shared by both clients.
+
+By default requests go straight to the aiohttp session. A Cassette records request/response pairs
+(with API keys scrubbed) to a gzip-compressed NDJSON file, or replays them without the network,
+at full speed or with the recorded latency:
+
+    yt = YouTubeAPI(key, cassette=Cassette('run.jsonl.gz', mode='record'))
+    yt = YouTubeAPI(key, cassette=Cassette('run.jsonl.gz', mode='replay', latency=True))
+
+A client's cassette only applies to the requests of that client. set_transport() sets the default of
+clients without one.
+"""
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+import aiohttp
+import asyncio
+import functools
+import gzip
+import json
+import time
+from yarl import URL
+
+# Request parameters never written to a cassette
+_scrubbed = ['key', 'access_token']
+
+# Response headers never written to a cassette
+_dropped_headers = ['set-cookie']
+
+class CassetteError(LookupError):
+    """Raised in replay mode when a request was not recorded."""
+
+class _Direct:
+    """
+    The default transport: send requests with the aiohttp session.
+    """
+    def get(self, session, url, params=None, headers=None):
+        return session.get(url, params=params, headers=headers)
+
+def _request_key(url, params):
+    return json.dumps([url, sorted((k, str(v)) for k, v in (params or {}).items() if k not in _scrubbed)])
+
+class Cassette:
+    """
+    Record or replay HTTP interactions.
+    Args:
+        path (str): The cassette file (gzip-compressed NDJSON).
+        mode (str): 'record' (send requests and append them to the cassette) or 'replay'
+            (serve recorded responses, raising CassetteError for unrecorded requests). Default='replay'
+        latency (bool): In replay mode, wait for the recorded latency of each response. Default=False
+    """
+    def __init__(self, path, mode='replay', latency=False):
+        assert mode in ['record', 'replay'], "mode must be either 'record' or 'replay'"
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.interactions = {}
+
+        if mode == 'replay':
+            # Identical requests are served in the order they were recorded
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    interaction = json.loads(line)
+                    self.interactions.setdefault(_request_key(interaction['url'], interaction['params']), []).append(interaction)
+
+    def __len__(self):
+        return sum(len(i) for i in self.interactions.values())
+
+    def get(self, session, url, params=None, headers=None):
+        if self.mode == 'replay':
+            return self._replay(url, params)
+        return self._record(session, url, params, headers)
+
+    @asynccontextmanager
+    async def _replay(self, url, params):
+        recorded = self.interactions.get(_request_key(url, params))
+        if not recorded:
+            raise CassetteError(f"No recorded response for {url} {_request_key(url, params)}")
+        interaction = recorded.pop(0) if len(recorded) > 1 else recorded[0]
+        if self.latency:
+            await asyncio.sleep(interaction['latency'])
+        yield _ReplayResponse(url, interaction)
+
+    @asynccontextmanager
+    async def _record(self, session, url, params, headers):
+        t0 = time.perf_counter()
+        async with session.get(url, params=params, headers=headers) as response:
+            recording = _RecordingResponse(response)
+            try:
+                yield recording
+            finally:
+                self._write({
+                    'url': url,
+                    'params': {k: v for k, v in (params or {}).items() if k not in _scrubbed},
+                    'status': response.status,
+                    'reason': response.reason,
+                    'headers': {k: v for k, v in response.headers.items() if k.lower() not in _dropped_headers},
+                    'body': (recording.body or b'').decode('utf-8', errors='replace'),
+                    'latency': time.perf_counter() - t0
+                })
+
+    def _write(self, interaction):
+        # Each write is a complete gzip member, so the cassette stays readable if a run is interrupted
+        with gzip.open(self.path, 'at', encoding='utf-8') as f:
+            f.write(json.dumps(interaction) + '\n')
+
+class _RecordingResponse:
+    """
+    Proxy of an aiohttp response that keeps the body it read.
+    """
+    def __init__(self, response):
+        self._response = response
+        self.body = None
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    async def read(self):
+        self.body = await self._response.read()
+        return self.body
+
+    async def text(self, encoding='utf-8'):
+        return (await self.read()).decode(encoding)
+
+class _ReplayResponse:
+    """
+    Response served from a cassette, with the parts of the aiohttp response the fetchers use.
+    """
+    def __init__(self, url, interaction):
+        self.url = url
+        self.status = interaction['status']
+        self.reason = interaction.get('reason')
+        self.headers = interaction.get('headers', {})
+        self._body = interaction['body'].encode('utf-8')
+
+    async def read(self):
+        return self._body
+
+    async def text(self, encoding='utf-8'):
+        return self._body.decode(encoding)
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            request_info = aiohttp.RequestInfo(URL(self.url), 'GET', {}, URL(self.url))
+            raise aiohttp.ClientResponseError(request_info, (), status=self.status, message=self.reason or '', headers=self.headers)
+
+_transport = _Direct()
+
+# Transport of the client running in the current task (tasks inherit it from the method that started them)
+_current_transport = ContextVar('apism_transport', default=None)
+
+def set_transport(transport=None):
+    """
+    Set the transport of requests made by clients without a cassette.
+    Args:
+        transport (Cassette): A Cassette, or None for direct requests. Default=None
+    Returns:
+        The transport in use.
+    """
+    global _transport
+    _transport = _Direct() if transport is None else transport
+    return _transport
+
+def get_transport():
+    """
+    Returns:
+        The transport of the current client, or the default one.
+    """
+    transport = _current_transport.get()
+    return _transport if transport is None else transport
+
+@contextmanager
+def _use_transport(transport):
+    """
+    Make `transport` the transport of the requests made inside the block (and the tasks it starts).
+    None keeps the default transport.
+    """
+    token = _current_transport.set(transport)
+    try:
+        yield transport
+    finally:
+        _current_transport.reset(token)
+
+def _transported(method):
+    """
+    Decorator for client methods: requests made by the method go through the client's `transport`.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        with _use_transport(self.transport):
+            return await method(self, *args, **kwargs)
+    return wrapper
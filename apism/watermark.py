@@ -0,0 +1,47 @@
+from .codec import loads, dump
+import datetime
+import os
+
+def _now():
+    """
+    The current UTC time in the RFC 3339 format of both APIs, to the second.
+    """
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+class Watermarks:
+    """
+    Per-query watermarks of recurring searches (the end of the last successful search and, for X,
+    the newest tweet ID), saved as JSON so that the next run only searches what is new.
+    Args:
+        path (str): The JSON file holding the watermarks.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.marks = {}
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.marks = loads(f.read())
+
+    def __repr__(self):
+        return f"Watermarks({self.path!r}, {len(self.marks)} queries)"
+
+    def get(self, key, default=None):
+        """
+        Args:
+            key (str): The search, e.g. 'youtube/search/FTX'.
+        Returns:
+            The watermark of the last successful search, or default.
+        """
+        return self.marks.get(key, default)
+
+    def set(self, key, value):
+        """
+        Move the watermark of a search forward and save the file.
+        """
+        self.marks[key] = value
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write then rename so that an interrupted run keeps the previous watermarks
+        dump(self.marks, self.path + '.tmp')
+        os.replace(self.path + '.tmp', self.path)
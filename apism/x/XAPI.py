@@ -1,6 +1,19 @@
 from .search_tweets import search_tweets
+from .tweets import _tweets
+from .tweet_counts import tweet_counts, _plan_shards
+from .plan import _plan_search
+from .conversations import conversations, _reply_trees
+from .lookup import tweets_lookup, users_lookup, _lookup
+from .stream import filtered_stream, stream_rules, update_stream_rules, _stream_url
+from .expansions import _index_includes, _hydrate
+from .save_as import to_json, to_csv, to_dataset
+from ..transport import _transported
+from ..failures import FailureLedger
+from ..watermark import Watermarks, _now
+from ..limiter import AdaptiveLimiter, _limited
 import asyncio
 import aiohttp
+import time
 from copy import deepcopy
 
 class xAPI:
@@ -15,6 +28,13 @@ class xAPI:
         verbose (bool): Print verbose output. Default=False
         async_delay(float/int): Delay in seconds between starting each task.
         sequential (bool): Concurrent (False) or sequential (True) API calls. Default=False
+        max_concurrency (int): Maximum number of concurrent requests for sharded searches. Default=4
+        stream_url (str): The filtered stream endpoint, e.g. a local mock server. Default=https://api.twitter.com/2/tweets/search/stream
+        queue_size (int): Maximum number of stream messages buffered before reading pauses. Default=1000
+        adaptive (bool/AdaptiveLimiter): Adapt the number of requests in flight to latency and throttling (AIMD),
+            within max_concurrency. Default=False
+        cassette (Cassette): Record this client's requests to, or replay them from, a cassette file (see apism.transport). Default=None
+        watermarks (str/Watermarks): JSON file of per-query watermarks used by search_tweets(incremental=True). Default=None
     """
     def __init__(self, token, params, **kwargs):
         # Required
@@ -27,20 +47,118 @@ class xAPI:
         self.verbose = kwargs.get('verbose', False)
         self.async_delay = kwargs.get('async_delay', 0)
         self.sequential = kwargs.get('sequential', False)
+        self.transport = kwargs.get('cassette', None)
+        self.max_concurrency = kwargs.get('max_concurrency', 4)
+        self.stream_url = kwargs.get('stream_url', _stream_url)
+        self.queue_size = kwargs.get('queue_size', 1000)
+        self.limiter = kwargs.get('adaptive', False)
+        if self.limiter is True:
+            self.limiter = AdaptiveLimiter()
+        self.limiter = self.limiter or None
+        self.watermarks = kwargs.get('watermarks', None)
+        if isinstance(self.watermarks, str):
+            self.watermarks = Watermarks(self.watermarks)
 
         # Dictionary to store output
         self.results = {}
 
+        # Includes (users, media, ...) indexed by ID
+        self.includes = {}
+
+        # Reply trees by conversation ID
+        self.trees = {}
+
+        # Units of work that failed, saved as failures.json next to the output
+        self.failures = FailureLedger()
+
+    # ==============================================
+    # Method to count tweets
+    # ==============================================
+    @_limited
+    @_transported
+    async def tweet_counts(self, type, granularity='hour', session=None):
+        """
+        Count tweets matching the search query over time, e.g. to estimate the cost of a search.
+        Args:
+            type (str): The type of counts to return. Options are 'recent' or 'all'.
+            granularity (str): Bucket size: 'minute', 'hour' or 'day'. Default='hour'
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            list: Count buckets ({'start', 'end', 'tweet_count'}).
+        """
+        # Assert if search parameters are present
+        assert 'search_tweets' in self.params.keys(), "Search parameters not found in params."
+
+        # Assert if type is either 'recent' or 'all'
+        assert type in ['recent', 'all'], "Type must be either 'recent' or 'all'"
+
+        # Count parameters
+        count_params = deepcopy(self.params['search_tweets'])
+        count_params['granularity'] = granularity
+
+        # Call counts API
+        self.results['tweet_counts'] = await tweet_counts(
+            self.token, 
+            type,
+            count_params,
+            self.retry_limit,
+            self.retry_delay,
+            session,
+            self.verbose
+        )
+
+        if self.verbose:
+            total = sum(i['tweet_count'] for i in self.results['tweet_counts'])
+            max_results = count_params.get('max_results', 10)
+            print(f"{total} tweets counted (~{-(-total // max_results)} search requests at max_results={max_results})")
+
+        return self.results['tweet_counts']
+
+    # ==============================================
+    # Method to estimate the cost of a search
+    # ==============================================
+    @_transported
+    async def plan(self, type, granularity='day', deadline=None, session=None):
+        """
+        Dry run: estimate the tweets, requests and wall time of search_tweets from tweet counts and the
+        rate limit of the search type. With a deadline, suggest max_results, shards and app tokens.
+        Args:
+            type (str): 'recent' or 'all'.
+            granularity (str): Count bucket size: 'minute', 'hour' or 'day'. Default='day'
+            deadline (float/int): Target wall time in seconds. Default=None
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            dict: {'tweets', 'requests', 'seconds', 'rate_limited_seconds', 'suggestion'}, also stored in self.estimate.
+        """
+        t0 = time.perf_counter()
+        counts = await self.tweet_counts(type, granularity, session)
+        latency = time.perf_counter() - t0
+
+        self.estimate = _plan_search(counts, type, self.params['search_tweets'], latency, deadline, self.max_concurrency)
+
+        if self.verbose:
+            print(f"{self.estimate['tweets']} tweets, {self.estimate['requests']} requests, ~{self.estimate['seconds']:.0f}s")
+            if self.estimate['suggestion']:
+                print(f"Suggested settings: {self.estimate['suggestion']}")
+
+        return self.estimate
+
     # ==============================================
     # Method to search for tweets
     # ==============================================
-    async def search_tweets(self, type, session=aiohttp.ClientSession()):
+    @_limited
+    @_transported
+    async def search_tweets(self, type, session=None, shards=None, granularity='hour', incremental=False):
         """
         Search for tweets based on a query.
         Args:
             type (str): The type of search results to return. Options are 'recent' or 'all'.
-            params (dict): A dictionary containing search parameters.
             session (aiohttp.ClientSession): The session used to make HTTP requests.
+            shards (int): Split the time range into up to this many shards with roughly equal tweet counts
+                (planned with tweet_counts) and fetch them concurrently. Default=None (one sequential search)
+            granularity (str): Count bucket size used to plan shards: 'minute', 'hour' or 'day'. Default='hour'
+            incremental (bool): Only search tweets newer than the last successful incremental search of the
+                query: since_id its newest tweet, or start_time its end if it found none. Default=False
         Returns:
             list: A list of search results.
         """
@@ -50,20 +168,402 @@ class xAPI:
         # Assert if type is either 'recent' or 'all'
         assert type in ['recent', 'all'], "Type must be either 'recent' or 'all'"
 
+        assert not incremental or self.watermarks is not None, "incremental search requires watermarks."
+        assert not (incremental and shards), "incremental search cannot be sharded."
+
         # Search parameters
         search_params = deepcopy(self.params['search_tweets'])
 
-        # Call search API
-        self.results['search_tweets'] = await search_tweets(
-            self.token, 
+        # Share one session across all requests
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.search_tweets(type, session, shards, granularity, incremental)
+
+        # Search what is new since the watermark, up to now
+        if incremental:
+            watermark = f"x/{type}/{search_params['query']}"
+            mark = self.watermarks.get(watermark, {})
+            now = _now()
+            search_params.pop('end_time', None)
+            if mark.get('since_id'):
+                search_params.pop('start_time', None)
+                search_params['since_id'] = mark['since_id']
+            elif mark.get('until'):
+                search_params['start_time'] = mark['until']
+            n_failures = len(self.failures)
+
+        # Includes collected across pages
+        includes = {}
+
+        if shards:
+            # Plan time shards with balanced tweet counts
+            counts = await self.tweet_counts(type, granularity, session)
+            l_shards = _plan_shards(counts, shards)
+            if self.verbose:
+                print(f"Searching {len(l_shards)} shards: {[i['tweet_count'] for i in l_shards]}")
+
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def _search_shard(index, shard):
+                # Stagger the start of the shards without holding a slot while waiting
+                await asyncio.sleep(index * self.async_delay)
+                async with semaphore:
+                    shard_params = dict(search_params, start_time=shard['start_time'], end_time=shard['end_time'])
+                    return await search_tweets(self.token, type, shard_params, self.retry_limit, self.retry_delay, session, self.verbose, includes, self.failures)
+
+            # Newest shard first, matching the reverse-chronological order of the API
+            l_results = await asyncio.gather(*[_search_shard(index, i) for index, i in enumerate(reversed(l_shards))])
+            seen = set()
+            self.results['search_tweets'] = [i for i in sum(l_results, []) if not (i['id'] in seen or seen.add(i['id']))]
+        else:
+            # Call search API
+            self.results['search_tweets'] = await search_tweets(
+                self.token, 
+                type,
+                search_params,
+                self.retry_limit,
+                self.retry_delay,
+                session,
+                self.verbose,
+                includes,
+                self.failures
+            )
+
+        self._tag_failures('search_tweets')
+
+        # Move the watermark only if every page was fetched
+        if incremental and len(self.failures) == n_failures:
+            newest = max([int(i['id']) for i in self.results['search_tweets']] + [int(mark.get('since_id') or 0)])
+            self.watermarks.set(watermark, {'since_id': str(newest) if newest else None, 'until': now})
+
+        # Index includes by ID and join them onto the tweets
+        _index_includes(includes, self.includes)
+        _hydrate(self.results['search_tweets'], self.includes)
+        for k in ['users', 'media', 'places', 'polls']:
+            if k in self.includes:
+                self.results[k] = list(self.includes[k].values())
+
+        if self.verbose:
+            l_tweet_ids = [i['id'] for i in self.results['search_tweets']]
+            print(f"{len(l_tweet_ids)} tweets found")
+
+        return self.results['search_tweets']
+
+    # ==============================================
+    # Methods to look up tweets and users by ID
+    # ==============================================
+    @_limited
+    @_transported
+    async def tweets_lookup(self, ids, session=None):
+        """
+        Hydrate tweets by ID, 100 IDs per request, with up to max_concurrency requests in flight.
+        Args:
+            ids (list): Tweet IDs.
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            list: Tweet objects. Deleted or withheld IDs are stored in results['tweets_lookup_errors'].
+        """
+        return await self._lookup('tweets_lookup', tweets_lookup, ids, session)
+
+    @_limited
+    @_transported
+    async def users_lookup(self, ids=None, session=None):
+        """
+        Hydrate users by ID, 100 IDs per request, with up to max_concurrency requests in flight.
+        Args:
+            ids (list): User IDs. Default=None (the authors of the search results)
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            list: User objects. Deleted or suspended IDs are stored in results['users_lookup_errors'].
+        """
+        if ids is None:
+            ids = [i['author_id'] for i in self.results.get('search_tweets', []) if 'author_id' in i]
+        return await self._lookup('users_lookup', users_lookup, ids, session)
+
+    async def _lookup(self, name, fn, ids, session):
+        includes = {}
+        errors = []
+        self.results[name] = await fn(
+            self.token,
+            ids,
+            deepcopy(self.params.get(name, {})),
+            self.async_delay,
+            self.retry_limit,
+            self.retry_delay,
+            session,
+            self.verbose,
+            includes,
+            errors,
+            self.max_concurrency,
+            self.failures
+        )
+        self._tag_failures(name)
+        self.results[f"{name}_errors"] = errors
+
+        # Join expansions onto the results
+        _index_includes(includes, self.includes)
+        _hydrate(self.results[name], self.includes)
+
+        if errors:
+            print(f"{len(errors)} IDs could not be found: {', '.join(sorted(set(i.get('title', '') for i in errors)))}")
+
+        return self.results[name]
+
+    # ==============================================
+    # Method to rebuild conversations
+    # ==============================================
+    @_limited
+    @_transported
+    async def conversations(self, ids, type='recent', session=None, max_length=512, lookup_roots=True):
+        """
+        Collect whole conversations and rebuild their reply trees. Several conversation_id: terms are
+        packed per query (up to max_length characters) and the queries are paged concurrently.
+        Args:
+            ids (list): Conversation (root tweet) IDs.
+            type (str): 'recent' or 'all'. Default='recent'
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+            max_length (int): Maximum query length: 512 for recent search, 1024 for full-archive. Default=512
+            lookup_roots (bool): Look up root tweets the search did not return. Default=True
+        Returns:
+            dict: Reply trees ({'id', 'tweet', 'replies'}) by conversation ID, also stored in self.trees.
+                The tweets, with parent_id and depth, are stored in results['conversations'].
+        """
+        # Assert if type is either 'recent' or 'all'
+        assert type in ['recent', 'all'], "Type must be either 'recent' or 'all'"
+
+        # Share one session across all requests
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.conversations(ids, type, session, max_length, lookup_roots)
+
+        ids = list(dict.fromkeys(str(i) for i in ids))
+        includes = {}
+        self.results['conversations'] = await conversations(
+            self.token,
             type,
-            search_params,
+            ids,
+            deepcopy(self.params.get('conversations', {})),
+            self.async_delay,
             self.retry_limit,
             self.retry_delay,
             session,
-            self.verbose
+            self.verbose,
+            includes,
+            self.max_concurrency,
+            max_length,
+            self.failures
         )
+        self._tag_failures('conversations')
+        _index_includes(includes, self.includes)
+        _hydrate(self.results['conversations'], self.includes)
+
+        # Root tweets not returned by the search (e.g. older than the search window)
+        roots = {}
+        found = {i['id'] for i in self.results['conversations']}
+        missing = [i for i in ids if i not in found]
+        if lookup_roots and missing:
+            roots = {i['id']: i for i in await self.tweets_lookup(missing, session)}
+
+        self.trees.update(_reply_trees(self.results['conversations'], ids, roots))
 
         if self.verbose:
-            l_tweet_ids = [i['id'] for i in self.results['search_tweets']]
-            print(f"{len(l_tweet_ids)} tweets found")
\ No newline at end of file
+            print(f"{len(self.results['conversations'])} tweets in {len(ids)} conversations")
+
+        return {i: self.trees[i] for i in ids}
+
+    # ==============================================
+    # Methods to consume the filtered stream
+    # ==============================================
+    async def stream_rules(self, add=None, delete=None, session=None):
+        """
+        Manage the rules of the filtered stream.
+        Args:
+            add (list): Rules to add, as strings or {'value', 'tag'} dicts. Default=None
+            delete (list): IDs of rules to delete, or 'all'. Default=None
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            list: The current rules.
+        """
+        # Share one session across all requests
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.stream_rules(add, delete, session)
+
+        if delete == 'all':
+            delete = [i['id'] for i in await stream_rules(self.token, session, self.verbose, self.stream_url)]
+        if add or delete:
+            await update_stream_rules(self.token, add, delete, session, self.verbose, self.stream_url)
+
+        self.results['stream_rules'] = await stream_rules(self.token, session, self.verbose, self.stream_url)
+        return self.results['stream_rules']
+
+    async def stream(self, sink=None, session=None, **kwargs):
+        """
+        Consume the filtered stream. Messages are read into a bounded queue (queue_size) and handed
+        to the sink one at a time; a slow sink pauses reading rather than growing memory.
+        Args:
+            sink (callable): Function or coroutine function called with each tweet, with expansions
+                joined. Default=None (append to results['stream'])
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Kwargs:
+            max_tweets (int): Stop after this many tweets. Default=None
+            duration (float/int): Stop after this many seconds. Default=None
+            stall_timeout (float/int): Reconnect if nothing arrives for this many seconds. Default=30
+            max_reconnects (int): Give up after this many consecutive failed connections. Default=None
+        Returns:
+            int: The number of tweets delivered.
+        """
+        queue = asyncio.Queue(self.queue_size)
+        if sink is None:
+            self.results.setdefault('stream', [])
+            sink = self.results['stream'].append
+
+        async def _deliver():
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                index = _index_includes(message.get('includes'))
+                tweet = _hydrate([message['data']], index)[0]
+                if message.get('matching_rules'):
+                    tweet['matching_rules'] = message['matching_rules']
+                result = sink(tweet)
+                if asyncio.iscoroutine(result):
+                    await result
+
+        consumer = asyncio.create_task(_deliver())
+        producer = asyncio.create_task(filtered_stream(
+            self.token,
+            deepcopy(self.params.get('stream', {})),
+            queue,
+            session,
+            self.verbose,
+            self.stream_url,
+            **kwargs
+        ))
+        # Stop reading if the sink fails
+        consumer.add_done_callback(lambda _: producer.cancel())
+        try:
+            delivered = await producer
+        finally:
+            # Drain what was read before stopping
+            if not consumer.done():
+                await queue.put(None)
+            await consumer
+
+        if self.verbose:
+            print(f"{delivered} tweets streamed")
+
+        return delivered
+
+    # ==============================================
+    # Methods to replay failed requests
+    # ==============================================
+    def _tag_failures(self, name):
+        """
+        Tag new failure ledger entries with the results key they belong to.
+        """
+        for i in self.failures.entries:
+            i.setdefault('results', name)
+
+    @_limited
+    @_transported
+    async def replay_failures(self, file_path=None, session=None):
+        """
+        Re-run only the units of work recorded in the failure ledger: search pages (resuming from
+        the failed next_token) and lookup batches. Results are added to self.results; units that
+        fail again are recorded again.
+        Args:
+            file_path (str): Directory or file of a saved failures.json to replay as well. Default=None
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            int: The number of units still failing.
+        """
+        # Share one session across all requests
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.replay_failures(file_path, session)
+
+        if file_path is not None:
+            self.failures.load(file_path)
+        entries = self.failures.take()
+        if self.verbose:
+            print(f"Replaying {len(entries)} failed requests")
+
+        for entry in entries:
+            name = entry.get('results', 'search_tweets')
+            includes = {}
+            if entry.get('lookup'):
+                errors = self.results.setdefault(f"{name}_errors", [])
+                # Drop the errors reported for the failed batch
+                ids = set(entry['id'].split(','))
+                errors[:] = [i for i in errors if not (i.get('title') == 'Request Failed' and i.get('value') in ids)]
+                results = await _lookup(self.token, entry['endpoint'], entry['id'].split(','), entry['params'], self.async_delay, self.retry_limit,
+                                        self.retry_delay, session, self.verbose, includes, errors, self.max_concurrency, self.failures)
+            else:
+                params = dict(entry['params'], next_token=entry['pageToken']) if entry['pageToken'] else entry['params']
+                results = await _tweets(self.token, entry['endpoint'], params, self.retry_limit, self.retry_delay, session, self.verbose, includes, self.failures)
+            self._tag_failures(name)
+
+            # Add new results, de-duplicated by ID
+            found = {i['id'] for i in self.results.get(name, [])}
+            self.results.setdefault(name, []).extend([i for i in results if i['id'] not in found])
+            _index_includes(includes, self.includes)
+            _hydrate(self.results[name], self.includes)
+
+        # Rebuild reply trees with the recovered tweets
+        if self.trees and any(i.get('results') == 'conversations' for i in entries):
+            roots = {k: v['tweet'] for k, v in self.trees.items() if v['tweet'] is not None}
+            self.trees.update(_reply_trees(self.results['conversations'], list(self.trees), roots))
+
+        if self.verbose:
+            print(f"{len(entries) - len(self.failures)} of {len(entries)} failed requests recovered")
+
+        return len(self.failures)
+
+    # ==============================================
+    # Methods to save results
+    # ==============================================
+    def to_json(self, file_path=None, **kwargs):
+        """
+        Save the results to JSON files, one per results key (search_tweets, users, media, ...).
+        Args:
+            file_path (str): The path where the files will be saved.
+        Kwargs:
+            force_output (bool): Force output even if no data is available. Default=False
+        """
+        kwargs.setdefault('verbose', self.verbose)
+        to_json(self.results, file_path, **kwargs)
+        self.failures.save(file_path)
+
+    def to_csv(self, file_path=None, **kwargs):
+        """
+        Save the results to CSV files, one per results key (search_tweets, users, media, ...).
+        Args:
+            file_path (str): The path where the files will be saved.
+        Kwargs:
+            force_output (bool): Force output even if no data is available. Default=False
+        """
+        kwargs.setdefault('verbose', self.verbose)
+        to_csv(self.results, file_path, **kwargs)
+        self.failures.save(file_path)
+
+    def to_dataset(self, file_path=None, **kwargs):
+        """
+        Save the results as a partitioned dataset of compressed parts with a manifest.
+        Args:
+            file_path (str): The dataset directory.
+        Kwargs:
+            partition_by (str/list): Any of 'date', 'query' and 'hash'. Default=['date']
+            query (str): Value of the 'query' partition. Default=the search_tweets query
+            format (str): 'jsonl' or 'csv'. Default='jsonl'
+            compression (str): 'gzip', 'zstd' or None. Default='gzip'
+            max_rows (int): Rows per part. Default=100000
+        Returns:
+            dict: The manifest.
+        """
+        kwargs.setdefault('verbose', self.verbose)
+        kwargs.setdefault('query', self.params.get('search_tweets', {}).get('query'))
+        manifest = to_dataset(self.results, file_path, **kwargs)
+        self.failures.save(file_path)
+        return manifest
@@ -0,0 +1,127 @@
+from .search_tweets import search_tweets
+
+import aiohttp
+import asyncio
+from copy import deepcopy
+
+# Tweet fields needed to rebuild reply trees
+_tree_fields = ['conversation_id', 'referenced_tweets', 'in_reply_to_user_id', 'author_id', 'created_at']
+
+def _pack_queries(ids, query=None, max_length=512):
+    """
+    Pack conversation IDs into as few search queries as the query length limit allows,
+    e.g. '(conversation_id:1 OR conversation_id:2) -is:retweet'.
+    Args:
+        ids (list): Conversation IDs.
+        query (str): Extra operators appended to every query. Default=None
+        max_length (int): Maximum query length (512 for recent search, 1024 for full-archive). Default=512
+    Returns:
+        list: Search queries.
+    """
+    suffix = f" {query}" if query else ''
+    queries = []
+    terms = []
+    for i in dict.fromkeys(str(i) for i in ids):
+        term = f"conversation_id:{i}"
+        if terms and len(' OR '.join(terms + [term])) + len(suffix) + 2 > max_length:
+            queries.append(terms)
+            terms = []
+        terms.append(term)
+    if terms:
+        queries.append(terms)
+
+    return [(f"({' OR '.join(i)})" if len(i) > 1 else i[0]) + suffix for i in queries]
+
+def _reply_trees(tweets, conversation_ids, roots=None):
+    """
+    Assemble reply trees from the replied_to links of the tweets of each conversation.
+    Args:
+        tweets (list): Tweets with conversation_id and referenced_tweets.
+        conversation_ids (list): Conversation (root tweet) IDs.
+        roots (dict): Root tweets not returned by the search, by ID. Default=None
+    Returns:
+        dict: {conversation_id: {'id', 'tweet', 'replies': [...]}}. Replies whose parent was not collected
+            are attached to the root with 'missing_parent' set. Each tweet gets 'parent_id' and 'depth'.
+    """
+    roots = roots or {}
+
+    # Index tweets and their reply-to links by ID
+    nodes = {}
+    for tweet in tweets:
+        nodes[tweet['id']] = {'id': tweet['id'], 'tweet': tweet, 'replies': []}
+    for i in conversation_ids:
+        if i not in nodes:
+            nodes[i] = {'id': i, 'tweet': roots.get(i), 'replies': []}
+
+    for tweet in tweets:
+        node = nodes[tweet['id']]
+        if tweet['id'] == tweet.get('conversation_id'):
+            continue
+        parent_id = next((i['id'] for i in tweet.get('referenced_tweets', []) if i['type'] == 'replied_to'), None)
+        tweet['parent_id'] = parent_id
+        if parent_id in nodes:
+            nodes[parent_id]['replies'].append(node)
+        elif tweet.get('conversation_id') in nodes:
+            node['missing_parent'] = True
+            nodes[tweet['conversation_id']]['replies'].append(node)
+
+    # Order replies chronologically (IDs are time-ordered) and set depths, iteratively
+    trees = {i: nodes[i] for i in conversation_ids}
+    for root in trees.values():
+        stack = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if node['tweet'] is not None:
+                node['tweet']['depth'] = depth
+            node['replies'].sort(key=lambda x: int(x['id']))
+            stack.extend((i, depth + 1) for i in node['replies'])
+
+    return trees
+
+async def conversations(bearer_token, type, ids, params, async_delay=0, retry_limit=3, retry_delay=1, session=None, verbose=False, includes=None, max_concurrency=4, max_length=512, failures=None):
+    """
+    Search for every tweet of a set of conversations, packing several conversation_id: terms per
+    query and paging the queries concurrently.
+    Args:
+        bearer_token (str): The bearer token used for authentication.
+        type (str): 'recent' or 'all'.
+        ids (list): Conversation (root tweet) IDs.
+        params (dict): Search parameters; 'query' holds extra operators appended to every query.
+        async_delay (float/int): Delay in seconds between starting each query. Default=0
+        retry_limit (int): The number of retries to attempt. Default=3
+        retry_delay (int): The delay between retries in seconds. Default=1
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        includes (dict): If given, the expansions of every page are appended to it. Default=None
+        max_concurrency (int): Maximum number of queries in flight. Default=4
+        max_length (int): Maximum query length. Default=512
+        failures (FailureLedger): Record failed pages here instead of raising. Default=None
+    Returns:
+        list: Tweets of the conversations, de-duplicated by ID.
+    """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await conversations(bearer_token, type, ids, params, async_delay, retry_limit, retry_delay, session, verbose, includes, max_concurrency, max_length, failures)
+
+    __params__ = deepcopy(params)
+    queries = _pack_queries(ids, __params__.pop('query', None), max_length)
+
+    # Request the fields the reply trees are built from
+    fields = __params__.get('tweet.fields', '').split(',')
+    __params__['tweet.fields'] = ','.join(i for i in dict.fromkeys(fields + _tree_fields) if i)
+
+    if verbose:
+        print(f"Searching {len(dict.fromkeys(ids))} conversations in {len(queries)} queries")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _search(query, delay):
+        await asyncio.sleep(delay)
+        async with semaphore:
+            return await search_tweets(bearer_token, type, dict(__params__, query=query), retry_limit, retry_delay, session, verbose, includes, failures)
+
+    l_results = await asyncio.gather(*[_search(query, i * async_delay) for i, query in enumerate(queries)])
+
+    seen = set()
+    return [i for i in sum(l_results, []) if not (i['id'] in seen or seen.add(i['id']))]
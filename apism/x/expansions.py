@@ -0,0 +1,57 @@
+# Key identifying each object type in the includes of a response
+_include_keys = {
+    'users': 'id',
+    'tweets': 'id',
+    'media': 'media_key',
+    'places': 'id',
+    'polls': 'id'
+}
+
+def _index_includes(includes, index=None):
+    """
+    Index the includes of one or more responses by ID, de-duplicating objects seen on several pages.
+    Args:
+        includes (dict): Includes as collected by _tweets ({'users': [...], 'media': [...], ...}).
+        index (dict): An existing index to update. Default=None
+    Returns:
+        dict: {'users': {id: user}, 'media': {media_key: media}, 'tweets': {id: tweet}, ...}
+    """
+    index = {} if index is None else index
+    for k, v in (includes or {}).items():
+        key = _include_keys.get(k, 'id')
+        table = index.setdefault(k, {})
+        for i in v:
+            table[i[key]] = i
+    return index
+
+def _hydrate(tweets, index):
+    """
+    Join expansions onto tweets in place with dictionary lookups:
+    `author` (author_id), `media` (attachments.media_keys), `place` (geo.place_id), `poll`
+    (attachments.poll_ids) and `tweet` on each of `referenced_tweets`.
+    Args:
+        tweets (list): Tweet objects.
+        index (dict): Includes indexed by _index_includes.
+    Returns:
+        list: The hydrated tweets.
+    """
+    users = index.get('users', {})
+    media = index.get('media', {})
+    ref_tweets = index.get('tweets', {})
+    places = index.get('places', {})
+    polls = index.get('polls', {})
+
+    for tweet in tweets:
+        if tweet.get('author_id') in users:
+            tweet['author'] = users[tweet['author_id']]
+        attachments = tweet.get('attachments', {})
+        if attachments.get('media_keys'):
+            tweet['media'] = [media[i] for i in attachments['media_keys'] if i in media]
+        if attachments.get('poll_ids'):
+            tweet['poll'] = next((polls[i] for i in attachments['poll_ids'] if i in polls), None)
+        if tweet.get('geo', {}).get('place_id') in places:
+            tweet['place'] = places[tweet['geo']['place_id']]
+        for ref in tweet.get('referenced_tweets', []):
+            if ref['id'] in ref_tweets:
+                ref['tweet'] = ref_tweets[ref['id']]
+    return tweets
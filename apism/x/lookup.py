@@ -0,0 +1,92 @@
+from .utils import _fetch_with_retries
+from ..youtube.utils import _chunk
+
+import aiohttp
+import asyncio
+from copy import deepcopy
+
+async def _lookup(bearer_token, url, ids, params, async_delay=0, retry_limit=3, retry_delay=1, session=None, verbose=False, includes=None, errors=None, max_concurrency=4, failures=None):
+    """
+    Hydrate objects by ID, packing up to 100 IDs per request and running the batches concurrently.
+    Args:
+        bearer_token (str): The bearer token used for authentication.
+        url (str): The lookup endpoint.
+        ids (list): IDs to look up.
+        params (dict): Lookup parameters, such as fields and expansions.
+        async_delay (float/int): Delay in seconds between starting each batch. Default=0
+        retry_limit (int): The number of retries to attempt. Default=3
+        retry_delay (int): The delay between retries in seconds. Default=1
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        includes (dict): If given, the expansions of every response are appended to it. Default=None
+        errors (list): If given, deleted, withheld or unfetched IDs are appended to it. Default=None
+        max_concurrency (int): Maximum number of batches in flight. Default=4
+        failures (FailureLedger): Record batches that could not be fetched here. Default=None
+    Returns:
+        list: The objects found, in batch order.
+    """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await _lookup(bearer_token, url, ids, params, async_delay, retry_limit, retry_delay, session, verbose, includes, errors, max_concurrency, failures)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _fetch_batch(batch, delay):
+        await asyncio.sleep(delay)
+        async with semaphore:
+            __params__ = deepcopy(params)
+            __params__['ids'] = ','.join(batch)
+            try:
+                data, _ = await _fetch_with_retries(bearer_token, url, __params__, retry_limit, retry_delay, session, verbose)
+            except Exception as e:
+                # Report the batch instead of failing the whole lookup
+                print(f"Error fetching {len(batch)} IDs: {e}")
+                if failures is not None:
+                    failures.record(url, ','.join(batch), None, e, params=params, lookup=True)
+                return [], [{'value': i, 'resource_id': i, 'title': 'Request Failed', 'detail': str(e)} for i in batch], {}
+            return data.get('data', []), data.get('errors', []), data.get('includes', {})
+
+    # Unique IDs, 100 per request
+    batches = _chunk(list(dict.fromkeys(str(i) for i in ids)), 100)
+    l_results = await asyncio.gather(*[_fetch_batch(batch, i * async_delay) for i, batch in enumerate(batches)])
+
+    results = []
+    for data, batch_errors, batch_includes in l_results:
+        results.extend(data)
+        if errors is not None:
+            errors.extend(batch_errors)
+        if includes is not None:
+            for k, v in batch_includes.items():
+                includes.setdefault(k, []).extend(v)
+
+    if verbose:
+        print(f"{len(results)} of {sum(len(i) for i in batches)} IDs found in {len(batches)} requests")
+
+    return results
+
+def tweets_lookup(bearer_token, ids, params, async_delay=0, retry_limit=3, retry_delay=1, session=None, verbose=False, includes=None, errors=None, max_concurrency=4, failures=None):
+    """
+    Look up tweets by ID using the /2/tweets endpoint (100 IDs per request).
+    Args:
+        bearer_token (str): The bearer token used for authentication.
+        ids (list): Tweet IDs.
+        params (dict): Lookup parameters, such as tweet.fields and expansions.
+    Returns:
+        list: Tweet objects. Deleted or withheld tweets are appended to `errors`.
+    """
+    url = "https://api.twitter.com/2/tweets"
+    return _lookup(bearer_token, url, ids, params, async_delay, retry_limit, retry_delay, session, verbose, includes, errors, max_concurrency, failures)
+
+def users_lookup(bearer_token, ids, params, async_delay=0, retry_limit=3, retry_delay=1, session=None, verbose=False, includes=None, errors=None, max_concurrency=4, failures=None):
+    """
+    Look up users by ID using the /2/users endpoint (100 IDs per request).
+    Args:
+        bearer_token (str): The bearer token used for authentication.
+        ids (list): User IDs.
+        params (dict): Lookup parameters, such as user.fields and expansions.
+    Returns:
+        list: User objects. Deleted or suspended users are appended to `errors`.
+    """
+    url = "https://api.twitter.com/2/users"
+    return _lookup(bearer_token, url, ids, params, async_delay, retry_limit, retry_delay, session, verbose, includes, errors, max_concurrency, failures)
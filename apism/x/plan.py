@@ -0,0 +1,60 @@
+import math
+
+# Requests per 15-minute window per app for each search type
+_rate_limits = {
+    'recent': 450,
+    'all': 300
+}
+
+# Largest max_results accepted by each search type
+_max_page_size = {
+    'recent': 100,
+    'all': 500
+}
+
+def _plan_search(counts, type, params, latency, deadline=None, max_concurrency=4):
+    """
+    Estimate the requests and wall time of a search from its tweet counts.
+    Args:
+        counts (list): Count buckets ({'start', 'end', 'tweet_count'}), as returned by tweet_counts.
+        type (str): 'recent' or 'all'.
+        params (dict): Search parameters (max_results).
+        latency (float): Seconds per request.
+        deadline (float/int): Target wall time in seconds, used to suggest settings. Default=None
+        max_concurrency (int): Concurrent shards available. Default=4
+    Returns:
+        dict: {'tweets', 'requests', 'seconds', 'rate_limited_seconds', 'suggestion'}
+    """
+    tweets = sum(i['tweet_count'] for i in counts)
+    page_size = params.get('max_results', 10)
+    requests = max(1, math.ceil(tweets / page_size))
+    per_second = _rate_limits[type] / 900
+    # Full-archive search also allows at most one request per second
+    if type == 'all':
+        per_second = min(per_second, 1)
+
+    # Pages are sequential within a shard; all shards share the rate limit
+    rate_limited = requests / per_second
+    estimate = {
+        'tweets': tweets,
+        'requests': requests,
+        'seconds': max(requests * latency, rate_limited),
+        'rate_limited_seconds': rate_limited,
+        'suggestion': {}
+    }
+
+    if deadline is not None:
+        suggestion = estimate['suggestion']
+        if page_size < _max_page_size[type]:
+            suggestion['max_results'] = _max_page_size[type]
+            requests = math.ceil(tweets / _max_page_size[type])
+            rate_limited = requests / per_second
+        shards = math.ceil(requests * latency / deadline)
+        if shards > 1:
+            suggestion['shards'] = shards
+            suggestion['max_concurrency'] = max(shards, max_concurrency)
+        if rate_limited > deadline:
+            suggestion['tokens'] = math.ceil(rate_limited / deadline)
+            suggestion['note'] = f"The rate limit alone takes ~{rate_limited:.0f}s; spread the search over more apps or a longer deadline."
+
+    return estimate
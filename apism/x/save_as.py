@@ -0,0 +1,90 @@
+from ..youtube.utils import _flatten_json, _write_dict_to_csv
+from ..codec import dump
+from ..dataset import write_dataset
+import os
+import re
+import warnings
+
+def _clean_rows(rows):
+    """
+    Put line breaks in strings (e.g. tweet text) on one line for CSV output. Unlike the YouTube
+    cleaner, commas are kept: fields are quoted.
+    """
+    return [{k: re.sub(r'\s*[\r\n]+\s*', ' ', v) if isinstance(v, str) else v for k, v in row.items()} for row in rows]
+
+def to_json(results, file_path=None, **kwargs):
+    """
+    Save the results to files in JSON format, one file per results key (e.g. search_tweets, users, media).
+
+    Args:
+        results (dict): The results data to save.
+        file_path (str): The path where the files will be saved.
+    Kwargs:
+        force_output (bool): Force output even if no data is available. Default=False
+        verbose (bool): Print verbose output. Default=False
+    """
+    # Kwargs
+    force_output = kwargs.get('force_output', False)
+    verbose      = kwargs.get('verbose', False)
+
+    # Determine file path
+    if file_path is None:
+        file_path = os.getcwd()
+
+    for k, v in results.items():
+        # Raise warning if no data is available
+        if not v and verbose:
+            warnings.warn(f"No {k} data available.")
+
+        # Write data to JSON files
+        if v or force_output:
+            dump(v, os.path.join(file_path, f"{k}.json"))
+
+def to_csv(results, file_path=None, **kwargs):
+    """
+    Save the results to files in CSV format, one file per results key. Nested objects are
+    flattened to dotted column names.
+
+    Args:
+        results (dict): The results data to save.
+        file_path (str): The path where the files will be saved.
+    Kwargs:
+        force_output (bool): Force output even if no data is available. Default=False
+        verbose (bool): Print verbose output. Default=False
+    """
+    # Kwargs
+    force_output = kwargs.get('force_output', False)
+    verbose      = kwargs.get('verbose', False)
+
+    # Determine file path
+    if file_path is None:
+        file_path = os.getcwd()
+
+    for k, v in results.items():
+        # Raise warning if no data is available
+        if not v and verbose:
+            warnings.warn(f"No {k} data available.")
+
+        # Write data to CSV files
+        if v or force_output:
+            rows = _clean_rows([_flatten_json(i) for i in v or [] if i])
+            col_names = list(dict.fromkeys(key for row in rows or [] for key in row.keys()))
+            _write_dict_to_csv(os.path.join(file_path, f"{k}.csv"), rows, col_names)
+
+def to_dataset(results, file_path=None, **kwargs):
+    """
+    Save the results as a partitioned dataset of compressed parts with a manifest (see apism.dataset.write_dataset).
+    Nested objects are flattened to dotted column names.
+
+    Args:
+        results (dict): The results data to save.
+        file_path (str): The dataset directory.
+    Kwargs:
+        partition_by, query, buckets, format, compression, max_rows, verbose: As for write_dataset.
+    Returns:
+        dict: The manifest.
+    """
+    # JSON lines keep strings as they are
+    clean = _clean_rows if kwargs.get('format') == 'csv' else list
+    tables = {k: clean([_flatten_json(i) for i in v or [] if i]) for k, v in results.items() if isinstance(v, list)}
+    return write_dataset(tables, file_path, **kwargs)
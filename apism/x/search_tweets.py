@@ -3,7 +3,7 @@ from .tweets import _tweets
 import aiohttp
 from copy import deepcopy
 
-def search_tweets(bearer_token, type, params, retry_limit=3, retry_delay=1, session=aiohttp.ClientSession(), verbose=False):
+def search_tweets(bearer_token, type, params, retry_limit=3, retry_delay=1, session=None, verbose=False, includes=None, failures=None):
     """
     Search for tweets using the Twitter API.
     Args:
@@ -14,6 +14,8 @@ def search_tweets(bearer_token, type, params, retry_limit=3, retry_delay=1, sess
         max_results (int): The maximum number of results to return. Default=10
         type (str): The type of search results to return. Options are 'recent' or 'all'. Default='recent'
         verbose (bool): Print verbose output. Default=False
+        includes (dict): If given, the expansions of every page are appended to it. Default=None
+        failures (FailureLedger): Record failed pages here instead of raising. Default=None
     Returns:
         list: A list of tweet objects matching the search query.
     """
@@ -28,5 +30,5 @@ def search_tweets(bearer_token, type, params, retry_limit=3, retry_delay=1, sess
     __params__ = deepcopy(params)
 
     # Use the _tweets function to fetch search results
-    return _tweets(bearer_token, url, __params__, retry_limit, retry_delay, session, verbose)
+    return _tweets(bearer_token, url, __params__, retry_limit, retry_delay, session, verbose, includes, failures)
 
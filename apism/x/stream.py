@@ -0,0 +1,182 @@
+from ..codec import loads, dumps
+import aiohttp
+import asyncio
+
+_stream_url = "https://api.twitter.com/2/tweets/search/stream"
+
+def _backoff(kind, failures):
+    """
+    Reconnect delay in seconds, following the X guidelines for streaming endpoints.
+    Args:
+        kind (str): 'network' (linear from 250ms, up to 16s), 'http' (exponential from 5s, up to 320s)
+            or 'rate_limit' (exponential from 1 minute, up to 15 minutes).
+        failures (int): The number of consecutive failed connections.
+    Returns:
+        float: Seconds to wait before reconnecting.
+    """
+    if kind == 'network':
+        return min(0.25 * failures, 16)
+    if kind == 'rate_limit':
+        return min(60 * 2 ** (failures - 1), 15 * 60)
+    return min(5 * 2 ** (failures - 1), 320)
+
+async def stream_rules(bearer_token, session=None, verbose=False, url=_stream_url):
+    """
+    Get the rules of the filtered stream.
+    Args:
+        bearer_token (str): The bearer token used for authentication.
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        url (str): The stream endpoint (e.g. a local mock server). Default=https://api.twitter.com/2/tweets/search/stream
+    Returns:
+        list: Rules ({'id', 'value', 'tag'}).
+    """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await stream_rules(bearer_token, session, verbose, url)
+
+    headers = {"Authorization": f"Bearer {bearer_token}"}
+    async with session.get(f"{url}/rules", headers=headers) as response:
+        response_data = loads(await response.read())
+        if response.status != 200:
+            print(f"Received error response: {response_data}")
+            response.raise_for_status()
+
+    if verbose:
+        print(f"{len(response_data.get('data', []))} stream rules")
+
+    return response_data.get('data', [])
+
+async def update_stream_rules(bearer_token, add=None, delete=None, session=None, verbose=False, url=_stream_url):
+    """
+    Add and/or delete rules of the filtered stream.
+    Args:
+        bearer_token (str): The bearer token used for authentication.
+        add (list): Rules to add, as strings or {'value', 'tag'} dicts. Default=None
+        delete (list): IDs of rules to delete. Default=None
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        url (str): The stream endpoint. Default=https://api.twitter.com/2/tweets/search/stream
+    Returns:
+        list: The rules added.
+    """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await update_stream_rules(bearer_token, add, delete, session, verbose, url)
+
+    headers = {"Authorization": f"Bearer {bearer_token}", "Content-Type": "application/json"}
+    added = []
+
+    for body in [{'delete': {'ids': delete}} if delete else None,
+                 {'add': [{'value': i} if isinstance(i, str) else i for i in add]} if add else None]:
+        if body is None:
+            continue
+        async with session.post(f"{url}/rules", headers=headers, data=dumps(body)) as response:
+            response_data = loads(await response.read())
+            if response.status not in [200, 201]:
+                print(f"Received error response: {response_data}")
+                response.raise_for_status()
+        for i in response_data.get('errors', []):
+            print(f"Rule error: {i.get('title')} {i.get('value', '')}")
+        if 'add' in body:
+            added = response_data.get('data', [])
+        if verbose:
+            print(f"Stream rules updated: {response_data.get('meta', {}).get('summary')}")
+
+    return added
+
+async def filtered_stream(bearer_token, params, queue, session=None, verbose=False, url=_stream_url, **kwargs):
+    """
+    Consume the filtered stream, parsing newline-delimited JSON as it arrives and putting each
+    message ({'data', 'includes', 'matching_rules'}) on a bounded queue. When the queue is full the
+    reader waits, so a slow consumer throttles the socket instead of buffering without limit.
+    Reconnects with the standard backoff on network errors, HTTP errors, rate limits and stalls;
+    malformed lines are skipped.
+
+    Args:
+        bearer_token (str): The bearer token used for authentication.
+        params (dict): Stream parameters, such as tweet.fields and expansions.
+        queue (asyncio.Queue): The queue messages are delivered to.
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        url (str): The stream endpoint (e.g. a local mock server). Default=https://api.twitter.com/2/tweets/search/stream
+    Kwargs:
+        max_tweets (int): Stop after this many messages. Default=None
+        duration (float/int): Stop after this many seconds. Default=None
+        stall_timeout (float/int): Reconnect if nothing, not even a keep-alive, arrives for this many seconds. Default=30
+        max_reconnects (int): Give up after this many consecutive failed connections. Default=None (never)
+    Returns:
+        int: The number of messages delivered.
+    """
+    # Kwargs
+    max_tweets     = kwargs.get('max_tweets', None)
+    duration       = kwargs.get('duration', None)
+    stall_timeout  = kwargs.get('stall_timeout', 30)
+    max_reconnects = kwargs.get('max_reconnects', None)
+
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await filtered_stream(bearer_token, params, queue, session, verbose, url, **kwargs)
+
+    headers = {"Authorization": f"Bearer {bearer_token}"}
+    state = {'delivered': 0}
+
+    async def _consume():
+        failures = 0
+        while True:
+            try:
+                async with session.get(url, headers=headers, params=params, timeout=aiohttp.ClientTimeout(total=None, sock_connect=30)) as response:
+                    if response.status != 200:
+                        kind = 'rate_limit' if response.status == 429 else 'http'
+                        if verbose:
+                            print(f"Received error response: {response.status} {await response.text()}")
+                    else:
+                        kind = 'network'
+                        if verbose:
+                            print("Connected to stream")
+                        # Read one line at a time; blank lines are keep-alives
+                        while True:
+                            line = await asyncio.wait_for(response.content.readline(), stall_timeout)
+                            if not line:
+                                break
+                            failures = 0
+                            if not line.strip():
+                                continue
+                            try:
+                                message = loads(line)
+                            except ValueError as e:
+                                # A malformed line is skipped rather than dropping the connection
+                                print(f"Skipping malformed stream message: {e}")
+                                continue
+                            if 'data' not in message:
+                                print(f"Stream message: {message}")
+                                continue
+                            await queue.put(message)
+                            state['delivered'] += 1
+                            if max_tweets is not None and state['delivered'] >= max_tweets:
+                                return
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                kind = 'network'
+                if verbose:
+                    print(f"Stream disconnected: {e!r}")
+
+            failures += 1
+            if max_reconnects is not None and failures > max_reconnects:
+                raise Exception(f"Failed to connect to {url} after {failures} attempts.")
+            wait = _backoff(kind, failures)
+            if verbose:
+                print(f"Reconnecting in {wait} seconds...")
+            await asyncio.sleep(wait)
+
+    if duration is None:
+        await _consume()
+    else:
+        try:
+            await asyncio.wait_for(_consume(), duration)
+        except asyncio.TimeoutError:
+            pass
+
+    return state['delivered']
@@ -0,0 +1,61 @@
+from .tweets import _tweets
+
+from copy import deepcopy
+
+def tweet_counts(bearer_token, type, params, retry_limit=3, retry_delay=1, session=None, verbose=False):
+    """
+    Count tweets matching a query over time using the Tweet counts endpoint.
+    Args:
+        bearer_token (str): The bearer token used for authentication.
+        type (str): 'recent' (last 7 days) or 'all' (full archive).
+        params (dict): Query, start_time, end_time and granularity ('minute', 'hour' or 'day').
+        retry_limit (int): The number of retries to attempt. Default=3
+        retry_delay (int): The delay between retries in seconds. Default=1
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+    Returns:
+        list: Count buckets ({'start', 'end', 'tweet_count'}).
+    """
+    # Check if type is either 'recent' or 'all'
+    if type not in ['recent', 'all']:
+        raise ValueError("Type must be either 'recent' or 'all'")
+
+    url = f"https://api.twitter.com/2/tweets/counts/{type}"
+
+    # Only the count parameters are accepted by the endpoint
+    __params__ = {k: v for k, v in deepcopy(params).items() if k in ['query', 'start_time', 'end_time', 'granularity', 'since_id', 'until_id']}
+
+    return _tweets(bearer_token, url, __params__, retry_limit, retry_delay, session, verbose)
+
+def _plan_shards(counts, n_shards):
+    """
+    Split count buckets into at most n_shards contiguous time shards with roughly equal tweet counts.
+    Args:
+        counts (list): Count buckets ({'start', 'end', 'tweet_count'}), as returned by tweet_counts.
+        n_shards (int): The maximum number of shards.
+    Returns:
+        list: Shards ({'start_time', 'end_time', 'tweet_count'}) in time order, skipping empty ones.
+    """
+    counts = sorted(counts, key=lambda x: x['start'])
+    total = sum(i['tweet_count'] for i in counts)
+    if total == 0:
+        return []
+    target = total / n_shards
+
+    shards = []
+    current = None
+    cumulative = 0
+    for i in counts:
+        if current is None:
+            current = {'start_time': i['start'], 'end_time': i['end'], 'tweet_count': 0}
+        current['end_time'] = i['end']
+        current['tweet_count'] += i['tweet_count']
+        cumulative += i['tweet_count']
+        # Close the shard once the running total reaches the next multiple of the target
+        if cumulative >= target * (len(shards) + 1) and len(shards) < n_shards - 1:
+            shards.append(current)
+            current = None
+    if current is not None:
+        shards.append(current)
+
+    return [i for i in shards if i['tweet_count']]
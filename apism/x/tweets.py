@@ -1,9 +1,10 @@
-from .utils import _fetch_with_retries
+from .utils import _fetch_with_retries, _x
+from ..engine import Pages
 
 import aiohttp
 from copy import deepcopy
 
-async def _tweets(bearer_token, url, params, retry_limit=3, retry_delay=1, session=aiohttp.ClientSession(), verbose=False):
+async def _tweets(bearer_token, url, params, retry_limit=3, retry_delay=1, session=None, verbose=False, includes=None, failures=None):
     """
     Fetch search results using the Tweets endpoint with pagination support (sequential fetching).
     Args:
@@ -13,30 +14,33 @@ async def _tweets(bearer_token, url, params, retry_limit=3, retry_delay=1, sessi
         retry_delay (int): The delay between retries in seconds. Default=1
         session (aiohttp.ClientSession): The session used to make HTTP requests.
         verbose (bool): Print verbose output. Default=False
+        includes (dict): If given, the expansions of every page (users, media, tweets, ...) are appended to it. Default=None
+        failures (FailureLedger): Record a failed page here and return the results so far instead of raising. Default=None
 
     Returns:
         list: All tweet results for the given query.
     """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await _tweets(bearer_token, url, params, retry_limit, retry_delay, session, verbose, includes, failures)
+
     __params__ = deepcopy(params)
 
     all_results = []
-    next_token = None
+    pages = Pages(lambda p: _fetch_with_retries(bearer_token, url, p, retry_limit, retry_delay, session, verbose), __params__, _x)
 
     # Sequentially fetch paginated results
-    while True:
-        if next_token:
-            __params__['next_token'] = next_token
-
-        data, next_token = await _fetch_with_retries(bearer_token, url, params, retry_limit, retry_delay, session, verbose)
-
-        if data:
-            if 'data' in data.keys():
-                all_results.extend(data['data'])
-            else:
-                all_results.extend(data)
-
-        # Break the loop when no more pages are available
-        if not next_token:
-            break
+    try:
+        async for data in pages:
+            all_results.extend(data.get('data', []))
+            if includes is not None:
+                for k, v in data.get('includes', {}).items():
+                    includes.setdefault(k, []).extend(v)
+    except Exception as e:
+        if failures is None:
+            raise
+        print(f"Error fetching {url}: {e}")
+        failures.record(url, params.get('query'), pages.page_token, e, params=params)
 
     return all_results
\ No newline at end of file
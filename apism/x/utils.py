@@ -1,8 +1,8 @@
-import aiohttp
-import asyncio
-import copy
+from ..engine import fetch, X
 
-async def _fetch_with_retries(bearer_token, url, params, retry_limit=3, retry_delay=1, session=aiohttp.ClientSession(), verbose=False):
+_x = X()
+
+async def _fetch_with_retries(bearer_token, url, params, retry_limit=3, retry_delay=1, session=None, verbose=False):
     """
     Fetch data from a URL with retries and handle errors related to disabled comments.
     
@@ -19,31 +19,6 @@ async def _fetch_with_retries(bearer_token, url, params, retry_limit=3, retry_de
         tuple: A tuple containing the response data and the nextPageToken if available.
     
     Raises:
-        Exception: If retries are exhausted and the request still fails.
+        FetchError: If retries are exhausted and the request still fails.
     """
-    headers = {"Authorization": f"Bearer {bearer_token}"}
-    __params__ = copy.deepcopy(params)
-    attempt = 0
-
-    while attempt < retry_limit:
-        try:
-            async with session.get(url, headers=headers, params=__params__) as response:
-                response_data = await response.json()
-                
-                # Handle API limit errors and other issues
-                if response.status == 200:
-                    next_page_token = response_data.get('next_token')
-                    return response_data, next_page_token
-                else:
-                    if verbose:
-                        print(f"Received error response: {response_data}")
-                    response.raise_for_status()
-        
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            attempt += 1
-            if verbose:
-                print(f"Attempt {attempt} failed: {e}. Retrying in {retry_delay} seconds...")
-            await asyncio.sleep(retry_delay)
-    
-    # If all retries fail, raise an exception
-    raise Exception(f"Failed to fetch data from {url} after {attempt} attempts.")
\ No newline at end of file
+    return await fetch(_x, url, params, retry_limit, retry_delay, session, verbose, bearer_token)
@@ -1,9 +1,22 @@
 from .search import search
 from .videos import videos
-from .comment_threads import comment_threads
+from .comment_threads import comment_threads, _fetch_comment_thread
 from .transcript import transcript
-from .save_as import to_json, to_csv
-from .defaults import _default_params
+from .snapshot import snapshot, _append_snapshot
+from .channels import channels, cached_channels
+from .playlist_items import playlist_items, _fetch_playlist_items
+from .work_queue import run_worker
+from .plan import plan
+from .save_as import to_json, to_csv, to_dataset
+from .defaults import _default_params, _default_columns, _required_fields
+from .utils import _fields_mask
+from .seen import SeenIndex, _duplicates
+from .records import VideoRecord, CommentThreadRecord
+from ..transport import _transported
+from ..failures import FailureLedger
+from ..watermark import Watermarks, _now
+from ..profiler import Profiler, _profiled
+from ..limiter import AdaptiveLimiter, _limited
 import asyncio
 import aiohttp
 from copy import deepcopy
@@ -21,6 +34,23 @@ class YouTubeAPI:
         verbose (bool): Print verbose output. Default=False
         async_delay(float/int): Delay in seconds between starting each task.
         sequential (bool): Concurrent (False) or sequential (True) API calls. Default=False
+        max_concurrency (int): Videos whose commentThreads are fetched at the same time. Default=None (all videos)
+        fields (bool/dict): Request partial responses with a `fields` mask. True derives the mask from the default
+            columns; a dict maps 'search', 'videos', 'commentThreads' and 'commentThreadsreplies' to flattened
+            column names to keep. Default=False
+        compact (bool): Store videos and commentThreads as compact slotted records holding only the fields used. Default=False
+        seen (str/SeenIndex): Directory of a persistent seen-ID index used across runs. Default=None
+        duplicates (str): What to do with IDs seen in previous runs: 'keep' (ignore the index), 'skip' (do not fetch
+            videos or transcripts seen before, nor write any row seen before) or 'refresh' (fetch and write them again).
+            Comment threads of every video are still fetched, and threads seen before are dropped when writing. Default='keep'
+        adaptive (bool/AdaptiveLimiter): Adapt the number of videos, commentThreads and transcript requests in flight
+            to latency and throttling (AIMD) instead of relying on async_delay and batch_size alone. Default=False
+        cassette (Cassette): Record this client's requests to, or replay them from, a cassette file (see apism.transport). Default=None
+        enrich (Enricher): Enrich commentThreads and transcripts in a process or thread pool while fetching
+            continues (see apism.enrich). Requires compact=False. Default=None
+        watermarks (str/Watermarks): JSON file of per-query watermarks used by search(incremental=True). Default=None
+        profile (bool/Profiler): Record spans of each method and request, with cProfile and tracemalloc summaries
+            per method, in self.profiler (see apism.profiler). Default=False
     """
     def __init__(self, api_key, params=_default_params, **kwargs):
         # Required
@@ -34,59 +64,376 @@ class YouTubeAPI:
         self.verbose = kwargs.get('verbose', False)
         self.async_delay = kwargs.get('async_delay', 0)
         self.sequential = kwargs.get('sequential', False)
+        self.max_concurrency = kwargs.get('max_concurrency', None)
+        self.transport = kwargs.get('cassette', None)
+        self.profiler = kwargs.get('profile', False)
+        if self.profiler is True:
+            self.profiler = Profiler()
+        self.profiler = self.profiler or None
+        self.fields = kwargs.get('fields', False)
+        self.compact = kwargs.get('compact', False)
+        self.seen = kwargs.get('seen', None)
+        if isinstance(self.seen, str):
+            self.seen = SeenIndex(self.seen)
+        self.duplicates = kwargs.get('duplicates', 'keep')
+        assert self.duplicates in _duplicates, f"duplicates must be one of {_duplicates}"
+        self.limiter = kwargs.get('adaptive', False)
+        if self.limiter is True:
+            self.limiter = AdaptiveLimiter()
+        self.limiter = self.limiter or None
+        self.enrich = kwargs.get('enrich', None)
+        assert self.enrich is None or not self.compact, "enrich requires compact=False"
+        self.watermarks = kwargs.get('watermarks', None)
+        if isinstance(self.watermarks, str):
+            self.watermarks = Watermarks(self.watermarks)
 
         # Dictionary to store output
         self.results = {}
 
+        # Query of the last search, the default 'query' partition of to_dataset
+        self.query = None
+
+        # Channel cache shared across calls: {channel_id: [fetched_at, item]}
+        self.channel_cache = {}
+
+        # Units of work that failed, saved as failures.json next to the output
+        self.failures = FailureLedger()
+
+    # ==============================================
+    # Video IDs from previous results
+    # ==============================================
+    def _video_ids(self, min_comments=0):
+        """
+        Video IDs from the video results with min_comments+ comments, otherwise from the search results.
+        """
+        try:
+            video_id = []
+            for i in self.results['videos']:
+                if isinstance(i, VideoRecord):
+                    if i.commentCount >= min_comments:
+                        video_id.append(i.id)
+                elif i['statistics']['commentCount'] >= min_comments:
+                    video_id.append(i['id'])
+            return video_id
+        except:
+            return self._discovered_video_ids()
+
+    def _comment_counts(self):
+        """
+        commentCount of each video in the video results.
+        """
+        counts = {}
+        for i in self.results.get('videos', []) or []:
+            if isinstance(i, VideoRecord):
+                counts[i.id] = i.commentCount
+            elif i:
+                counts[i['id']] = int(i.get('statistics', {}).get('commentCount', 0))
+        return counts
+
+    def _prioritise(self, video_id, order=None):
+        """
+        Drop videos known to have fewer than min_comments comments and order the rest by commentCount:
+        'largest' first so that the longest jobs do not start last, or 'smallest' first for early results.
+        Videos without video results are kept, after the others.
+        """
+        if isinstance(video_id, str):
+            return video_id
+        counts = self._comment_counts()
+        video_id = [i for i in video_id if counts.get(i, self.min_comments) >= self.min_comments]
+        if order is None:
+            return video_id
+        known = [i for i in video_id if i in counts]
+        known.sort(key=lambda i: counts[i], reverse=order == 'largest')
+        return known + [i for i in video_id if i not in counts]
+
+    def _discovered_video_ids(self):
+        """
+        Unique video IDs from the search and playlistItems results.
+        """
+        video_id = [i['id']['videoId'] for i in self.results.get('search', [])]
+        video_id += [i['contentDetails']['videoId'] for i in self.results.get('playlistItems', [])]
+        return list(set(video_id))
+
+    def _unseen(self, entity, video_id):
+        """
+        Drop video IDs already collected for entity in previous runs when duplicates='skip'.
+        """
+        if self.seen is None or self.duplicates != 'skip':
+            return video_id
+        if isinstance(video_id, str):
+            return [] if self.seen.seen(entity, video_id) else video_id
+        unseen = self.seen.unseen(entity, video_id)
+        if self.verbose and len(unseen) < len(video_id):
+            print(f"{len(video_id) - len(unseen)} videos skipped as already collected for {entity}")
+        return unseen
+
+    def _comment_thread_items(self):
+        """
+        Comment threads of the results, whether they are a list per video (concurrent), a dictionary
+        of lists by video ID (sequential) or a single list (one video ID).
+        """
+        results = self.results.get('commentThreads') or []
+        if isinstance(results, dict):
+            results = list(results.values())
+        threads = []
+        for i in results:
+            if isinstance(i, list):
+                threads += [j for j in i if j]
+            elif i:
+                threads.append(i)
+        return threads
+
+    def _channel_ids(self):
+        """
+        Unique channel IDs referenced in the results (search, playlistItems, videos, comment authors).
+        """
+        channel_id = []
+        for k in ['search', 'playlistItems', 'videos']:
+            for i in self.results.get(k) or []:
+                if isinstance(i, dict) and 'snippet' in i:
+                    channel_id.append(i['snippet'].get('videoOwnerChannelId') or i['snippet'].get('channelId'))
+
+        for thread in self._comment_thread_items():
+            if isinstance(thread, CommentThreadRecord):
+                comments = [thread] + list(thread.replies or [])
+                channel_id += [i.authorChannelId for i in comments]
+            else:
+                comments = [thread['snippet']['topLevelComment']] + thread.get('replies', {}).get('comments', [])
+                channel_id += [i['snippet'].get('authorChannelId', {}).get('value') for i in comments]
+
+        return [i for i in dict.fromkeys(channel_id) if i]
+
+    # ==============================================
+    # Partial-response fields mask
+    # ==============================================
+    def _fields(self, endpoint):
+        """
+        Build the `fields` mask for an endpoint from the default or user-supplied columns.
+        Args:
+            endpoint (str): 'search', 'videos' or 'commentThreads'.
+        Returns:
+            str: The fields mask, or None if no mask should be applied.
+        """
+        if not self.fields:
+            return None
+        columns = _default_columns['default'] if self.fields is True else self.fields
+
+        if endpoint not in columns:
+            return None
+        cols = list(columns[endpoint])
+        # Replies are embedded in commentThreads under replies.comments
+        if endpoint == 'commentThreads':
+            cols += ['replies.comments.' + i for i in columns.get('commentThreadsreplies', [])]
+
+        return _fields_mask(cols + _required_fields[endpoint])
+
     # ==============================================
     # Method to search for videos
     # ==============================================
-    async def search(self, query, session=aiohttp.ClientSession()):
+    @_profiled
+    @_transported
+    async def search(self, query, session=None, incremental=False):
         """
         Search for videos based on a query.
         Args:
             query (str): The search query.
             session (aiohttp.ClientSession): The session used to make HTTP requests.
+            incremental (bool): Only search videos published since the last successful incremental search
+                of the query (its watermark), up to now. The first run starts at publishedAfter. Default=False
         Returns:
             list: A list of search results.
         """
         # Assert if search parameters are present
         assert 'search' in self.params.keys(), "Search parameters not found in params."
+        assert not incremental or self.watermarks is not None, "incremental search requires watermarks."
 
         # Add api_key to search parameters
         search_params = deepcopy(self.params['search'])
         search_params['key'] = self.api_key
+        if 'fields' not in search_params and self._fields('search'):
+            search_params['fields'] = self._fields('search')
+
+        # Search the interval since the watermark
+        if incremental:
+            watermark = f"youtube/search/{query}"
+            now = _now()
+            search_params['publishedAfter'] = self.watermarks.get(watermark, search_params.get('publishedAfter'))
+            search_params['publishedBefore'] = now
+            n_failures = len(self.failures)
         # Call search API
+        self.query = query
         self.results['search'] = await search(
                                             query, 
                                             search_params, 
                                             self.retry_limit, 
                                             self.retry_delay, 
                                             session, 
-                                            self.verbose
+                                            self.verbose,
+                                            self.failures
                                         )
 
+        # Move the watermark only if every page was fetched
+        if incremental and len(self.failures) == n_failures:
+            self.watermarks.set(watermark, now)
+
         if self.verbose:
             l_video_ids = list(set([i['id']['videoId'] for i in self.results['search']]))
             print(f"{len(l_video_ids)} videos found")
 
+    # ==============================================
+    # Method to fetch playlist items
+    # ==============================================
+    @_profiled
+    @_transported
+    async def playlist_items(self, playlist_id, session=None):
+        """
+        Fetch all items for a single playlist ID or list of playlist IDs (1 quota unit per page).
+        Args:
+            playlist_id (str/list): A single playlist ID or list of playlist IDs.
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            list: A list of playlist items.
+        """
+        assert isinstance(playlist_id, str) or isinstance(playlist_id, list), "playlist_id must be a string or a list of playlist IDs."
+
+        # Add api_key to playlistItems parameters
+        playlistItems_params = deepcopy(self.params.get('playlistItems', _default_params['playlistItems']))
+        playlistItems_params['key'] = self.api_key
+        # Call playlistItems API
+        self.results['playlistItems'] = await playlist_items(
+                                                    playlist_id, 
+                                                    playlistItems_params, 
+                                                    self.async_delay, 
+                                                    self.retry_limit, 
+                                                    self.retry_delay, 
+                                                    session, 
+                                                    self.verbose,
+                                                    self.failures
+                                                )
+
+        if self.verbose:
+            print(f"{len(self.results['playlistItems'])} playlist items retrieved")
+
+    # ==============================================
+    # Method to fetch all uploads of channels
+    # ==============================================
+    @_profiled
+    @_transported
+    async def uploads(self, channel_id, session=None):
+        """
+        Fetch every upload of a single channel ID or list of channel IDs, without using search.
+        The uploads playlists are resolved with channels.list (50 IDs per request) and paged
+        through with playlistItems, concurrently across channels. Results are stored in
+        results['playlistItems'] and used by videos(), comment_threads() and transcript().
+        Args:
+            channel_id (str/list): A single channel ID or list of channel IDs.
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            list: A list of playlist items.
+        """
+        assert isinstance(channel_id, str) or isinstance(channel_id, list), "channel_id must be a string or a list of channel IDs."
+
+        # Share one session across all requests
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.uploads(channel_id, session)
+
+        l_playlist_ids = await self._uploads_playlists(channel_id, session)
+        if self.verbose:
+            print(f"{len(l_playlist_ids)} uploads playlists found")
+
+        await self.playlist_items(l_playlist_ids, session)
+
+    async def _uploads_playlists(self, channel_id, session):
+        """
+        The uploads playlist IDs of channels. Channels that could not be resolved are recorded as 'uploads' failures.
+        """
+        channels_params = {'part': 'contentDetails', 'key': self.api_key}
+        failures = FailureLedger()
+        l_channels = await channels(
+                                channel_id, 
+                                channels_params, 
+                                self.async_delay, 
+                                self.retry_limit, 
+                                self.retry_delay, 
+                                session, 
+                                self.verbose,
+                                failures
+                            )
+        for i in failures.entries:
+            i['endpoint'] = 'uploads'
+        self.failures.entries += failures.entries
+        return [i['contentDetails']['relatedPlaylists']['uploads'] for i in l_channels if 'contentDetails' in i]
+
+    # ==============================================
+    # Method to fetch channel data
+    # ==============================================
+    @_profiled
+    @_transported
+    async def channels(self, channel_id=None, cache_path=None, ttl=86400, session=None):
+        """
+        Fetch channel metadata (e.g. subscriber counts) with 50 IDs per request, running batches concurrently.
+        Channels are cached in-process (self.channel_cache) and optionally on disk, so a channel is
+        fetched once per run or per ttl rather than once per mention.
+        Args:
+            channel_id (str/list): A single channel ID or list of channel IDs. Leave blank to use every channel
+                referenced in the search, playlistItems, videos and commentThreads results.
+            cache_path (str): Path of an on-disk JSON cache shared across runs. Default=None
+            ttl (int/float): Time-to-live of cached channels in seconds. Default=86400
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            list: A list of channels.
+        """
+        # If channel_id is not provided, use the channels referenced in the results
+        if channel_id is None:
+            channel_id = self._channel_ids()
+        else:
+            assert isinstance(channel_id, str) or isinstance(channel_id, list), "channel_id must be a string or a list of channel IDs."
+            if isinstance(channel_id, str):
+                channel_id = [channel_id]
+
+        # Add api_key to channels parameters
+        channels_params = deepcopy(self.params.get('channels', _default_params['channels']))
+        channels_params['key'] = self.api_key
+        # Call channels API for channels not in the cache
+        self.results['channels'] = await cached_channels(
+                                                channel_id, 
+                                                channels_params, 
+                                                self.channel_cache, 
+                                                ttl, 
+                                                cache_path, 
+                                                self.async_delay, 
+                                                self.retry_limit, 
+                                                self.retry_delay, 
+                                                session, 
+                                                self.verbose,
+                                                self.failures
+                                            )
+
+        if self.verbose:
+            print(f"{len(self.results['channels'])} channels retrieved")
+
     # ==============================================
     # Method to fetch video data
     # ==============================================
-    async def videos(self, video_id=None, session=aiohttp.ClientSession()):
+    @_profiled
+    @_limited
+    @_transported
+    async def videos(self, video_id=None, session=None):
         """
         Fetch video data for a single video ID or list of video IDs.
         Args:
-            video_id (str/list): A single video ID or list of video IDs to fetch data for. Leave blank to use search results.
+            video_id (str/list): A single video ID or list of video IDs to fetch data for. Leave blank to use search or playlistItems results.
             session (aiohttp.ClientSession): The session used to make HTTP requests.
         Returns:
             dict: A list of video statistics.
         """
-        # If video_id is not provided, use search results
+        # If video_id is not provided, use search or playlistItems results
         if video_id is None:
-            video_id = list(set([i['id']['videoId'] for i in self.results['search']]))
+            video_id = self._discovered_video_ids()
         else:
             assert isinstance(video_id, str) or (isinstance(video_id, list) and all(isinstance(i, str) for i in video_id)), "video_id must be a string or a list of video IDs."
+        video_id = self._unseen('videos', video_id)
 
         # Assert if video parameters are present
         assert 'videos' in self.params.keys(), "Videos parameters not found in params."
@@ -94,6 +441,8 @@ class YouTubeAPI:
         # Add api_key to videos parameters
         videos_params = deepcopy(self.params['videos'])
         videos_params['key'] = self.api_key
+        if 'fields' not in videos_params and self._fields('videos'):
+            videos_params['fields'] = self._fields('videos')
         # Call videos API
         self.results['videos'] = await videos(
                                             video_id, 
@@ -103,33 +452,50 @@ class YouTubeAPI:
                                             self.retry_delay, 
                                             self.sequential, 
                                             session, 
-                                            self.verbose
+                                            self.verbose,
+                                            VideoRecord.from_item if self.compact else None,
+                                            self.failures
                                         )
+        # Drop deleted, private or failed videos
+        if isinstance(self.results['videos'], list):
+            self.results['videos'] = [i for i in self.results['videos'] if i is not None]
 
         if self.verbose:
-            l_video_ids_filtered = [i['id'] for i in self.results['videos'] if i['statistics']['commentCount'] >= self.min_comments]
+            l_video_ids_filtered = self._video_ids(self.min_comments)
             print(f"{len(l_video_ids_filtered)} videos with {self.min_comments}+ comments")
 
     # ==============================================
     # Method to fetch comments
     # ==============================================
-    async def comment_threads(self, video_id=None, session=aiohttp.ClientSession()):
+    @_profiled
+    @_limited
+    @_transported
+    async def comment_threads(self, video_id=None, session=None, order=None, max_pages=None, max_comments=None, skip_seen_videos=False):
         """
         Fetch comment threads for a single video ID or list of video IDs.
         Args:
-            video_id (str/list): A single video ID or list of video IDs to fetch comments for. Leave blank to use video or search results.
+            video_id (str/list): A single video ID or list of video IDs to fetch comments for. Leave blank to use video, search or playlistItems results.
             session (aiohttp.ClientSession): The session used to make HTTP requests.
+            order (str): Start videos by commentCount (from the video results): 'largest' first, to keep large videos
+                from dominating the end of the run, or 'smallest' first, for early results. With max_concurrency, the
+                next video in this order starts whenever one finishes. Default=None (as given)
+            max_pages (int): Pages per video. Default=None (all pages)
+            max_comments (int): Comment threads per video. Default=None (all comment threads)
+            skip_seen_videos (bool): With duplicates='skip', do not fetch videos whose comment threads were collected in a
+                previous run, saving quota at the cost of missing their new comments. Default=False
         Returns:
             dict: A list of comment threads.
         """
         # If video_id is not provided, use video results
         if video_id is None:
-            try:
-                video_id = [i['id'] for i in self.results['videos'] if i['statistics']['commentCount'] >= self.min_comments]
-            except:
-                video_id = list(set([i['id']['videoId'] for i in self.results['search']]))
+            video_id = self._video_ids(self.min_comments)
         else:
             assert isinstance(video_id, str) or isinstance(video_id, list), "video_id must be a string or a list of video IDs."
+        assert order in [None, 'largest', 'smallest'], "order must be None, 'largest' or 'smallest'"
+        # Threads seen before are dropped when writing; whole videos are only skipped on request
+        if skip_seen_videos:
+            video_id = self._unseen('commentThreads.videoId', video_id)
+        video_id = self._prioritise(video_id, order)
 
         # Assert if commentThreads parameters are present
         assert 'commentThreads' in self.params.keys(), "CommentThreads parameters not found in params."
@@ -137,6 +503,8 @@ class YouTubeAPI:
         # Add api_key to commentThreads parameters
         commentThreads_params = deepcopy(self.params['commentThreads'])
         commentThreads_params['key'] = self.api_key
+        if 'fields' not in commentThreads_params and self._fields('commentThreads'):
+            commentThreads_params['fields'] = self._fields('commentThreads')
         # Call commentThreads API
         self.results['commentThreads'] = await comment_threads(
                                                     video_id, 
@@ -146,8 +514,16 @@ class YouTubeAPI:
                                                     self.retry_delay, 
                                                     self.sequential, 
                                                     session, 
-                                                    self.verbose
+                                                    self.verbose,
+                                                    CommentThreadRecord.from_item if self.compact else None,
+                                                    self.failures,
+                                                    self.enrich,
+                                                    max_pages,
+                                                    max_comments,
+                                                    self.max_concurrency
                                                 )
+        if self.enrich is not None:
+            await self.enrich.drain()
     
         if self.verbose:
             print(f"{sum([len(i) for i in self.results['commentThreads']])} comments retrieved for {len([i for i in self.results['commentThreads'] if len(i)])} videos")
@@ -155,22 +531,21 @@ class YouTubeAPI:
     # ==============================================
     # Method to fetch transcript
     # ==============================================
+    @_profiled
     async def transcript(self, video_id=None, code_language='en', cookies=None, batch_size=5, batch_delay=1):
         """
         Fetch transcripts for a single video ID or list of video IDs.
         Args:
-            video_id (str/list): A single video ID or list of video IDs to fetch transcripts for. Leave blank to use video or search results.
+            video_id (str/list): A single video ID or list of video IDs to fetch transcripts for. Leave blank to use video, search or playlistItems results.
         Returns:
             dict: A list of transcripts.
         """
         # If video_id is not provided, use video results otherwise search results
         if video_id is None:
-            try:
-                video_id = [i['id'] for i in self.results['videos'] if i['statistics']['commentCount'] >= self.min_comments]
-            except:
-                video_id = list(set([i['id']['videoId'] for i in self.results['search']]))
+            video_id = self._video_ids(self.min_comments)
         else:
             assert isinstance(video_id, str) or isinstance(video_id, list), "video_id must be a list of video IDs."
+        video_id = self._unseen('transcripts', video_id)
         
         # Call transcripts API
         self.results['transcripts'] = await transcript(
@@ -181,15 +556,245 @@ class YouTubeAPI:
                                                 self.retry_delay, 
                                                 batch_size, 
                                                 batch_delay, 
-                                                self.verbose
+                                                self.verbose,
+                                                self.limiter,
+                                                self.failures
                                             )
+        if self.enrich is not None:
+            await self.enrich.submit(self.results['transcripts'] if isinstance(self.results['transcripts'], list) else [self.results['transcripts']])
+            await self.enrich.drain()
 
         if self.verbose:
             print(f"Transcripts for {len([i for i in self.results['transcripts'] if i])} videos retrieved")
 
+    # ==============================================
+    # Method to snapshot video statistics
+    # ==============================================
+    @_profiled
+    @_transported
+    async def snapshot(self, video_id=None, file_path=None, deltas=False, session=None):
+        """
+        Snapshot statistics (views, likes, comments) for a set of watched videos.
+        Each snapshot is stamped with a collection timestamp and appended to `snapshots.csv`.
+        Args:
+            video_id (str/list): A single video ID or list of video IDs to snapshot. Leave blank to use video, search or playlistItems results.
+            file_path (str): The directory of the time-series store. Default=os.getcwd()
+            deltas (bool): Only record videos whose statistics changed since the last snapshot. Default=False
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            list: The snapshot rows.
+        """
+        # If video_id is not provided, use video results otherwise search results
+        if video_id is None:
+            video_id = self._video_ids()
+        else:
+            assert isinstance(video_id, str) or isinstance(video_id, list), "video_id must be a string or a list of video IDs."
+
+        # Call videos API (statistics only)
+        rows = await snapshot(
+                        video_id, 
+                        {'key': self.api_key}, 
+                        self.async_delay, 
+                        self.retry_limit, 
+                        self.retry_delay, 
+                        session, 
+                        self.verbose,
+                        self.failures
+                    )
+        self.results['snapshots'] = _append_snapshot(rows, file_path, deltas)
+        # Replayed snapshots go to the same store
+        self._tag_failures('snapshot', file_path=file_path, deltas=deltas)
+
+        if self.verbose:
+            print(f"{len(self.results['snapshots'])} of {len(rows)} video snapshots recorded")
+
+    # ==============================================
+    # Method to estimate the cost of a collection plan
+    # ==============================================
+    @_profiled
+    @_transported
+    async def plan(self, query, windows=None, stages=('search', 'videos', 'commentThreads'), deadline=None, daily_quota=10000, session=None):
+        """
+        Dry run: estimate the requests, quota units and wall time of searching query over windows and
+        running the following stages, using one search page per query and one batched videos request
+        as probes. With a deadline, suggest async_delay, concurrent jobs and key count settings.
+        Args:
+            query (str/list): Search query or queries.
+            windows (list): (publishedAfter, publishedBefore) windows. Default=None (params['search'])
+            stages (list): Stages to estimate. Default=('search', 'videos', 'commentThreads')
+            deadline (float/int): Target wall time in seconds. Default=None
+            daily_quota (int): Quota units per key per day. Default=10000
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            dict: The estimate, also stored in self.estimate.
+        """
+        self.estimate = await plan(self, query, windows, stages, deadline, daily_quota, session)
+        return self.estimate
+
+    # ==============================================
+    # Method to work on a shared work queue
+    # ==============================================
+    async def work(self, queue, file_path=None, worker_id=None, stage=None, output='json'):
+        """
+        Claim and complete shards from a shared WorkQueue until it is empty.
+        Args:
+            queue (WorkQueue): The work queue.
+            file_path (str): The path where the shard outputs will be saved. Default=os.getcwd()
+            worker_id (str): The worker ID. Default=<hostname>-<pid>-<random>
+            stage (str): Only process shards of this stage. Default=None (any stage)
+            output (str): Output format, 'json' or 'csv'. Default='json'
+        Returns:
+            int: The number of shards completed.
+        """
+        return await run_worker(self, queue, file_path, worker_id, stage, output)
+
+    # ==============================================
+    # Method to replay failed requests
+    # ==============================================
+    def _tag_failures(self, endpoint, **kwargs):
+        """
+        Tag the failure ledger entries of an endpoint with what is needed to replay them.
+        """
+        for i in self.failures.entries:
+            if i['endpoint'] == endpoint:
+                for k, v in kwargs.items():
+                    i.setdefault(k, v)
+
+    @_profiled
+    @_transported
+    async def replay_failures(self, file_path=None, session=None):
+        """
+        Re-run only the units of work recorded in the failure ledger: search, playlistItems and comment
+        pages (resuming from the failed page token), videos, uploads, channels, snapshots and transcripts.
+        Results are added to self.results without duplicating items already there; units that fail
+        again are recorded again.
+        Args:
+            file_path (str): Directory or file of a saved failures.json to replay as well. Default=None
+            session (aiohttp.ClientSession): The session used to make HTTP requests.
+        Returns:
+            int: The number of units still failing.
+        """
+        # Share one session across all requests
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.replay_failures(file_path, session)
+
+        if file_path is not None:
+            self.failures.load(file_path)
+        entries = self.failures.take()
+        if self.verbose:
+            print(f"Replaying {len(entries)} failed requests")
+
+        for entry in [i for i in entries if i['endpoint'] == 'search']:
+            search_params = deepcopy(self.params['search'])
+            search_params['key'] = self.api_key
+            if entry['pageToken']:
+                search_params['pageToken'] = entry['pageToken']
+            if 'fields' not in search_params and self._fields('search'):
+                search_params['fields'] = self._fields('search')
+            l_search = await search(entry['id'], search_params, self.retry_limit, self.retry_delay, session, self.verbose, self.failures)
+            # Pages may have shifted since the failure: drop items already found
+            found = {str(i['id']) for i in self.results.get('search', [])}
+            self.results.setdefault('search', []).extend([i for i in l_search if str(i['id']) not in found])
+
+        playlist_id = {}
+        for entry in [i for i in entries if i['endpoint'] == 'playlistItems']:
+            playlist_id[entry['id']] = entry['pageToken']
+        channel_id = [i['id'] for i in entries if i['endpoint'] == 'uploads']
+        if channel_id:
+            playlist_id.update({i: None for i in await self._uploads_playlists(channel_id, session)})
+        if playlist_id:
+            playlistItems_params = deepcopy(self.params.get('playlistItems', _default_params['playlistItems']))
+            playlistItems_params['key'] = self.api_key
+            l_items = []
+            for k, v in playlist_id.items():
+                l_items += await _fetch_playlist_items(k, dict(playlistItems_params, pageToken=v) if v else playlistItems_params,
+                                                       self.retry_limit, self.retry_delay, session, self.verbose, self.failures)
+            found = {i['id'] for i in self.results.get('playlistItems', [])}
+            self.results.setdefault('playlistItems', []).extend([i for i in l_items if i['id'] not in found])
+
+        video_id = [i['id'] for i in entries if i['endpoint'] == 'videos']
+        if video_id:
+            videos_params = deepcopy(self.params['videos'])
+            videos_params['key'] = self.api_key
+            if 'fields' not in videos_params and self._fields('videos'):
+                videos_params['fields'] = self._fields('videos')
+            l_videos = await videos(video_id, videos_params, self.async_delay, self.retry_limit, self.retry_delay, False, session, self.verbose,
+                                    VideoRecord.from_item if self.compact else None, self.failures)
+            l_videos = [i for i in l_videos if i is not None]
+            if isinstance(self.results.get('videos'), dict):
+                # Sequential results are a dictionary by video ID
+                self.results['videos'].update({(i.id if isinstance(i, VideoRecord) else i['id']): i for i in l_videos})
+            else:
+                self.results.setdefault('videos', []).extend(l_videos)
+
+        for entry in [i for i in entries if i['endpoint'] == 'commentThreads']:
+            commentThreads_params = deepcopy(self.params['commentThreads'])
+            commentThreads_params['key'] = self.api_key
+            commentThreads_params['videoId'] = entry['id']
+            if entry['pageToken']:
+                commentThreads_params['pageToken'] = entry['pageToken']
+            if 'fields' not in commentThreads_params and self._fields('commentThreads'):
+                commentThreads_params['fields'] = self._fields('commentThreads')
+            l_comments = await _fetch_comment_thread(entry['id'], commentThreads_params, self.retry_limit, self.retry_delay, session, self.verbose,
+                                                     CommentThreadRecord.from_item if self.compact else None, self.failures, self.enrich)
+            threads = self.results.setdefault('commentThreads', [])
+            if isinstance(threads, dict):
+                # Sequential results are a dictionary by video ID
+                threads.setdefault(entry['id'], []).extend(l_comments)
+            elif threads and not isinstance(threads[0], list):
+                # The threads of a single video are one list
+                threads.extend(l_comments)
+            else:
+                threads.append(l_comments)
+
+        channel_id = [i['id'] for i in entries if i['endpoint'] == 'channels']
+        if channel_id:
+            channels_params = deepcopy(self.params.get('channels', _default_params['channels']))
+            channels_params['key'] = self.api_key
+            l_channels = await cached_channels(channel_id, channels_params, self.channel_cache, 0, None, self.async_delay, self.retry_limit,
+                                               self.retry_delay, session, self.verbose, self.failures)
+            found = {i['id'] for i in l_channels}
+            self.results['channels'] = [i for i in self.results.get('channels', []) if i['id'] not in found] + l_channels
+
+        snapshots = {}
+        for entry in [i for i in entries if i['endpoint'] == 'snapshot']:
+            snapshots.setdefault((entry.get('file_path'), entry.get('deltas', False)), []).append(entry['id'])
+        for (path, deltas), video_id in snapshots.items():
+            rows = await snapshot(video_id, {'key': self.api_key}, self.async_delay, self.retry_limit, self.retry_delay, session, self.verbose, self.failures)
+            self.results.setdefault('snapshots', []).extend(_append_snapshot(rows, path, deltas))
+            self._tag_failures('snapshot', file_path=path, deltas=deltas)
+
+        transcripts = {}
+        for entry in [i for i in entries if i['endpoint'] == 'transcripts']:
+            transcripts.setdefault((entry.get('code_language', 'en'), entry.get('cookies')), []).append(entry['id'])
+        for (code_language, cookies), video_id in transcripts.items():
+            l_transcripts = await transcript(video_id, code_language, cookies, self.retry_limit, self.retry_delay, 5, 1, self.verbose, self.limiter, self.failures)
+            if isinstance(self.results.get('transcripts'), dict):
+                # The transcript of a single video is not in a list
+                self.results['transcripts'] = [self.results['transcripts']]
+            self.results.setdefault('transcripts', []).extend(l_transcripts)
+            if self.enrich is not None:
+                await self.enrich.submit(l_transcripts)
+
+        if self.enrich is not None:
+            await self.enrich.drain()
+
+        if self.verbose:
+            print(f"{len(entries) - len(self.failures)} of {len(entries)} failed requests recovered")
+
+        return len(self.failures)
+
     # ==============================================
     # Method to save output as JSON or CSV
     # ==============================================
+    def _enriched_fields(self):
+        """
+        The fields added by the Enricher, kept after the default columns.
+        """
+        return list(self.enrich.fields) if self.enrich is not None else None
+
+    @_profiled
     def to_json(self, file_path=None, **kwargs):
         """
         Save the search results to files in JSON format.
@@ -206,8 +811,10 @@ class YouTubeAPI:
         shorten_cols = kwargs.get('shorten_cols', False)
         force_output = kwargs.get('force_output', False)
         verbose      = kwargs.get('verbose', False)
-        to_json(self.results, file_path, default_cols=default_cols, shorten_cols=shorten_cols, force_output=force_output, verbose=verbose)
+        to_json(self.results, file_path, default_cols=default_cols, shorten_cols=shorten_cols, force_output=force_output, verbose=verbose, seen=self.seen, duplicates=self.duplicates, extra_cols=self._enriched_fields())
+        self.failures.save(file_path)
     
+    @_profiled
     def to_csv(self, file_path=None, **kwargs):
         """
         Save the search results to files in CSV format.
@@ -224,4 +831,28 @@ class YouTubeAPI:
         shorten_cols = kwargs.get('shorten_cols', False)
         force_output = kwargs.get('force_output', False)
         verbose      = kwargs.get('verbose', False)
-        to_csv(self.results, file_path, default_cols=default_cols, shorten_cols=shorten_cols, force_output=force_output, verbose=verbose)
\ No newline at end of file
+        to_csv(self.results, file_path, default_cols=default_cols, shorten_cols=shorten_cols, force_output=force_output, verbose=verbose, seen=self.seen, duplicates=self.duplicates, extra_cols=self._enriched_fields())
+        self.failures.save(file_path)
+
+    @_profiled
+    def to_dataset(self, file_path=None, **kwargs):
+        """
+        Save the search results as a partitioned dataset of compressed parts with a manifest.
+
+        Args:
+            file_path (str): The dataset directory.
+            default_cols (bool): Use default column names. Default=False
+            shorten_cols (bool): Shorten column names. Default=False
+            partition_by (str/list): Any of 'date' (run date), 'query' and 'hash' (video ID bucket). Default=['date']
+            query (str): Value of the 'query' partition. Default=the query of the last search
+            format (str): 'jsonl' or 'csv'. Default='jsonl'
+            compression (str): 'gzip', 'zstd' or None. Default='gzip'
+            max_rows (int): Rows per part. Default=100000
+            verbose (bool): Print verbose output. Default=False
+        Returns:
+            dict: The manifest.
+        """
+        kwargs.setdefault('query', self.query)
+        manifest = to_dataset(self.results, file_path, seen=self.seen, duplicates=self.duplicates, extra_cols=self._enriched_fields(), **kwargs)
+        self.failures.save(file_path)
+        return manifest
@@ -0,0 +1,120 @@
+from .utils import _fetch_with_retries, _chunk
+from ..codec import loads, dump
+import asyncio
+import aiohttp
+import copy
+import os
+import time
+
+async def _fetch_channels(channel_ids, params, retry_limit=3, retry_delay=1, session=None, verbose=False, failures=None):
+    """
+    Fetch the data for a batch of up to 50 channels in a single request.
+    Args:
+        channel_ids (list): Channel IDs to fetch data for (max 50).
+        params (dict): Parameters such as part, key, etc.
+        retry_limit (int): The number of retries to attempt. Default=3
+        retry_delay (int): The delay between retries in seconds. Default=1
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        failures (FailureLedger): Record the channels of a failed batch here. Default=None
+
+    Returns:
+        list: The channel items returned by the API.
+    """
+    url = 'https://www.googleapis.com/youtube/v3/channels'
+    __params__ = copy.deepcopy(params)
+    __params__['id'] = ','.join(channel_ids)
+    __params__['maxResults'] = 50
+
+    try:
+        data, __ = await _fetch_with_retries(url, __params__, retry_limit, retry_delay, session, verbose)
+    except Exception as e:
+        print(f"Error fetching data for {len(channel_ids)} channels: {e}")
+        if failures is not None:
+            for i in channel_ids:
+                failures.record('channels', i, None, e)
+        return []
+
+    return (data or {}).get('items', [])
+
+async def channels(channel_id, params, async_delay=0, retry_limit=3, retry_delay=1, session=None, verbose=False, failures=None):
+    """
+    Fetch channel data for multiple channel IDs, batching 50 IDs per request (1 quota unit each).
+    Batches are fetched concurrently, staggered by async_delay.
+
+    Args:
+        channel_id (str/list): A single channel ID or list of channel IDs to fetch data for.
+        params (dict): Parameters such as part, key, etc.
+        async_delay(float/int): Delay in seconds between starting each batch.
+        retry_limit (int): The number of retries to attempt. Default=3
+        retry_delay (int): The delay between retries in seconds. Default=1
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        failures (FailureLedger): Record channels that could not be fetched here. Default=None
+
+    Returns:
+        list: The channel items returned by the API.
+    """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await channels(channel_id, params, async_delay, retry_limit, retry_delay, session, verbose, failures)
+
+    if isinstance(channel_id, str):
+        channel_id = [channel_id]
+    channel_id = list(dict.fromkeys(channel_id))
+
+    tasks = []
+    for batch in _chunk(channel_id, 50):
+        tasks.append(_fetch_channels(batch, params, retry_limit, retry_delay, session, verbose, failures))
+        await asyncio.sleep(async_delay)
+    results = await asyncio.gather(*tasks)
+    return sum(results, [])
+
+def _load_cache(cache_path):
+    """
+    Load the on-disk channel cache: a JSON object mapping channel ID to [fetched_at, item].
+    """
+    if cache_path is None or not os.path.exists(cache_path):
+        return {}
+    with open(cache_path, 'rb') as f:
+        return loads(f.read())
+
+async def cached_channels(channel_id, params, cache, ttl=86400, cache_path=None, async_delay=0, retry_limit=3, retry_delay=1, session=None, verbose=False, failures=None):
+    """
+    Fetch channel data, only requesting channels that are not in the cache or are older than ttl.
+
+    Args:
+        channel_id (list): Channel IDs to fetch data for.
+        params (dict): Parameters such as part, key, etc.
+        cache (dict): In-process cache mapping channel ID to [fetched_at, item]. Updated in place.
+        ttl (int/float): Time-to-live of cached channels in seconds. Default=86400
+        cache_path (str): Path of the on-disk JSON cache, merged into cache and rewritten. Default=None
+        async_delay(float/int): Delay in seconds between starting each batch.
+        retry_limit (int): The number of retries to attempt. Default=3
+        retry_delay (int): The delay between retries in seconds. Default=1
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        failures (FailureLedger): Record channels that could not be fetched here. Default=None
+
+    Returns:
+        list: The channel items, in the order of channel_id.
+    """
+    now = time.time()
+    for k, v in _load_cache(cache_path).items():
+        if k not in cache or cache[k][0] < v[0]:
+            cache[k] = v
+
+    channel_id = list(dict.fromkeys(channel_id))
+    missing = [i for i in channel_id if i not in cache or now - cache[i][0] > ttl]
+    if verbose:
+        print(f"{len(channel_id) - len(missing)} channels cached, {len(missing)} to fetch")
+
+    if missing:
+        items = await channels(missing, params, async_delay, retry_limit, retry_delay, session, verbose, failures)
+        for i in items:
+            cache[i['id']] = [now, i]
+        if cache_path is not None:
+            dump(cache, cache_path)
+
+    return [cache[i][1] for i in channel_id if i in cache]
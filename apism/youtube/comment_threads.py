@@ -1,9 +1,10 @@
-from .utils import _fetch_with_retries
+from .utils import _fetch_with_retries, _youtube
+from ..engine import Pages
 import asyncio
 import aiohttp
 import copy
 
-async def _fetch_comment_thread(video_id, params, retry_limit=3, retry_delay=1, session=aiohttp.ClientSession(), verbose=False):
+async def _fetch_comment_thread(video_id, params, retry_limit=3, retry_delay=1, session=None, verbose=False, record=None, failures=None, enrich=None, max_pages=None, max_comments=None):
     """
     Fetch the comment thread for a video.
     Args:
@@ -13,6 +14,11 @@ async def _fetch_comment_thread(video_id, params, retry_limit=3, retry_delay=1,
         retry_delay (int): The delay between retries in seconds. Default=1
         session (aiohttp.ClientSession): The session used to make HTTP requests.
         verbose (bool): Print verbose output. Default=False
+        record (callable): Convert each item as it arrives, e.g. CommentThreadRecord.from_item. Default=None
+        failures (FailureLedger): Record the failed page here, to resume from it later. Default=None
+        enrich (Enricher): Submit each page for enrichment while the next one is fetched. Default=None
+        max_pages (int): Stop after this many pages. Default=None (all pages)
+        max_comments (int): Stop after this many comment threads. Default=None (all comment threads)
 
     Returns:
         list: All comments for the given video.
@@ -21,31 +27,47 @@ async def _fetch_comment_thread(video_id, params, retry_limit=3, retry_delay=1,
     __params__ = copy.deepcopy(params)
     __params__['videoId'] = video_id  # Ensure videoId is included in the parameters
 
-    all_comments = []
-    next_page_token = None
+    # Do not download more comment threads than the cap
+    if max_comments is not None:
+        __params__['maxResults'] = min(int(__params__.get('maxResults', 20)), max_comments)
+
+    # Do not spend requests once the quota is exhausted
+    if failures is not None and failures.stopped:
+        failures.skip('commentThreads', video_id, __params__.get('pageToken'))
+        return []
 
-    while True:
-        if next_page_token:
-            __params__['pageToken'] = next_page_token
+    all_comments = []
+    pages = Pages(lambda p: _fetch_with_retries(url, p, retry_limit, retry_delay, session, verbose), __params__, _youtube, max_pages)
 
-        try:
-            data, next_page_token = await _fetch_with_retries(url, __params__, retry_limit, retry_delay, session, verbose)
+    try:
+        async for data in pages:
+            items = list(map(record, data.get('items', []))) if record else data.get('items', [])
+            all_comments.extend(items)
+            if enrich is not None:
+                await enrich.submit(items)
 
-            if data and 'items' in data:
-                all_comments.extend(data['items'])
+            if max_comments is not None:
+                if len(all_comments) >= max_comments:
+                    if verbose:
+                        print(f"Comment cap reached for video {video_id} after {pages.pages} pages")
+                    break
+                pages.params['maxResults'] = min(pages.params['maxResults'], max_comments - len(all_comments))
 
-            if not next_page_token:
+            # Another video exhausted the quota: resume from the next page later
+            if failures is not None and failures.stopped and pages.next_token:
+                failures.skip('commentThreads', video_id, pages.next_token)
                 break
-        
-        except Exception as e:
-            print(f"Error fetching comments for video {video_id}: {e}")
-            break
+
+    except Exception as e:
+        print(f"Error fetching comments for video {video_id}: {e}")
+        if failures is not None:
+            failures.record('commentThreads', video_id, pages.page_token, e)
 
     return all_comments
 
-async def comment_threads(video_id, params, async_delay=0, retry_limit=3, retry_delay=1, sequential=False, session=aiohttp.ClientSession(), verbose=False):
+async def comment_threads(video_id, params, async_delay=0, retry_limit=3, retry_delay=1, sequential=False, session=None, verbose=False, record=None, failures=None, enrich=None, max_pages=None, max_comments=None, max_concurrency=None):
     """
-    Fetch comment threads for multiple video IDs concurrently, but staggered using asyncio.gather.
+    Fetch comment threads for multiple video IDs concurrently, starting them in order and staggered by async_delay.
     Each video fetches comments independently, handling its own pagination with separate nextPageTokens.
     
     Args:
@@ -57,38 +79,52 @@ async def comment_threads(video_id, params, async_delay=0, retry_limit=3, retry_
         squential (bool): Concurrent (False) or sequential (True) API calls. Default=False
         session (aiohttp.ClientSession): The session used to make HTTP requests.
         verbose (bool): Print verbose output. Default=False
+        record (callable): Convert each item as it arrives, e.g. CommentThreadRecord.from_item. Default=None
+        failures (FailureLedger): Record failed pages here. Default=None
+        enrich (Enricher): Submit each page for enrichment while the next one is fetched. Default=None
+        max_pages (int): Pages per video. Default=None (all pages)
+        max_comments (int): Comment threads per video. Default=None (all comment threads)
+        max_concurrency (int): Videos fetched at the same time; the next video starts when one finishes. Default=None (all videos)
 
     Returns:
-        dict: A dictionary mapping video IDs to their respective comments.
+        list: The comments of each video, in the order of video_id (a dictionary by video ID if sequential).
     """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await comment_threads(video_id, params, async_delay, retry_limit, retry_delay, sequential, session, verbose, record, failures, enrich, max_pages, max_comments, max_concurrency)
+
     __params__ = copy.deepcopy(params)
 
     if type(video_id) == str:
-        return await _fetch_comment_thread(video_id, __params__, retry_limit, retry_delay, session, verbose)
+        return await _fetch_comment_thread(video_id, __params__, retry_limit, retry_delay, session, verbose, record, failures, enrich, max_pages, max_comments)
     
     elif type(video_id) == list:
         if sequential:
             return {
-                i: await _fetch_comment_thread(i, __params__, retry_limit, retry_delay, session, verbose) 
+                i: await _fetch_comment_thread(i, __params__, retry_limit, retry_delay, session, verbose, record, failures, enrich, max_pages, max_comments) 
                     for i in video_id
                 }
         else:
-            async with aiohttp.ClientSession() as session:
-                tasks = []
-                
-                for __, id in enumerate(video_id):
-                    # Create a separate task for each video with independent pagination
-                    tasks.append(_fetch_comment_thread(id, __params__, retry_limit, retry_delay, session, verbose))
-                    
-                    # Introduce a delay before starting the next task
-                    await asyncio.sleep(async_delay)
-                
-                # Gather the results of all tasks concurrently
-                results = await asyncio.gather(*tasks)
-                return results
-                
-                # Return a dictionary mapping video IDs to their comments
-                # return {id: result for id, result in zip(video_id, results)}
+            results = [None] * len(video_id)
+            # Videos start in the order given (e.g. by priority) as workers become free
+            queue = iter(enumerate(video_id))
+
+            async def _worker():
+                for idx, id in queue:
+                    # Each video fetches its comments with independent pagination
+                    results[idx] = await _fetch_comment_thread(id, __params__, retry_limit, retry_delay, session, verbose, record, failures, enrich, max_pages, max_comments)
+
+            # One worker per video unless max_concurrency bounds the videos in flight
+            workers = []
+            for __ in range(min(max_concurrency or len(video_id), len(video_id))):
+                workers.append(asyncio.create_task(_worker()))
+
+                # Introduce a delay before starting the next worker
+                await asyncio.sleep(async_delay)
+
+            await asyncio.gather(*workers)
+            return results
 
     else:
         print(f"Error fetching comments for video {video_id}")
@@ -6,8 +6,9 @@ _default_params = {
         'type': 'video',
         'maxResults': 50,
         'relevanceLanguage': 'en',
-        'publishedAfter': datetime.date.today().strftime('%Y-%m-%d') + 'T00:00:00Z',
-        'publishedBefore': datetime.date.today().strftime('%Y-%m-%d') + 'T23:59:59Z',
+        # None: today, resolved when the search runs (see _resolve_window)
+        'publishedAfter': None,
+        'publishedBefore': None,
         'order': 'viewCount'
     },
     'videos': {
@@ -16,9 +17,55 @@ _default_params = {
     'commentThreads': {
         'part': 'id,replies,snippet',
         'order': 'time'
+    },
+    'playlistItems': {
+        'part': 'contentDetails,snippet',
+        'maxResults': 50
+    },
+    'channels': {
+        'part': 'snippet,statistics'
     }
 }
 
+def _resolve_window(params):
+    """
+    Replace a publishedAfter/publishedBefore left as None with the start/end of today, so that a
+    long-running process searches the current day rather than the day it was started.
+    """
+    today = datetime.date.today().strftime('%Y-%m-%d')
+    if 'publishedAfter' in params and params['publishedAfter'] is None:
+        params['publishedAfter'] = today + 'T00:00:00Z'
+    if 'publishedBefore' in params and params['publishedBefore'] is None:
+        params['publishedBefore'] = today + 'T23:59:59Z'
+    return params
+
+# Quota units per request for each endpoint
+_quota_costs = {
+    'search': 100,
+    'videos': 1,
+    'commentThreads': 1,
+    'playlistItems': 1,
+    'channels': 1
+}
+
+# Fields always kept by partial-response masks because the fetchers rely on them
+_required_fields = {
+    'search': ['id.videoId'],
+    'videos': ['id', 'statistics'],
+    'commentThreads': ['id', 'snippet.videoId']
+}
+
+# Flattened column holding the ID of each row, used by the seen-ID index
+_id_columns = {
+    'search': 'id.videoId',
+    'playlistItems': 'id',
+    'videos': 'id',
+    'channels': 'id',
+    'commentThreads': 'id',
+    'commentThreadsreplies': 'id',
+    'transcripts': 'videoId'
+}
+
 _default_columns = {
     'default': {
         'search': [
@@ -103,6 +150,44 @@ _default_columns = {
             'language',
             'is_generated',
             'transcript'
+        ],
+        'snapshots': [
+            'videoId',
+            'collectedAt',
+            'viewCount',
+            'likeCount',
+            'favoriteCount',
+            'commentCount'
+        ],
+        'playlistItems': [
+            'kind',
+            'etag',
+            'id',
+            'snippet.publishedAt',
+            'snippet.channelId',
+            'snippet.channelTitle',
+            'snippet.title',
+            'snippet.description',
+            'snippet.playlistId',
+            'snippet.position',
+            'snippet.videoOwnerChannelId',
+            'snippet.videoOwnerChannelTitle',
+            'contentDetails.videoId',
+            'contentDetails.videoPublishedAt'
+        ],
+        'channels': [
+            'kind',
+            'etag',
+            'id',
+            'snippet.title',
+            'snippet.description',
+            'snippet.customUrl',
+            'snippet.publishedAt',
+            'snippet.country',
+            'statistics.viewCount',
+            'statistics.subscriberCount',
+            'statistics.hiddenSubscriberCount',
+            'statistics.videoCount'
         ]
     },
     'shorten': {
@@ -176,6 +261,44 @@ _default_columns = {
             'language',
             'is_generated',
             'transcript'
+        ],
+        'snapshots': [
+            'videoId',
+            'collectedAt',
+            'viewCount',
+            'likeCount',
+            'favoriteCount',
+            'commentCount'
+        ],
+        'playlistItems': [
+            'kind',
+            'etag',
+            'id',
+            'publishedAt',
+            'channelId',
+            'channelTitle',
+            'title',
+            'description',
+            'playlistId',
+            'position',
+            'videoOwnerChannelId',
+            'videoOwnerChannelTitle',
+            'videoId',
+            'videoPublishedAt'
+        ],
+        'channels': [
+            'kind',
+            'etag',
+            'id',
+            'title',
+            'description',
+            'customUrl',
+            'publishedAt',
+            'country',
+            'viewCount',
+            'subscriberCount',
+            'hiddenSubscriberCount',
+            'videoCount'
         ]
     }
 }
\ No newline at end of file
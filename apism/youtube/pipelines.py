@@ -31,9 +31,14 @@ async def search_videos_comments(query, search_params, video_params, comment_par
     retry_limit = kwargs.get('retry_limit', 3)
     retry_delay = kwargs.get('retry_delay', 1)
     sequential = kwargs.get('sequential', False)
-    session = kwargs.get('session', aiohttp.ClientSession())
+    session = kwargs.get('session')
     verbose = kwargs.get('verbose', False)
 
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await search_videos_comments(query, search_params, video_params, comment_params, **dict(kwargs, session=session))
+
     # Fetch Search Results
     search_results = await search(query, search_params, retry_limit, retry_delay, session, verbose)
     l_video_ids = list(set([i['id']['videoId'] for i in search_results]))
@@ -63,7 +68,4 @@ async def search_videos_comments(query, search_params, video_params, comment_par
         else:
             output_dict[v]['commentThreads'] = comments_results[v]
 
-    # Close session
-    await session.close()
-
     return output_dict
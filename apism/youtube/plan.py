@@ -0,0 +1,188 @@
+from .utils import _fetch_with_retries
+from .snapshot import _fetch_statistics
+from .defaults import _quota_costs, _resolve_window
+import aiohttp
+import copy
+import math
+import time
+
+# Search stops paging after about 500 results, whatever totalResults says
+_max_search_results = 500
+
+async def _probe_search(query, params, retry_limit=3, retry_delay=1, session=None, verbose=False):
+    """
+    Fetch the first search page of a query to read pageInfo.totalResults.
+    Returns:
+        tuple: (totalResults, video IDs on the first page, seconds taken).
+    """
+    url = 'https://www.googleapis.com/youtube/v3/search'
+    __params__ = _resolve_window(copy.deepcopy(params))
+    __params__['q'] = query
+    __params__['fields'] = 'pageInfo(totalResults),items(id(videoId))'
+
+    t0 = time.perf_counter()
+    data, __ = await _fetch_with_retries(url, __params__, retry_limit, retry_delay, session, verbose)
+    seconds = time.perf_counter() - t0
+
+    data = data or {}
+    return data.get('pageInfo', {}).get('totalResults', 0), [i['id']['videoId'] for i in data.get('items', [])], seconds
+
+def _stage_seconds(units, pages, latency, async_delay, sequential):
+    """
+    Expected wall time of a stage whose units each page sequentially and start async_delay apart.
+    """
+    if not units:
+        return 0
+    if sequential:
+        return units * pages * latency
+    return units * async_delay + math.ceil(pages) * latency
+
+async def plan(api, queries, windows=None, stages=('search', 'videos', 'commentThreads'), deadline=None, daily_quota=10000, session=None):
+    """
+    Estimate the requests, quota units and wall time of a collection plan from the endpoint costs,
+    page sizes and settings of `api`, using cheap probes: one search page per query (for
+    totalResults) and one batched videos request (for commentCount) on the probed hits.
+    Args:
+        api (YouTubeAPI): The API object whose params, min_comments, async_delay and sequential are used.
+        queries (str/list): Search queries.
+        windows (list): (publishedAfter, publishedBefore) windows searched for each query. Default=None (params['search'])
+        stages (list): Stages to estimate: 'search', 'videos', 'commentThreads', 'transcripts'. Default=('search', 'videos', 'commentThreads')
+        deadline (float/int): Target wall time in seconds, used to suggest settings. Default=None
+        daily_quota (int): Quota units per key per day. Default=10000
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+    Returns:
+        dict: {'stages': {stage: {'units', 'requests', 'quota', 'seconds'}}, 'requests', 'quota', 'seconds',
+            'probe': {...}, 'keys', 'suggestion': {...}}. The search probes cost 100 quota units each.
+    """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await plan(api, queries, windows, stages, deadline, daily_quota, session)
+
+    queries = [queries] if isinstance(queries, str) else list(queries)
+    windows = windows or [(None, None)]
+    search_params = copy.deepcopy(api.params['search'])
+    search_params['key'] = api.api_key
+
+    # Probe the first window of each query; the other windows are assumed to be alike
+    l_totals, l_video_ids, l_seconds = [], [], []
+    for query in queries:
+        probe_params = dict(search_params)
+        if windows[0][0]:
+            probe_params['publishedAfter'], probe_params['publishedBefore'] = windows[0]
+        total, video_ids, seconds = await _probe_search(query, probe_params, api.retry_limit, api.retry_delay, session, api.verbose)
+        l_totals.append(total)
+        l_video_ids += video_ids
+        l_seconds.append(seconds)
+
+    # Probe commentCount on the first page of hits (50 IDs per request)
+    l_stats = await _fetch_statistics(l_video_ids[:50], {'key': api.api_key}, None, api.retry_limit, api.retry_delay, session, api.verbose) if l_video_ids else []
+
+    latency = sum(l_seconds) / len(l_seconds)
+    probe = {
+        'requests': len(queries) + (1 if l_video_ids else 0),
+        'quota': len(queries) * _quota_costs['search'] + (_quota_costs['videos'] if l_video_ids else 0),
+        'totalResults': dict(zip(queries, l_totals)),
+        'latency': latency
+    }
+
+    # Search: pages per (query, window), capped at ~500 results
+    page_size = search_params.get('maxResults', 5)
+    hits = [min(i, _max_search_results) for i in l_totals]
+    search_pages = [max(1, math.ceil(i / page_size)) for i in hits]
+    n_videos = sum(hits) * len(windows)
+
+    # Comments: share of videos with min_comments+ comments and comment pages per such video
+    comment_counts = [i['commentCount'] for i in l_stats]
+    qualifying = [i for i in comment_counts if i >= api.min_comments]
+    share = len(qualifying) / len(comment_counts) if comment_counts else 1
+    comments_page_size = api.params.get('commentThreads', {}).get('maxResults', 20)
+    # commentCount includes replies, so this is an upper bound on threads pages
+    comment_pages = sum(max(1, math.ceil(i / comments_page_size)) for i in qualifying) / len(qualifying) if qualifying else 1
+    n_commented = round(n_videos * share)
+
+    estimate = {}
+    if 'search' in stages:
+        requests = sum(search_pages) * len(windows)
+        estimate['search'] = {
+            'units': len(queries) * len(windows),
+            'requests': requests,
+            'quota': requests * _quota_costs['search'],
+            'seconds': _stage_seconds(len(queries) * len(windows), max(search_pages), latency, api.async_delay, True)
+        }
+    if 'videos' in stages:
+        estimate['videos'] = {
+            'units': n_videos,
+            'requests': n_videos,
+            'quota': n_videos * _quota_costs['videos'],
+            'seconds': _stage_seconds(n_videos, 1, latency, api.async_delay, api.sequential)
+        }
+    if 'commentThreads' in stages:
+        requests = math.ceil(n_commented * comment_pages)
+        estimate['commentThreads'] = {
+            'units': n_commented,
+            'requests': requests,
+            'quota': requests * _quota_costs['commentThreads'],
+            'seconds': _stage_seconds(n_commented, comment_pages, latency, api.async_delay, api.sequential)
+        }
+    if 'transcripts' in stages:
+        estimate['transcripts'] = {
+            'units': n_commented,
+            'requests': n_commented,
+            'quota': 0,
+            'seconds': _stage_seconds(n_commented, 1, latency, api.async_delay, api.sequential)
+        }
+
+    quota = sum(i['quota'] for i in estimate.values())
+    result = {
+        'stages': estimate,
+        'requests': sum(i['requests'] for i in estimate.values()),
+        'quota': quota,
+        'seconds': sum(i['seconds'] for i in estimate.values()),
+        'probe': probe,
+        'keys': max(1, math.ceil(quota / daily_quota)),
+        'suggestion': {}
+    }
+
+    if deadline is not None:
+        result['suggestion'] = _suggest(estimate, deadline, latency, comment_pages)
+        result['suggestion']['keys'] = result['keys']
+
+    if api.verbose:
+        _print_plan(result)
+
+    return result
+
+def _suggest(estimate, deadline, latency, comment_pages):
+    """
+    Settings that would meet a deadline: concurrent search jobs if paging through the searches takes
+    longer than the deadline, then the async_delay (and the requests it keeps in flight) that fits the
+    remaining stages into the time left.
+    """
+    suggestion = {}
+    budget = deadline
+    if 'search' in estimate:
+        jobs = math.ceil(estimate['search']['seconds'] / deadline) if deadline else 1
+        if jobs > 1:
+            suggestion['concurrency'] = min(jobs, estimate['search']['units'])
+        budget -= estimate['search']['seconds'] / suggestion.get('concurrency', 1)
+
+    stages = [k for k in estimate if k != 'search' and estimate[k]['units']]
+    if stages:
+        share = budget / len(stages)
+        delays = [(share - math.ceil(comment_pages if k == 'commentThreads' else 1) * latency) / estimate[k]['units'] for k in stages]
+        if min(delays) <= 0:
+            suggestion['note'] = "The deadline is shorter than the sequential paging of a single unit; split the work across more jobs or keys."
+        else:
+            suggestion['sequential'] = False
+            suggestion['async_delay'] = min(delays)
+            suggestion['in_flight'] = math.ceil(latency / min(delays))
+
+    return suggestion
+
+def _print_plan(result):
+    for k, v in result['stages'].items():
+        print(f"{k}: {v['requests']} requests, {v['quota']} quota units, ~{v['seconds']:.0f}s")
+    print(f"Total: {result['requests']} requests, {result['quota']} quota units ({result['keys']} key(s) for one day), ~{result['seconds']:.0f}s")
+    if result['suggestion']:
+        print(f"Suggested settings: {result['suggestion']}")
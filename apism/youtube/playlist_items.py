@@ -0,0 +1,76 @@
+from .utils import _fetch_with_retries, _youtube
+from ..engine import Pages
+import asyncio
+import aiohttp
+import copy
+
+async def _fetch_playlist_items(playlist_id, params, retry_limit=3, retry_delay=1, session=None, verbose=False, failures=None):
+    """
+    Fetch all items of a playlist with pagination support (sequential fetching).
+    Args:
+        playlist_id (str): Playlist ID to fetch items for.
+        params (dict): Parameters such as part, maxResults, etc.
+        retry_limit (int): The number of retries to attempt. Default=3
+        retry_delay (int): The delay between retries in seconds. Default=1
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        failures (FailureLedger): Record the failed page here, to resume from it later. Default=None
+
+    Returns:
+        list: All items of the given playlist.
+    """
+    url = 'https://www.googleapis.com/youtube/v3/playlistItems'
+    __params__ = copy.deepcopy(params)
+    __params__['playlistId'] = playlist_id
+
+    # Do not spend requests once the quota is exhausted
+    if failures is not None and failures.stopped:
+        failures.skip('playlistItems', playlist_id, __params__.get('pageToken'))
+        return []
+
+    all_items = []
+    pages = Pages(lambda p: _fetch_with_retries(url, p, retry_limit, retry_delay, session, verbose), __params__, _youtube)
+
+    try:
+        async for data in pages:
+            all_items.extend(data.get('items', []))
+
+    except Exception as e:
+        print(f"Error fetching items for playlist {playlist_id}: {e}")
+        if failures is not None:
+            failures.record('playlistItems', playlist_id, pages.page_token, e)
+
+    return all_items
+
+async def playlist_items(playlist_id, params, async_delay=0, retry_limit=3, retry_delay=1, session=None, verbose=False, failures=None):
+    """
+    Fetch the items of multiple playlists concurrently, but staggered using asyncio.gather.
+    Each playlist handles its own pagination (1 quota unit per page of 50 items).
+
+    Args:
+        playlist_id (str/list): A single playlist ID or list of playlist IDs.
+        params (dict): Parameters such as part, maxResults, etc.
+        async_delay(float/int): Delay in seconds between starting each task.
+        retry_limit (int): The number of retries to attempt. Default=3
+        retry_delay (int): The delay between retries in seconds. Default=1
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        failures (FailureLedger): Record failed pages here. Default=None
+
+    Returns:
+        list: The items of all playlists.
+    """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await playlist_items(playlist_id, params, async_delay, retry_limit, retry_delay, session, verbose, failures)
+
+    if isinstance(playlist_id, str):
+        playlist_id = [playlist_id]
+
+    tasks = []
+    for id in dict.fromkeys(playlist_id):
+        tasks.append(_fetch_playlist_items(id, params, retry_limit, retry_delay, session, verbose, failures))
+        await asyncio.sleep(async_delay)
+    results = await asyncio.gather(*tasks)
+    return sum(results, [])
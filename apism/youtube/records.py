@@ -0,0 +1,186 @@
+import sys
+
+def _intern(value):
+    """Intern repeated identifiers (channel and video IDs) so each is stored once."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class _Record:
+    """
+    Base class for compact records. Subclasses define `__slots__` and `_columns`, a mapping
+    from slot name to the flattened column name used by the writers.
+    """
+    __slots__ = ()
+    _columns = {}
+
+    def to_flat(self):
+        """
+        Returns:
+            dict: The record as a flattened dictionary, as produced by _flatten_json for the raw item.
+        """
+        return {col: getattr(self, slot) for slot, col in self._columns.items()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{i}={getattr(self, i)!r}' for i in self.__slots__)})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, i) == getattr(other, i) for i in self.__slots__)
+
+class VideoRecord(_Record):
+    """
+    Compact representation of a videos item (id, statistics and topic categories).
+    """
+    __slots__ = ('id', 'viewCount', 'likeCount', 'favoriteCount', 'commentCount', 'topicCategories')
+    _columns = {
+        'id': 'id',
+        'viewCount': 'statistics.viewCount',
+        'likeCount': 'statistics.likeCount',
+        'favoriteCount': 'statistics.favoriteCount',
+        'commentCount': 'statistics.commentCount',
+        'topicCategories': 'topicDetails.topicCategories'
+    }
+
+    def __init__(self, id, viewCount=0, likeCount=0, favoriteCount=0, commentCount=0, topicCategories=None):
+        self.id = _intern(id)
+        self.viewCount = viewCount
+        self.likeCount = likeCount
+        self.favoriteCount = favoriteCount
+        self.commentCount = commentCount
+        self.topicCategories = tuple(topicCategories) if topicCategories else None
+
+    @classmethod
+    def from_item(cls, item):
+        """
+        Args:
+            item (dict): A videos item as returned by the API.
+        Returns:
+            VideoRecord: The compact record.
+        """
+        statistics = item.get('statistics', {})
+        return cls(
+            item['id'],
+            int(statistics.get('viewCount', 0)),
+            int(statistics.get('likeCount', 0)),
+            int(statistics.get('favoriteCount', 0)),
+            int(statistics.get('commentCount', 0)),
+            item.get('topicDetails', {}).get('topicCategories')
+        )
+
+    def to_flat(self):
+        flat = super().to_flat()
+        if flat['topicDetails.topicCategories'] is None:
+            del flat['topicDetails.topicCategories']
+        else:
+            flat['topicDetails.topicCategories'] = list(flat['topicDetails.topicCategories'])
+        return flat
+
+class CommentRecord(_Record):
+    """
+    Compact representation of a reply comment.
+    """
+    __slots__ = ('id', 'videoId', 'parentId', 'authorDisplayName', 'authorChannelId', 'textOriginal', 'likeCount', 'publishedAt', 'updatedAt')
+    _columns = {
+        'id': 'id',
+        'videoId': 'snippet.videoId',
+        'parentId': 'snippet.parentId',
+        'authorDisplayName': 'snippet.authorDisplayName',
+        'authorChannelId': 'snippet.authorChannelId.value',
+        'textOriginal': 'snippet.textOriginal',
+        'likeCount': 'snippet.likeCount',
+        'publishedAt': 'snippet.publishedAt',
+        'updatedAt': 'snippet.updatedAt'
+    }
+
+    def __init__(self, id, videoId, parentId, authorDisplayName, authorChannelId, textOriginal, likeCount, publishedAt, updatedAt):
+        self.id = id
+        self.videoId = _intern(videoId)
+        self.parentId = parentId
+        self.authorDisplayName = authorDisplayName
+        self.authorChannelId = _intern(authorChannelId)
+        self.textOriginal = textOriginal
+        self.likeCount = likeCount
+        self.publishedAt = publishedAt
+        self.updatedAt = updatedAt
+
+    @classmethod
+    def from_item(cls, item):
+        """
+        Args:
+            item (dict): A comments item (e.g. from replies.comments).
+        Returns:
+            CommentRecord: The compact record.
+        """
+        snippet = item.get('snippet', {})
+        return cls(
+            item.get('id'),
+            snippet.get('videoId'),
+            snippet.get('parentId'),
+            snippet.get('authorDisplayName'),
+            snippet.get('authorChannelId', {}).get('value'),
+            snippet.get('textOriginal'),
+            snippet.get('likeCount'),
+            snippet.get('publishedAt'),
+            snippet.get('updatedAt')
+        )
+
+class CommentThreadRecord(_Record):
+    """
+    Compact representation of a commentThreads item: the top-level comment and its replies.
+    """
+    __slots__ = ('id', 'videoId', 'channelId', 'authorDisplayName', 'authorChannelId', 'textOriginal', 'likeCount', 'publishedAt', 'updatedAt', 'totalReplyCount', 'replies')
+    _columns = {
+        'id': 'id',
+        'videoId': 'snippet.videoId',
+        'channelId': 'snippet.channelId',
+        'authorDisplayName': 'snippet.topLevelComment.snippet.authorDisplayName',
+        'authorChannelId': 'snippet.topLevelComment.snippet.authorChannelId.value',
+        'textOriginal': 'snippet.topLevelComment.snippet.textOriginal',
+        'likeCount': 'snippet.topLevelComment.snippet.likeCount',
+        'publishedAt': 'snippet.topLevelComment.snippet.publishedAt',
+        'updatedAt': 'snippet.topLevelComment.snippet.updatedAt',
+        'totalReplyCount': 'snippet.totalReplyCount'
+    }
+
+    def __init__(self, id, videoId, channelId, authorDisplayName, authorChannelId, textOriginal, likeCount, publishedAt, updatedAt, totalReplyCount, replies=None):
+        self.id = id
+        self.videoId = _intern(videoId)
+        self.channelId = _intern(channelId)
+        self.authorDisplayName = authorDisplayName
+        self.authorChannelId = _intern(authorChannelId)
+        self.textOriginal = textOriginal
+        self.likeCount = likeCount
+        self.publishedAt = publishedAt
+        self.updatedAt = updatedAt
+        self.totalReplyCount = totalReplyCount
+        self.replies = tuple(replies) if replies else None
+
+    @classmethod
+    def from_item(cls, item):
+        """
+        Args:
+            item (dict): A commentThreads item as returned by the API.
+        Returns:
+            CommentThreadRecord: The compact record.
+        """
+        snippet = item.get('snippet', {})
+        top = snippet.get('topLevelComment', {}).get('snippet', {})
+        replies = item.get('replies', {}).get('comments')
+        return cls(
+            item.get('id'),
+            snippet.get('videoId'),
+            snippet.get('channelId'),
+            top.get('authorDisplayName'),
+            top.get('authorChannelId', {}).get('value'),
+            top.get('textOriginal'),
+            top.get('likeCount'),
+            top.get('publishedAt'),
+            top.get('updatedAt'),
+            snippet.get('totalReplyCount'),
+            [CommentRecord.from_item(i) for i in replies] if replies else None
+        )
+
+    def to_flat(self):
+        flat = super().to_flat()
+        # Replies are split into commentThreadsreplies by _flatten_results
+        if self.replies:
+            flat['replies.comments'] = list(self.replies)
+        return flat
@@ -1,11 +1,14 @@
 from .utils import _flatten_results, _shorten_keys, _preprocess_data, _reorder_dict, _write_dict_to_csv
 from .defaults import _default_columns
-import json
+from .seen import _filter_seen
+from ..codec import dump
+from ..dataset import write_dataset
+from ..profiler import _phase
 import os
 import re
 import warnings
 
-def _process_for_save(results, default_cols, shorten_cols):
+def _process_for_save(results, default_cols, shorten_cols, seen=None, duplicates='keep', extra_cols=None):
     """
     Process results for save.
 
@@ -13,16 +16,24 @@ def _process_for_save(results, default_cols, shorten_cols):
         data (dict): The results data to save.
         default_cols (bool): Use default column names.
         shorten_cols (bool): Shorten column names.
+        seen (SeenIndex): Seen-ID index of previous runs. Default=None
+        duplicates (str): 'keep', 'skip' or 'refresh' rows seen in previous runs. Default='keep'
+        extra_cols (list): Columns kept after the default ones, e.g. the fields added by an Enricher. Default=None
     """
 
     # Flatten dictionary
-    flattened = _flatten_results(results)
+    with _phase('flatten_results'):
+        flattened = _flatten_results(results)
+
+    # Drop and/or record rows seen in previous runs
+    if seen is not None and duplicates != 'keep':
+        flattened = _filter_seen(flattened, seen, duplicates)
 
     output = {}
     col_names = {}
     for k, v in flattened.items():
         # Transcripts
-        if k in ['search', 'videos', 'commentThreads', 'commentThreadsreplies']:
+        if k in ['search', 'videos', 'commentThreads', 'commentThreadsreplies', 'playlistItems', 'channels']:
             # Shorten wikipedia link for video topics
             if k == 'videos':
                 for i in v:
@@ -42,8 +53,12 @@ def _process_for_save(results, default_cols, shorten_cols):
                 col_names[k] = _default_columns['shorten'][k]
             else:
                 col_names[k] = _default_columns['default'][k]
+
+            # Keep the extra columns the rows have, e.g. enriched fields
+            present = {key for row in flattened[k] or [] if row for key in row.keys()}
+            col_names[k] = col_names[k] + [i for i in extra_cols or [] if i in present and i not in col_names[k]]
         else:
-            col_names[k] = list({key for row in v if row for key in row.keys()})
+            col_names[k] = list({key for row in v or [] if row for key in row.keys()})
 
         # Reorder dict
         output[k] = _reorder_dict(flattened[k], col_names[k])
@@ -62,19 +77,25 @@ def to_json(results, file_path=None, **kwargs):
         shorten_cols (bool): Shorten column names. Default=False
         force_output (bool): Force output even if no data is available. Default=False
         verbose (bool): Print verbose output. Default=False
+        seen (SeenIndex): Seen-ID index of previous runs. Default=None
+        duplicates (str): 'keep', 'skip' or 'refresh' rows seen in previous runs. Default='keep'
+        extra_cols (list): Columns kept after the default ones, e.g. the fields added by an Enricher. Default=None
     """
     # Kwargs
     default_cols = kwargs.get('default_cols', False)
     shorten_cols = kwargs.get('shorten_cols', False)
     force_output = kwargs.get('force_output', False)
     verbose      = kwargs.get('verbose', False)
+    seen         = kwargs.get('seen', None)
+    duplicates   = kwargs.get('duplicates', 'keep')
+    extra_cols   = kwargs.get('extra_cols', None)
 
     # Determine file path
     if file_path is None:
         file_path = os.getcwd()
 
     # Process
-    output, __ = _process_for_save(results, default_cols, shorten_cols)
+    output, __ = _process_for_save(results, default_cols, shorten_cols, seen, duplicates, extra_cols)
 
     # Return
     for k in output.keys():
@@ -84,8 +105,8 @@ def to_json(results, file_path=None, **kwargs):
 
         # Write data to JSON files
         if output[k] or force_output:
-            with open(os.path.join(file_path, f"{k}.json"), 'w') as json_file:
-                json.dump(output[k], json_file)
+            with _phase('write_json', entity=k):
+                dump(output[k], os.path.join(file_path, f"{k}.json"))
 
 def to_csv(results, file_path=None, **kwargs):
     """
@@ -99,19 +120,25 @@ def to_csv(results, file_path=None, **kwargs):
         shorten_cols (bool): Shorten column names. Default=False
         force_output (bool): Force output even if no data is available. Default=False
         verbose (bool): Print verbose output. Default=False
+        seen (SeenIndex): Seen-ID index of previous runs. Default=None
+        duplicates (str): 'keep', 'skip' or 'refresh' rows seen in previous runs. Default='keep'
+        extra_cols (list): Columns kept after the default ones, e.g. the fields added by an Enricher. Default=None
     """
     # Kwargs
     default_cols = kwargs.get('default_cols', False)
     shorten_cols = kwargs.get('shorten_cols', False)
     force_output = kwargs.get('force_output', False)
     verbose      = kwargs.get('verbose', False)
+    seen         = kwargs.get('seen', None)
+    duplicates   = kwargs.get('duplicates', 'keep')
+    extra_cols   = kwargs.get('extra_cols', None)
 
     # Determine file path
     if file_path is None:
         file_path = os.getcwd()
 
     # Process
-    output, col_names = _process_for_save(results, default_cols, shorten_cols)
+    output, col_names = _process_for_save(results, default_cols, shorten_cols, seen, duplicates, extra_cols)
 
     # Return
     for k in output.keys():        
@@ -121,4 +148,34 @@ def to_csv(results, file_path=None, **kwargs):
 
         # Write data to CSV files
         if output[k] or force_output:
-            _write_dict_to_csv(os.path.join(file_path, f"{k}.csv"), output[k], col_names[k])
\ No newline at end of file
+            with _phase('write_csv', entity=k):
+                _write_dict_to_csv(os.path.join(file_path, f"{k}.csv"), output[k], col_names[k])
+
+def to_dataset(results, file_path=None, **kwargs):
+    """
+    Save the search results as a partitioned dataset of compressed parts with a manifest (see apism.dataset.write_dataset).
+
+    Args:
+        results (dict): The results to save.
+        file_path (str): The dataset directory.
+    Kwargs:
+        default_cols (bool): Use default column names. Default=False
+        shorten_cols (bool): Shorten column names. Default=False
+        seen (SeenIndex): Seen-ID index of previous runs. Default=None
+        duplicates (str): 'keep', 'skip' or 'refresh' rows seen in previous runs. Default='keep'
+        extra_cols (list): Columns kept after the default ones, e.g. the fields added by an Enricher. Default=None
+        partition_by, query, buckets, format, compression, max_rows, verbose: As for write_dataset.
+    Returns:
+        dict: The manifest.
+    """
+    # Kwargs
+    default_cols = kwargs.pop('default_cols', False)
+    shorten_cols = kwargs.pop('shorten_cols', False)
+    seen         = kwargs.pop('seen', None)
+    duplicates   = kwargs.pop('duplicates', 'keep')
+    extra_cols   = kwargs.pop('extra_cols', None)
+
+    # Process
+    output, col_names = _process_for_save(results, default_cols, shorten_cols, seen, duplicates, extra_cols)
+
+    return write_dataset(output, file_path, columns=col_names, **kwargs)
@@ -1,8 +1,10 @@
-from .utils import _fetch_with_retries
+from .utils import _fetch_with_retries, _youtube
+from ..engine import Pages
+from .defaults import _resolve_window
 import aiohttp
 import copy
 
-async def search(query, params, retry_limit=3, retry_delay=1, session=aiohttp.ClientSession(), verbose=False):
+async def search(query, params, retry_limit=3, retry_delay=1, session=None, verbose=False, failures=None):
     """
     Fetch search results for a single query with pagination support (sequential fetching).
     Args:
@@ -12,30 +14,32 @@ async def search(query, params, retry_limit=3, retry_delay=1, session=aiohttp.Cl
         retry_delay (int): The delay between retries in seconds. Default=1
         session (aiohttp.ClientSession): The session used to make HTTP requests.
         verbose (bool): Print verbose output. Default=False
+        failures (FailureLedger): Record a failed page here and return the results so far instead of raising. Default=None
 
     Returns:
         list: All video search results for the given query.
     """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await search(query, params, retry_limit, retry_delay, session, verbose, failures)
+
     url = 'https://www.googleapis.com/youtube/v3/search'
-    __params__ = copy.deepcopy(params)
+    __params__ = _resolve_window(copy.deepcopy(params))
     __params__['q'] = query
 
     all_results = []
-    next_page_token = None
+    pages = Pages(lambda p: _fetch_with_retries(url, p, retry_limit, retry_delay, session, verbose), __params__, _youtube)
 
     # Sequentially fetch paginated results
-    while True:
-        if next_page_token:
-            __params__['pageToken'] = next_page_token
-
-        data, next_page_token = await _fetch_with_retries(url, __params__, retry_limit, retry_delay, session, verbose)
-
-        if data and 'items' in data:
-            all_results.extend(data['items'])
-
-        # Break the loop when no more pages are available
-        if not next_page_token:
-            break
+    try:
+        async for data in pages:
+            all_results.extend(data.get('items', []))
+    except Exception as e:
+        if failures is None:
+            raise
+        print(f"Error fetching search results for {query}: {e}")
+        failures.record('search', query, pages.page_token, e)
 
     return all_results
 
@@ -0,0 +1,89 @@
+from .defaults import _id_columns
+import os
+
+_duplicates = ['keep', 'skip', 'refresh']
+
+class SeenIndex:
+    """
+    A persistent index of IDs collected in previous runs, one append-only file per entity type
+    (`<path>/<entity>.ids`, one ID per line).
+    Lookups are made against the IDs recorded before this run, so writing the same results
+    twice (e.g. to_json then to_csv) emits the same rows.
+    Args:
+        path (str): Directory holding the index files.
+    """
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._before = {}
+        self._added = {}
+
+    def _file(self, entity):
+        return os.path.join(self.path, f"{entity}.ids")
+
+    def _load(self, entity):
+        if entity not in self._before:
+            ids = set()
+            if os.path.exists(self._file(entity)):
+                with open(self._file(entity)) as f:
+                    ids = set(f.read().split())
+            self._before[entity] = ids
+            self._added[entity] = set()
+        return self._before[entity]
+
+    def seen(self, entity, id):
+        """
+        Returns:
+            bool: True if id was recorded for entity in a previous run.
+        """
+        return id in self._load(entity)
+
+    def unseen(self, entity, ids):
+        """
+        Args:
+            entity (str): The entity type, e.g. 'videos'.
+            ids (list): IDs to check.
+        Returns:
+            list: The IDs not recorded for entity in a previous run, in order.
+        """
+        before = self._load(entity)
+        return [i for i in ids if i not in before]
+
+    def add(self, entity, ids):
+        """
+        Record IDs for entity, appending new ones to the index file.
+        """
+        before = self._load(entity)
+        new = [i for i in dict.fromkeys(ids) if i and i not in before and i not in self._added[entity]]
+        if new:
+            with open(self._file(entity), 'a') as f:
+                f.write('\n'.join(new) + '\n')
+            self._added[entity].update(new)
+
+def _filter_seen(flattened, seen, duplicates='skip'):
+    """
+    Drop rows collected in previous runs (duplicates='skip') and record the IDs of all rows.
+
+    Args:
+        flattened (dict): The flattened results, as returned by _flatten_results.
+        seen (SeenIndex): The seen-ID index.
+        duplicates (str): 'skip' to drop seen rows, 'refresh' to keep them. Default='skip'
+
+    Returns:
+        dict: The flattened results.
+    """
+    output = dict(flattened)
+    for k, col in _id_columns.items():
+        if not output.get(k):
+            continue
+        rows = [i for i in output[k] if i]
+        if duplicates == 'skip':
+            rows = [i for i in rows if not seen.seen(k, i.get(col))]
+        seen.add(k, [i.get(col) for i in rows])
+        output[k] = rows
+
+    # Videos whose comment threads were collected, for comment_threads(skip_seen_videos=True)
+    if output.get('commentThreads'):
+        seen.add('commentThreads.videoId', [i.get('snippet.videoId') for i in output['commentThreads']])
+
+    return output
@@ -0,0 +1,126 @@
+from .utils import _fetch_with_retries, _chunk
+from ..codec import loads, dump
+import asyncio
+import aiohttp
+import copy
+import csv
+import datetime
+import os
+
+_statistics = ['viewCount', 'likeCount', 'favoriteCount', 'commentCount']
+_snapshot_columns = ['videoId', 'collectedAt'] + _statistics
+
+async def _fetch_statistics(video_ids, params, collected_at, retry_limit=3, retry_delay=1, session=None, verbose=False, failures=None):
+    """
+    Fetch the statistics for a batch of up to 50 videos in a single request.
+    Args:
+        video_ids (list): Video IDs to fetch statistics for (max 50).
+        params (dict): Parameters such as key.
+        collected_at (str): Collection timestamp stamped on every row.
+        retry_limit (int): The number of retries to attempt. Default=3
+        retry_delay (int): The delay between retries in seconds. Default=1
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        failures (FailureLedger): Record the videos of a failed batch here. Default=None
+
+    Returns:
+        list: One snapshot row per video returned by the API.
+    """
+    url = 'https://www.googleapis.com/youtube/v3/videos'
+    __params__ = copy.deepcopy(params)
+    __params__['id'] = ','.join(video_ids)
+    __params__['part'] = 'statistics'
+    __params__['fields'] = 'items(id,statistics)'
+
+    try:
+        data, __ = await _fetch_with_retries(url, __params__, retry_limit, retry_delay, session, verbose)
+    except Exception as e:
+        print(f"Error fetching statistics for {len(video_ids)} videos: {e}")
+        if failures is not None:
+            for i in video_ids:
+                failures.record('snapshot', i, None, e)
+        return []
+
+    rows = []
+    for item in (data or {}).get('items', []):
+        row = {'videoId': item['id'], 'collectedAt': collected_at}
+        # Missing statistics (e.g. hidden likes, comments disabled) are recorded as 0
+        for k in _statistics:
+            row[k] = int(item.get('statistics', {}).get(k, 0))
+        rows.append(row)
+    return rows
+
+async def snapshot(video_id, params, async_delay=0, retry_limit=3, retry_delay=1, session=None, verbose=False, failures=None):
+    """
+    Take a statistics snapshot for a set of videos, batching 50 IDs per request (1 quota unit each).
+    Args:
+        video_id (str/list): A single video ID or list of video IDs to snapshot.
+        params (dict): Parameters such as key.
+        async_delay(float/int): Delay in seconds between starting each batch.
+        retry_limit (int): The number of retries to attempt. Default=3
+        retry_delay (int): The delay between retries in seconds. Default=1
+        session (aiohttp.ClientSession): The session used to make HTTP requests.
+        verbose (bool): Print verbose output. Default=False
+        failures (FailureLedger): Record videos that could not be fetched here. Default=None
+
+    Returns:
+        list: Snapshot rows (videoId, collectedAt, viewCount, likeCount, favoriteCount, commentCount).
+    """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await snapshot(video_id, params, async_delay, retry_limit, retry_delay, session, verbose, failures)
+
+    if isinstance(video_id, str):
+        video_id = [video_id]
+    video_id = list(dict.fromkeys(video_id))
+
+    # Same timestamp for the whole snapshot so rows can be grouped by collection
+    collected_at = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    tasks = []
+    for batch in _chunk(video_id, 50):
+        tasks.append(_fetch_statistics(batch, params, collected_at, retry_limit, retry_delay, session, verbose, failures))
+        await asyncio.sleep(async_delay)
+    results = await asyncio.gather(*tasks)
+    return sum(results, [])
+
+def _append_snapshot(rows, file_path=None, deltas=False):
+    """
+    Append snapshot rows to the time-series store `snapshots.csv` in file_path.
+    The latest values per video are kept in `snapshots.latest.json` so that delta
+    mode does not need to re-read the whole time series.
+
+    Args:
+        rows (list): Snapshot rows returned by snapshot().
+        file_path (str): The directory containing the store. Default=os.getcwd()
+        deltas (bool): Only append rows whose statistics changed since the last snapshot. Default=False
+
+    Returns:
+        list: The rows that were appended.
+    """
+    if file_path is None:
+        file_path = os.getcwd()
+    store = os.path.join(file_path, 'snapshots.csv')
+    state = os.path.join(file_path, 'snapshots.latest.json')
+
+    latest = {}
+    if os.path.exists(state):
+        with open(state, 'rb') as f:
+            latest = loads(f.read())
+
+    if deltas:
+        rows = [i for i in rows if latest.get(i['videoId']) != [i[k] for k in _statistics]]
+
+    write_header = not os.path.exists(store) or os.path.getsize(store) == 0
+    with open(store, 'a', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=_snapshot_columns)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
+
+    for i in rows:
+        latest[i['videoId']] = [i[k] for k in _statistics]
+    dump(latest, state)
+
+    return rows
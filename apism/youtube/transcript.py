@@ -1,11 +1,15 @@
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, TooManyRequests
-from youtube_transcript_api.formatters import TextFormatter, SRTFormatter
-from xml.etree.ElementTree import ParseError
 import asyncio
 import re
 import time
 
-def _transcript(video_id, code_language='en', cookies=None, retry_limit=3, retry_delay=1, verbose=False):
+def _record_failure(failures, video_id, error, attempts, code_language, cookies):
+    """
+    Record a transcript that could not be fetched, with what is needed to replay it.
+    """
+    if failures is not None:
+        failures.record('transcripts', video_id, None, error, attempts=attempts, code_language=code_language, cookies=cookies)
+
+def _transcript(video_id, code_language='en', cookies=None, retry_limit=3, retry_delay=1, verbose=False, on_throttle=None, failures=None):
     """
     Fetch transcript for a single video ID.
     Args:
@@ -15,34 +19,47 @@ def _transcript(video_id, code_language='en', cookies=None, retry_limit=3, retry
         retry_limit (int): The number of retries to attempt.
         retry_delay (int): The delay between retries in seconds.
         verbose (bool): Print verbose output. Default=False
+        on_throttle (callable): Called when the request is rate limited. Default=None
+        failures (FailureLedger): Record the video here if fetching fails. Default=None
     Returns:
         dict: A dictionary mapping video ID to its transcript.
     """
-    attempt = 0
+    # Deferred so that importing apism does not load youtube_transcript_api
+    from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, TooManyRequests
+    from xml.etree.ElementTree import ParseError
 
-    try:
-        # Attempt to fetch the transcript for the given video
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id, cookies=cookies)
-    
-    except TranscriptsDisabled or ParseError:
-        # Handle the case where transcripts are disabled for the video
-        if verbose:
-            print(f"Transcripts are disabled for video {video_id}")
-        return None
+    attempt = 1
+    transcript_list = None
 
-    except TooManyRequests:
-        # Handle rate limit error
-        while attempt < retry_limit:
-            attempt += 1
+    while transcript_list is None:
+        try:
+            # Attempt to fetch the transcript for the given video
+            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id, cookies=cookies)
+
+        except (TranscriptsDisabled, ParseError):
+            # Handle the case where transcripts are disabled for the video
+            if verbose:
+                print(f"Transcripts are disabled for video {video_id}")
+            return None
+
+        except TooManyRequests as e:
+            # Handle rate limit error
+            if on_throttle:
+                on_throttle()
+            if attempt > retry_limit:
+                print(f"Rate limited fetching the transcript of video {video_id} after {attempt} attempts")
+                _record_failure(failures, video_id, e, attempt, code_language, cookies)
+                return None
             if verbose:
                 print(f"Attempt {attempt} failed for video {video_id}. Retrying in {retry_delay} seconds...")
+            attempt += 1
             time.sleep(retry_delay)
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id, cookies=cookies)
 
-    except Exception as e:
-        # Catch any other exceptions that may occur
-        print(f"An error occurred: {e}")
-        return None
+        except Exception as e:
+            # Catch any other exceptions that may occur
+            print(f"An error occurred: {e}")
+            _record_failure(failures, video_id, e, attempt, code_language, cookies)
+            return None
 
     # Identify the languages and types of the transcripts
     l_language = [
@@ -93,11 +110,13 @@ def _transcript(video_id, code_language='en', cookies=None, retry_limit=3, retry
                     }
             else:
                 return None
-    except:
+    except Exception as e:
+        print(f"Error fetching the transcript of video {video_id}: {e}")
+        _record_failure(failures, video_id, e, attempt, code_language, cookies)
         return None
 
 # Asynchronous function to call the blocking function
-async def transcript(video_id, code_language='en', cookies=None, retry_limit=3, retry_delay=1, batch_size=5, batch_delay=1, verbose=False):
+async def transcript(video_id, code_language='en', cookies=None, retry_limit=3, retry_delay=1, batch_size=5, batch_delay=1, verbose=False, limiter=None, failures=None):
     """
     Fetch transcript for multiple video IDs concurrently.
     Args:
@@ -109,12 +128,18 @@ async def transcript(video_id, code_language='en', cookies=None, retry_limit=3,
         batch_size (int): The number of concurrent tasks to run. Default=5
         batch_delay (int): The delay between batches in seconds. Default=1
         verbose (bool): Print verbose output. Default=False
+        limiter (AdaptiveLimiter): Adapt the number of concurrent requests instead of fixed batches. Default=None
+        failures (FailureLedger): Record videos that could not be fetched here. Default=None
     Returns:
         dict: A dictionary mapping video IDs to their respective transcripts.
     """
+    from youtube_transcript_api.formatters import TextFormatter
+    formatter = TextFormatter()
+
     if isinstance(video_id, str):
-        result = _transcript(video_id, code_language, cookies)
-        result['transcript'] = formatter.format_transcript(result['transcript'])
+        result = _transcript(video_id, code_language, cookies, retry_limit, retry_delay, verbose, None, failures)
+        if result:
+            result['transcript'] = formatter.format_transcript(result['transcript'])
         return result
     
     else:
@@ -122,27 +147,34 @@ async def transcript(video_id, code_language='en', cookies=None, retry_limit=3,
 
         async def fetch_transcript_with_limit(value):
             async with semaphore:
-                return await asyncio.to_thread(_transcript, value, code_language, cookies, retry_limit, retry_delay, verbose)
+                return await asyncio.to_thread(_transcript, value, code_language, cookies, retry_limit, retry_delay, verbose, None, failures)
         
+        async def fetch_transcript_adaptive(value):
+            async with limiter.endpoint('transcripts').slot() as slot:
+                return await asyncio.to_thread(_transcript, value, code_language, cookies, retry_limit, retry_delay, verbose, slot.throttled, failures)
+
         tasks = []
         results = []
 
-        for index, value in enumerate(video_id):
-            tasks.append(fetch_transcript_with_limit(value))
+        if limiter is not None:
+            # Concurrency follows the limiter
+            results = await asyncio.gather(*[fetch_transcript_adaptive(i) for i in video_id])
+        else:
+            for index, value in enumerate(video_id):
+                tasks.append(fetch_transcript_with_limit(value))
             
-            # If we've reached the batch size or the end of the list, wait for the current batch to finish
-            if (index + 1) % batch_size == 0 or (index + 1) == len(video_id):
-                batch_results = await asyncio.gather(*tasks)
-                results.extend(batch_results)
-                tasks.clear()  # Clear the task list for the next batch
+                # If we've reached the batch size or the end of the list, wait for the current batch to finish
+                if (index + 1) % batch_size == 0 or (index + 1) == len(video_id):
+                    batch_results = await asyncio.gather(*tasks)
+                    results.extend(batch_results)
+                    tasks.clear()  # Clear the task list for the next batch
 
-                # Introduce delay after processing each batch, except after the final batch
-                if (index + 1) < len(video_id):
-                    await asyncio.sleep(batch_delay)
+                    # Introduce delay after processing each batch, except after the final batch
+                    if (index + 1) < len(video_id):
+                        await asyncio.sleep(batch_delay)
 
         # Clean up transcripts
         final_results = []
-        formatter = TextFormatter()
         for i in results:
             if i:
                 try:
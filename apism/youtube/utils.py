@@ -1,9 +1,11 @@
-import aiohttp
-import asyncio
+from .records import _Record
+from ..engine import fetch, YouTube
 import copy
 import csv
 import re
 
+_youtube = YouTube()
+
 class YouTubeAPIException(Exception):
     """Custom exception for YouTube API errors"""
     def __init__(self, status_code, message):
@@ -11,7 +13,7 @@ class YouTubeAPIException(Exception):
         self.message = message
         super().__init__(f"API Error {status_code}: {message}")
 
-async def _fetch_with_retries(url, params, retry_limit=3, retry_delay=1, session=aiohttp.ClientSession(), verbose=False):
+async def _fetch_with_retries(url, params, retry_limit=3, retry_delay=1, session=None, verbose=False):
     """
     Fetch data from a URL with retries and handle errors related to disabled comments.
     
@@ -27,44 +29,52 @@ async def _fetch_with_retries(url, params, retry_limit=3, retry_delay=1, session
         tuple: A tuple containing the response data and the nextPageToken if available.
     
     Raises:
-        Exception: If retries are exhausted and the request still fails.
-    """
-    __params__ = copy.deepcopy(params)
-    attempt = 0
-
-    while attempt < retry_limit:
-        try:
-            async with session.get(url, params=__params__) as response:
-                # Handle quota exceeded case
-                if response.status == 403 and response.reason == 'Quota exceeded':
-                    print(f"API quota exceeded")
-                    return None, None
-
-                response_data = await response.json()
-                
-                # Handle comments disabled case
-                if response.status == 403 and 'disabled comments' in response_data['error'].get('message'):
-                    if verbose:
-                        print(f"Comments are disabled for video ID: {__params__['videoId']}")
-                    return None, None
-                
-                # Handle API limit errors and other issues
-                if response.status == 200:
-                    next_page_token = response_data.get('nextPageToken')
-                    return response_data, next_page_token
-                else:
-                    if verbose:
-                        print(f"Received error response: {response_data}")
-                    response.raise_for_status()
-        
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            attempt += 1
-            if verbose:
-                print(f"Attempt {attempt} failed: {e}. Retrying in {retry_delay} seconds...")
-            await asyncio.sleep(retry_delay)
-    
-    # If all retries fail, raise an exception
-    raise Exception(f"Failed to fetch data from {url} after {attempt} attempts.")
+        FetchError: If retries are exhausted and the request still fails, or the quota is exceeded.
+    """
+    return await fetch(_youtube, url, params, retry_limit, retry_delay, session, verbose)
+
+def _chunk(items, size):
+    """
+    Split a list into consecutive chunks of at most `size` items.
+
+    Args:
+        items (list): The list to split.
+        size (int): The maximum number of items per chunk.
+
+    Returns:
+        list: A list of lists.
+    """
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _fields_mask(columns, top_level=('nextPageToken',)):
+    """
+    Build a partial-response `fields` mask from flattened column names.
+    e.g. ['id.videoId', 'snippet.title'] -> 'nextPageToken,items(id(videoId),snippet(title))'
+
+    Args:
+        columns (list): Flattened column names (as in _default_columns['default']).
+        top_level (tuple): Top-level response fields to keep besides items.
+
+    Returns:
+        str: The fields mask.
+    """
+    # Build a tree of keys; shorter columns first so that a column which is a
+    # prefix of another keeps the whole object
+    tree = {}
+    for col in sorted(set(columns), key=lambda x: (x.count('.'), x)):
+        node = tree
+        *parents, leaf = col.split('.')
+        for key in parents:
+            if key in node and node[key] is None:
+                break
+            node = node.setdefault(key, {})
+        else:
+            node[leaf] = None
+
+    def _render(node):
+        return ','.join(k if v is None else f"{k}({_render(v)})" for k, v in node.items())
+
+    return ','.join(list(top_level) + [f"items({_render(tree)})"])
 
 def _flatten_json(nested_json, parent_key='', sep='.'):
     """
@@ -78,6 +88,8 @@ def _flatten_json(nested_json, parent_key='', sep='.'):
     Returns:
         dict: The flattened JSON dictionary.
     """
+    if isinstance(nested_json, _Record):
+        return nested_json.to_flat()
     if nested_json is None or len(nested_json) == 0:
         return None
     else:
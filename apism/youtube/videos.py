@@ -1,9 +1,10 @@
-from .utils import _fetch_with_retries
+from .utils import _fetch_with_retries, _youtube
+from ..engine import Pages
 import asyncio
 import aiohttp
 import copy
 
-async def _fetch_video(video_id, params, retry_limit=3, retry_delay=1, session=aiohttp.ClientSession(), verbose=False):
+async def _fetch_video(video_id, params, retry_limit=3, retry_delay=1, session=None, verbose=False, record=None, failures=None):
     """
     Fetch the data for a video.
     Args:
@@ -13,43 +14,45 @@ async def _fetch_video(video_id, params, retry_limit=3, retry_delay=1, session=a
         retry_delay (int): The delay between retries in seconds. Default=1
         session (aiohttp.ClientSession): The session used to make HTTP requests.
         verbose (bool): Print verbose output. Default=False
+        record (callable): Convert the item, e.g. VideoRecord.from_item. Default=None
+        failures (FailureLedger): Record the video here if fetching fails. Default=None
 
     Returns:
-        list: All comments for the given video.
+        dict: The video, or None if it could not be fetched.
     """
     url = 'https://www.googleapis.com/youtube/v3/videos'
     __params__ = copy.deepcopy(params)
     __params__['id'] = video_id  # Ensure id is included in the parameters
 
-    video_data = []
-    next_page_token = None
+    # Do not spend requests once the quota is exhausted
+    if failures is not None and failures.stopped:
+        failures.skip('videos', video_id)
+        return None
 
-    while True:
-        if next_page_token:
-            __params__['pageToken'] = next_page_token
+    video_data = []
+    pages = Pages(lambda p: _fetch_with_retries(url, p, retry_limit, retry_delay, session, verbose), __params__, _youtube)
 
-        try:
-            data, next_page_token = await _fetch_with_retries(url, __params__, retry_limit, retry_delay, session, verbose)
+    try:
+        async for data in pages:
+            video_data.extend(data.get('items', []))
 
-            if data and 'items' in data:
-                video_data.extend(data['items'])
-        
-            # If statistics missing, set to 0 (including comments disabled) and convert string to int
-            for k in ['viewCount', 'likeCount', 'favoriteCount', 'commentCount']:
-                if k not in video_data[0]['statistics'].keys():
-                    video_data[0]['statistics'][k] = 0
-                video_data[0]['statistics'][k] = int(video_data[0]['statistics'][k])
+    except Exception as e:
+        print(f"Error fetching data for video {video_id}: {e}")
+        if failures is not None:
+            failures.record('videos', video_id, pages.page_token, e)
 
-            if not next_page_token:
-                break
+    # Deleted, private or failed videos
+    if not video_data:
+        return None
 
-        except Exception as e:
-            print(f"Error fetching data for video {video_id}: {e}")
-            break
+    # If statistics missing, set to 0 (including comments disabled, or a part/fields without statistics) and convert string to int
+    statistics = video_data[0].setdefault('statistics', {})
+    for k in ['viewCount', 'likeCount', 'favoriteCount', 'commentCount']:
+        statistics[k] = int(statistics.get(k, 0))
 
-    return video_data[0]
+    return record(video_data[0]) if record else video_data[0]
 
-async def videos(video_id, params, async_delay=0, retry_limit=3, retry_delay=1, sequential=False, session=aiohttp.ClientSession(), verbose=False):
+async def videos(video_id, params, async_delay=0, retry_limit=3, retry_delay=1, sequential=False, session=None, verbose=False, record=None, failures=None):
     """
     Fetch comment threads for multiple video IDs concurrently, but staggered using asyncio.gather.
     Each video fetches data independently, handling its own pagination with separate nextPageTokens.
@@ -63,38 +66,44 @@ async def videos(video_id, params, async_delay=0, retry_limit=3, retry_delay=1,
         squential (bool): Concurrent (False) or sequential (True) API calls. Default=False
         session (aiohttp.ClientSession): The session used to make HTTP requests.
         verbose (bool): Print verbose output. Default=False
+        record (callable): Convert each item, e.g. VideoRecord.from_item. Default=None
+        failures (FailureLedger): Record videos that could not be fetched here. Default=None
 
     Returns:
         dict: A dictionary mapping video IDs to their respective data.
     """
+    # Share one session across all requests
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await videos(video_id, params, async_delay, retry_limit, retry_delay, sequential, session, verbose, record, failures)
+
     __params__ = copy.deepcopy(params)
 
     if type(video_id) == str:
-        return await _fetch_video(video_id, __params__, retry_limit, retry_delay, session, verbose)
+        return await _fetch_video(video_id, __params__, retry_limit, retry_delay, session, verbose, record, failures)
     
     elif type(video_id) == list:
         if sequential:
             return {
-                i: await _fetch_video(i, __params__, retry_limit, retry_delay, session, verbose) 
+                i: await _fetch_video(i, __params__, retry_limit, retry_delay, session, verbose, record, failures) 
                     for i in video_id
                 }
         else:
-            async with aiohttp.ClientSession() as session:
-                tasks = []
+            tasks = []
                 
-                for __, id in enumerate(video_id):
-                    # Create a separate task for each video with independent pagination
-                    tasks.append(_fetch_video(id, __params__, retry_limit, retry_delay, session, verbose))
+            for __, id in enumerate(video_id):
+                # Start a separate task for each video with independent pagination
+                tasks.append(asyncio.create_task(_fetch_video(id, __params__, retry_limit, retry_delay, session, verbose, record, failures)))
                     
-                    # Introduce a delay before starting the next task
-                    await asyncio.sleep(async_delay)
+                # Introduce a delay before starting the next task
+                await asyncio.sleep(async_delay)
                 
-                # Gather the results of all tasks concurrently
-                results = await asyncio.gather(*tasks)
-                return results
+            # Gather the results of all tasks concurrently
+            results = await asyncio.gather(*tasks)
+            return results
                 
-                # Return a dictionary mapping video IDs to their data
-                # return {id: result for id, result in zip(video_id, results)}
+            # Return a dictionary mapping video IDs to their data
+            # return {id: result for id, result in zip(video_id, results)}
 
     else:
         print(f"Error fetching data for video {video_id}")
@@ -0,0 +1,308 @@
+from .utils import _chunk
+from ..failures import FailureLedger
+import aiohttp
+import asyncio
+from copy import deepcopy
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import time
+import uuid
+
+_stages = ['search', 'videos', 'commentThreads', 'transcripts']
+
+class WorkQueue:
+    """
+    A durable SQLite work queue of collection shards with leases.
+    A coordinator puts shards on the queue; workers (processes or hosts sharing the
+    filesystem) claim a shard, hold a lease on it while working, and mark it done.
+    Shards whose lease expires (e.g. a crashed worker) are handed out again.
+    Args:
+        path (str): Path to the SQLite database file.
+        lease_seconds (int/float): How long a claimed shard is reserved for a worker. Default=300
+        max_attempts (int): Number of claims before a shard is marked as failed. Default=3
+    """
+    def __init__(self, path, lease_seconds=300, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS shards (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    stage TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    worker TEXT,
+                    lease_until REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    output TEXT,
+                    error TEXT,
+                    UNIQUE(stage, payload)
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.execute('PRAGMA busy_timeout = 60000')
+        return _Transaction(conn)
+
+    def put(self, stage, items, shard_size=50):
+        """
+        Put work on the queue. Identical shards already on the queue are ignored.
+        Args:
+            stage (str): One of 'search', 'videos', 'commentThreads' or 'transcripts'.
+            items (list): Video IDs, or for 'search' a list of dicts with a 'query' and optional
+                search parameters (e.g. 'publishedAfter', 'publishedBefore') describing a query window.
+            shard_size (int): Number of video IDs per shard. Default=50
+        Returns:
+            int: The number of new shards.
+        """
+        assert stage in _stages, f"stage must be one of {_stages}"
+
+        if stage == 'search':
+            payloads = [json.dumps(i, sort_keys=True) for i in items]
+        else:
+            payloads = [json.dumps(i) for i in _chunk(sorted(set(items)), shard_size)]
+
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO shards (stage, payload) VALUES (?, ?)",
+                [(stage, i) for i in payloads]
+            )
+            return conn.total_changes - before
+
+    def claim(self, worker, stage=None):
+        """
+        Claim the next pending shard, or a shard whose lease has expired.
+        Args:
+            worker (str): The worker ID.
+            stage (str): Only claim shards of this stage. Default=None (any stage)
+        Returns:
+            tuple: (shard_id, stage, payload) or None if no work is available.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Shards that exhausted their attempts are failed rather than re-leased
+            conn.execute(
+                "UPDATE shards SET status = 'failed', worker = NULL "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+            query = ("SELECT id, stage, payload FROM shards "
+                     "WHERE (status = 'pending' OR (status = 'leased' AND lease_until < ?))")
+            args = [now]
+            if stage:
+                query += " AND stage = ?"
+                args.append(stage)
+            row = conn.execute(query + " ORDER BY id LIMIT 1", args).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE shards SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker, now + self.lease_seconds, row[0])
+            )
+            return row[0], row[1], json.loads(row[2])
+
+    def renew(self, shard_id, worker):
+        """
+        Extend the lease on a shard held by worker.
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE shards SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, shard_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, shard_id, worker, output=None):
+        """
+        Mark a shard as done.
+        Returns:
+            bool: False if the worker no longer holds the lease (the shard was handed to another worker).
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE shards SET status = 'done', output = ?, lease_until = NULL WHERE id = ? AND worker = ? AND status = 'leased'",
+                (output, shard_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, shard_id, worker, error=None):
+        """
+        Release a shard after an error. It is retried until max_attempts is reached.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, lease_until = NULL, error = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (self.max_attempts, error, shard_id, worker)
+            )
+
+    def status(self):
+        """
+        Count shards by status.
+        Returns:
+            dict: A dictionary mapping status to the number of shards.
+        """
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+
+class _Transaction:
+    """Context manager committing (or rolling back) and closing a SQLite connection."""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.conn.in_transaction:
+            self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        self.conn.close()
+
+async def _run_shard(api, stage, payload, session):
+    """
+    Run a single shard with the YouTubeAPI method for its stage.
+    """
+    api.results = {}
+    api.failures = FailureLedger()
+    if stage == 'search':
+        payload = dict(payload)
+        query = payload.pop('query')
+        # The query window only applies to this shard
+        params = api.params['search']
+        api.params['search'] = {**deepcopy(params), **payload}
+        try:
+            await api.search(query, session=session)
+        finally:
+            api.params['search'] = params
+    elif stage == 'videos':
+        await api.videos(payload, session=session)
+    elif stage == 'commentThreads':
+        await api.comment_threads(payload, session=session)
+    elif stage == 'transcripts':
+        await api.transcript(payload)
+
+    # A shard with failed requests is incomplete: release it to be retried
+    if len(api.failures):
+        raise RuntimeError(f"{len(api.failures)} failed requests")
+
+async def _renew_lease(queue, shard_id, worker, work):
+    """
+    Keep renewing the lease on a shard while it is being processed. Once the lease is lost (it
+    expired and the shard was handed to another worker), cancel the task working on the shard.
+    """
+    while True:
+        await asyncio.sleep(queue.lease_seconds / 3)
+        if not await asyncio.to_thread(queue.renew, shard_id, worker):
+            work.cancel()
+            return
+
+async def run_worker(api, queue, file_path=None, worker_id=None, stage=None, output='json'):
+    """
+    Claim and complete shards from a WorkQueue until it is empty.
+    Each shard is written to its own directory `<file_path>/<stage>/shard-<id>`, which is
+    only moved into place once the shard is complete.
+    Args:
+        api (YouTubeAPI): The API object used to fetch data.
+        queue (WorkQueue): The work queue.
+        file_path (str): The path where the shard outputs will be saved. Default=os.getcwd()
+        worker_id (str): The worker ID. Default=<hostname>-<pid>-<random>
+        stage (str): Only process shards of this stage. Default=None (any stage)
+        output (str): Output format, 'json' or 'csv'. Default='json'
+    Returns:
+        int: The number of shards completed by this worker.
+    """
+    if file_path is None:
+        file_path = os.getcwd()
+    if worker_id is None:
+        worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    completed = 0
+    async with aiohttp.ClientSession() as session:
+        while True:
+            shard = await asyncio.to_thread(queue.claim, worker_id, stage)
+            if shard is None:
+                break
+            shard_id, shard_stage, payload = shard
+            if api.verbose:
+                print(f"Worker {worker_id} claimed {shard_stage} shard {shard_id}")
+
+            out_dir = os.path.join(file_path, shard_stage, f"shard-{shard_id:06d}")
+            tmp_dir = f"{out_dir}.{worker_id}.tmp"
+            work = asyncio.create_task(_run_shard(api, shard_stage, payload, session))
+            renew = asyncio.create_task(_renew_lease(queue, shard_id, worker_id, work))
+            try:
+                await work
+                os.makedirs(tmp_dir, exist_ok=True)
+                if output == 'csv':
+                    api.to_csv(tmp_dir)
+                else:
+                    api.to_json(tmp_dir)
+            except asyncio.CancelledError:
+                # The worker itself was cancelled
+                if not renew.done():
+                    raise
+                # The lease was lost: the shard belongs to another worker now
+                print(f"Worker {worker_id} lost the lease on {shard_stage} shard {shard_id}")
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                continue
+            except Exception as e:
+                print(f"Error processing {shard_stage} shard {shard_id}: {e}")
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                await asyncio.to_thread(queue.fail, shard_id, worker_id, repr(e))
+                continue
+            finally:
+                renew.cancel()
+
+            # Publish output only if this worker still holds the lease
+            if await asyncio.to_thread(queue.complete, shard_id, worker_id, out_dir):
+                shutil.rmtree(out_dir, ignore_errors=True)
+                os.replace(tmp_dir, out_dir)
+                completed += 1
+            else:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return completed
+
+def _worker_process(api_key, params, queue_path, file_path, stage, output, queue_kwargs, api_kwargs):
+    from .YouTubeAPI import YouTubeAPI
+    api = YouTubeAPI(api_key, params, **api_kwargs)
+    queue = WorkQueue(queue_path, **queue_kwargs)
+    return asyncio.run(run_worker(api, queue, file_path, stage=stage, output=output))
+
+def run_workers(api_key, queue_path, file_path=None, processes=None, params=None, stage=None, output='json', queue_kwargs=None, **kwargs):
+    """
+    Start several worker processes draining a WorkQueue in parallel. Run this on each host
+    sharing the queue file to scale across machines.
+    Args:
+        api_key (str): The API key to access the YouTube Data API.
+        queue_path (str): Path to the SQLite work queue.
+        file_path (str): The path where the shard outputs will be saved. Default=os.getcwd()
+        processes (int): Number of worker processes. Default=os.cpu_count()
+        params (dict): Parameters for YouTubeAPI. Default=_default_params
+        stage (str): Only process shards of this stage. Default=None (any stage)
+        output (str): Output format, 'json' or 'csv'. Default='json'
+        queue_kwargs (dict): Keyword arguments for WorkQueue (lease_seconds, max_attempts).
+        **kwargs: Keyword arguments for YouTubeAPI (retry_limit, async_delay, ...).
+    Returns:
+        int: The number of shards completed.
+    """
+    from .defaults import _default_params
+    if params is None:
+        params = _default_params
+    if processes is None:
+        processes = os.cpu_count()
+
+    args = (api_key, params, queue_path, file_path, stage, output, queue_kwargs or {}, kwargs)
+    with multiprocessing.get_context('spawn').Pool(processes) as pool:
+        return sum(pool.starmap(_worker_process, [args] * processes))
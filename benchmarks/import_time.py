@@ -0,0 +1,56 @@
+"""
+Import-time benchmark for `import apism`.
+
+Runs `import apism` in fresh interpreters and fails (exit code 1) if the median
+import time exceeds the budget or if heavy dependencies are loaded eagerly.
+
+Usage:
+    python benchmarks/import_time.py [--runs 10] [--budget-ms 50]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Modules that must only be imported when the corresponding API is used
+_heavy_modules = ['aiohttp', 'youtube_transcript_api', 'xml.etree.ElementTree', 'sqlite3', 'multiprocessing']
+
+_probe = """
+import sys, time
+start = time.perf_counter()
+import apism
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    timings = []
+    loaded = ''
+    for __ in range(args.runs):
+        out = subprocess.run(
+            [sys.executable, '-c', _probe.format(heavy=_heavy_modules)],
+            capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+        timings.append(float(out[0]) * 1000)
+        loaded = out[1] if len(out) > 1 else ''
+
+    median = statistics.median(timings)
+    print(f"import apism: median {median:.2f} ms, min {min(timings):.2f} ms over {args.runs} runs")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: heavy modules imported eagerly: {loaded}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: median import time exceeds budget of {args.budget_ms} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
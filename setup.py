@@ -14,5 +14,13 @@ setup(
     license='internal_use',
     packages=find_packages(),
     install_requires=requirements,
+    entry_points={
+        'console_scripts': ['apism=apism.cli:main'],
+    },
+    extras_require={
+        'orjson': ['orjson'],
+        'msgspec': ['msgspec'],
+        'zstd': ['zstandard'],
+    },
     zip_safe=False
 )
\ No newline at end of file
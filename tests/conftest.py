@@ -0,0 +1,26 @@
+import gzip
+import json
+import pytest
+from apism.transport import Cassette
+
+@pytest.fixture
+def cassette(tmp_path):
+    """
+    Build a replay cassette from (url, params, body[, status]) interactions. Identical requests
+    are answered in the order given. The (url, params) of every request served are kept in its
+    `requests` list.
+    """
+    def make(*interactions):
+        path = tmp_path / 'cassette.jsonl.gz'
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for url, params, body, *status in interactions:
+                f.write(json.dumps({'url': url, 'params': params, 'status': status[0] if status else 200, 'headers': {}, 'body': json.dumps(body), 'latency': 0}) + '\n')
+        replay = Cassette(str(path))
+        replay.requests = []
+        get = replay.get
+        def logged(session, url, params=None, headers=None):
+            replay.requests.append((url, params))
+            return get(session, url, params, headers)
+        replay.get = logged
+        return replay
+    return make
@@ -0,0 +1,74 @@
+import asyncio
+import gzip
+import json
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from apism import YouTubeAPI
+from apism.engine import YouTube, fetch
+from apism.transport import Cassette, CassetteError, _use_transport
+
+async def _mock_videos(requests):
+    """
+    A videos endpoint that fails the first request with a 500 and answers the rest, setting a cookie.
+    """
+    async def videos(request):
+        requests.append(dict(request.query))
+        if len(requests) == 1:
+            return web.json_response({'error': {'code': 500, 'errors': [{'reason': 'backendError'}]}}, status=500)
+        response = web.json_response({'items': [{'id': request.query['id']}], 'nextPageToken': 'p2'})
+        response.set_cookie('session', 'secret')
+        return response
+
+    app = web.Application()
+    app.router.add_get('/youtube/v3/videos', videos)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+async def _fetch(cassette, url):
+    with _use_transport(cassette):
+        return await fetch(YouTube(), url, {'key': 'secret-key', 'id': 'v1', 'maxResults': 50}, retry_delay=0)
+
+def test_recorded_interactions_replay_without_the_network(tmp_path):
+    path = str(tmp_path / 'run.jsonl.gz')
+    requests = []
+
+    async def record():
+        server = await _mock_videos(requests)
+        try:
+            url = str(server.make_url('/youtube/v3/videos'))
+            return url, await _fetch(Cassette(path, mode='record'), url)
+        finally:
+            await server.close()
+
+    url, recorded = asyncio.run(record())
+    assert recorded == ({'items': [{'id': 'v1'}], 'nextPageToken': 'p2'}, 'p2')
+    assert len(requests) == 2
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        interactions = [json.loads(line) for line in f]
+    assert [i['status'] for i in interactions] == [500, 200]
+    assert all(i['params'] == {'id': 'v1', 'maxResults': 50} for i in interactions)
+    assert 'secret' not in json.dumps(interactions)
+
+    # The server is gone: the retry sequence is served from the cassette in the order it was recorded
+    replay = Cassette(path)
+    assert len(replay) == 2
+    assert asyncio.run(_fetch(replay, url)) == recorded
+    assert len(requests) == 2
+
+def test_unrecorded_requests_fail_and_are_recorded_as_failures(tmp_path):
+    path = tmp_path / 'run.jsonl.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps({'url': 'https://www.googleapis.com/youtube/v3/videos', 'params': {'id': 'v1'}, 'status': 200, 'headers': {}, 'body': '{}', 'latency': 0}) + '\n')
+
+    try:
+        asyncio.run(_fetch(Cassette(str(path)), 'https://www.googleapis.com/youtube/v3/videos'))
+    except CassetteError as e:
+        assert 'maxResults' in str(e)
+    else:
+        assert False, "An unrecorded request was served"
+
+    yt = YouTubeAPI('key', cassette=Cassette(str(path)))
+    asyncio.run(yt.videos('v2'))
+    assert [(i['endpoint'], i['id']) for i in yt.failures.entries] == [('videos', 'v2')]
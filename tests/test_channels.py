@@ -0,0 +1,54 @@
+import asyncio
+from apism import YouTubeAPI
+from apism.youtube.records import CommentThreadRecord
+
+_url = 'https://www.googleapis.com/youtube/v3/channels'
+
+def _request(ids):
+    return _url, {'part': 'snippet,statistics', 'id': ','.join(ids), 'maxResults': 50}, {'items': [{'id': i, 'statistics': {'subscriberCount': '1'}} for i in ids]}
+
+def _comment(channel_id):
+    return {'snippet': {'authorChannelId': {'value': channel_id}}}
+
+def test_channel_ids_are_collected_from_every_result():
+    yt = YouTubeAPI('key')
+    yt.results['search'] = [{'id': {'videoId': 'v1'}, 'snippet': {'channelId': 'UC1'}}]
+    yt.results['playlistItems'] = [{'snippet': {'channelId': 'UCplaylist', 'videoOwnerChannelId': 'UC2'}}]
+    yt.results['videos'] = [{'id': 'v1'}]
+    yt.results['commentThreads'] = [
+        [{'snippet': {'topLevelComment': _comment('UC3')}, 'replies': {'comments': [_comment('UC1'), {'snippet': {}}]}}],
+        [CommentThreadRecord('t2', 'v2', 'UC0', 'a', 'UC4', 'text', 0, None, None, 0)]
+    ]
+    assert yt._channel_ids() == ['UC1', 'UC2', 'UC3', 'UC4']
+
+def test_channels_are_batched_by_50(cassette):
+    ids = [f'UC{i:02d}' for i in range(51)]
+    replay = cassette(_request(ids[:50]), _request(ids[50:]))
+    yt = YouTubeAPI('key', cassette=replay)
+    asyncio.run(yt.channels(ids + ids[:3]))
+
+    assert [i['id'] for i in yt.results['channels']] == ids
+    assert sorted(i[1]['id'] for i in replay.requests) == sorted([','.join(ids[:50]), ids[50]])
+    assert not yt.failures
+
+def test_cached_channels_are_not_fetched_again(cassette, tmp_path):
+    cache_path = str(tmp_path / 'channels.json')
+    replay = cassette(_request(['UC1', 'UC2']), _request(['UC3']), _request(['UC1']))
+
+    yt = YouTubeAPI('key', cassette=replay)
+    asyncio.run(yt.channels(['UC1', 'UC2'], cache_path))
+    asyncio.run(yt.channels(['UC2', 'UC3'], cache_path))
+    # A new client reads the cache on disk; an expired entry is fetched again
+    other = YouTubeAPI('key', cassette=replay)
+    asyncio.run(other.channels(['UC3'], cache_path))
+    asyncio.run(other.channels(['UC1'], cache_path, ttl=0))
+
+    assert [i[1]['id'] for i in replay.requests] == ['UC1,UC2', 'UC3', 'UC1']
+    assert [i['id'] for i in yt.results['channels']] == ['UC2', 'UC3']
+
+def test_failed_batches_are_recorded(cassette):
+    yt = YouTubeAPI('key', cassette=cassette(_request(['UC1'])))
+    asyncio.run(yt.channels(['UC8', 'UC9']))
+
+    assert yt.results['channels'] == []
+    assert [(i['endpoint'], i['id']) for i in yt.failures.entries] == [('channels', 'UC8'), ('channels', 'UC9')]
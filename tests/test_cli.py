@@ -0,0 +1,38 @@
+import asyncio
+from apism import cli
+from apism.youtube.YouTubeAPI import YouTubeAPI
+
+def _threads(video_id, n):
+    return [{'id': f'{video_id}-{i}'} for i in range(n)]
+
+def test_quota_is_counted_for_every_comment_thread_shape():
+    params = {'commentThreads': {'maxResults': 2}}
+    concurrent = {'commentThreads': [_threads('v1', 3), _threads('v2', 1), []]}
+    sequential = {'commentThreads': {'v1': _threads('v1', 3), 'v2': _threads('v2', 1), 'v3': []}}
+    # Two pages for v1, one each for v2 and v3
+    assert cli._quota_used(concurrent, params) == 4
+    assert cli._quota_used(sequential, params) == 4
+    assert cli._quota_used({'commentThreads': _threads('v1', 5)}, params) == 3
+
+def test_quota_stops_the_next_stage(monkeypatch, tmp_path):
+    stages = []
+
+    async def search(self, query, session=None):
+        stages.append('search')
+        self.results['search'] = [{'id': {'videoId': 'v1'}}]
+
+    async def videos(self, video_id=None, session=None):
+        stages.append('videos')
+        self.results['videos'] = [{'id': 'v1'}]
+
+    monkeypatch.setattr(YouTubeAPI, 'search', search)
+    monkeypatch.setattr(YouTubeAPI, 'videos', videos)
+    monkeypatch.setattr(YouTubeAPI, 'to_json', lambda self, path, **kwargs: None)
+    spec = {'platform': 'youtube', 'key': 'key', 'queries': ['FTX', 'OpenAI'], 'stages': ['search', 'videos'], 'output': {'format': 'json', 'path': str(tmp_path)}}
+
+    # The first search spends the quota: its job stops before videos and the next job is skipped
+    summaries = asyncio.run(cli._run_jobs(spec, cli._jobs(spec), quota=100))
+    assert stages == ['search']
+    assert summaries[0]['status'] == 'stopped (quota) before videos'
+    assert summaries[0]['quota'] == 100
+    assert summaries[1]['status'] == 'skipped (quota)'
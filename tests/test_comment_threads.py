@@ -0,0 +1,47 @@
+import asyncio
+import apism.youtube.comment_threads as ct
+from apism import YouTubeAPI
+
+def _video(video_id, comment_count):
+    return {'id': video_id, 'statistics': {'commentCount': comment_count}}
+
+def _fake_fetch(started, in_flight, peak):
+    """
+    A commentThreads endpoint with one page per video, taking longer for videos with more comments.
+    """
+    async def fetch(url, params, *args):
+        started.append(params['videoId'])
+        in_flight.add(params['videoId'])
+        peak[0] = max(peak[0], len(in_flight))
+        await asyncio.sleep(0.01 * int(params['videoId'][1:]))
+        in_flight.discard(params['videoId'])
+        return {'items': [{'id': f"{params['videoId']}-thread"}]}, None
+    return fetch
+
+def _run(monkeypatch, order, max_concurrency):
+    started, in_flight, peak = [], set(), [0]
+    monkeypatch.setattr(ct, '_fetch_with_retries', _fake_fetch(started, in_flight, peak))
+
+    yt = YouTubeAPI('key', max_concurrency=max_concurrency)
+    yt.results['videos'] = [_video('v1', 10), _video('v5', 50), _video('v3', 30), _video('v4', 40), _video('v2', 20)]
+    asyncio.run(yt.comment_threads(order=order))
+    return yt, started, peak[0]
+
+def test_largest_videos_start_first(monkeypatch):
+    yt, started, peak = _run(monkeypatch, 'largest', 2)
+    assert started == ['v5', 'v4', 'v3', 'v2', 'v1']
+    assert peak == 2
+
+def test_smallest_videos_start_first(monkeypatch):
+    yt, started, peak = _run(monkeypatch, 'smallest', 2)
+    assert started == ['v1', 'v2', 'v3', 'v4', 'v5']
+
+def test_results_follow_the_order_of_the_videos(monkeypatch):
+    yt, started, peak = _run(monkeypatch, 'largest', 3)
+    assert [i[0]['id'] for i in yt.results['commentThreads']] == ['v5-thread', 'v4-thread', 'v3-thread', 'v2-thread', 'v1-thread']
+    assert peak == 3
+
+def test_unbounded_starts_every_video_in_order(monkeypatch):
+    yt, started, peak = _run(monkeypatch, 'largest', None)
+    assert started == ['v5', 'v4', 'v3', 'v2', 'v1']
+    assert peak == 5
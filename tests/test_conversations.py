@@ -0,0 +1,54 @@
+import asyncio
+from apism import xAPI
+from apism.x.conversations import _pack_queries, _reply_trees
+
+def _reply(id, conversation_id, parent_id):
+    return {'id': id, 'conversation_id': conversation_id, 'referenced_tweets': [{'type': 'quoted', 'id': '99'}, {'type': 'replied_to', 'id': parent_id}]}
+
+def _ids(node):
+    return [node['id'], [_ids(i) for i in node['replies']]]
+
+def test_conversation_ids_are_packed_into_short_queries():
+    assert _pack_queries(['1', '2', 3, '1']) == ['(conversation_id:1 OR conversation_id:2 OR conversation_id:3)']
+    assert _pack_queries(['1'], '-is:retweet') == ['conversation_id:1 -is:retweet']
+    queries = _pack_queries([str(i) for i in range(100)], '-is:retweet', max_length=128)
+    assert all(len(i) <= 128 for i in queries)
+    assert sum(i.count('conversation_id:') for i in queries) == 100
+
+def test_replies_are_assembled_into_ordered_trees():
+    tweets = [
+        {'id': '1', 'conversation_id': '1'},
+        _reply('5', '1', '2'),
+        _reply('3', '1', '1'),
+        _reply('2', '1', '1'),
+        # Its parent was not collected
+        _reply('4', '1', '404'),
+        _reply('11', '10', '10')
+    ]
+    trees = _reply_trees(tweets, ['1', '10'], roots={'10': {'id': '10'}})
+
+    assert _ids(trees['1']) == ['1', [['2', [['5', []]]], ['3', []], ['4', []]]]
+    assert _ids(trees['10']) == ['10', [['11', []]]]
+    tweet = {i['id']: i for i in tweets}
+    assert [tweet[i]['depth'] for i in ['1', '2', '5', '4']] == [0, 1, 2, 1]
+    assert tweet['5']['parent_id'] == '2'
+    assert trees['1']['replies'][2]['missing_parent'] is True
+    assert trees['10']['tweet'] == {'id': '10', 'depth': 0}
+
+def test_conversations_are_searched_and_missing_roots_looked_up(cassette):
+    fields = 'conversation_id,referenced_tweets,in_reply_to_user_id,author_id,created_at'
+    x = xAPI('token', {}, cassette=cassette(
+        ('https://api.twitter.com/2/tweets/search/recent', {'query': '(conversation_id:1 OR conversation_id:10)', 'tweet.fields': fields}, {
+            'data': [_reply('12', '10', '11'), _reply('11', '10', '10'), {'id': '1', 'conversation_id': '1'}],
+            'meta': {}
+        }),
+        ('https://api.twitter.com/2/tweets', {'ids': '10'}, {'data': [{'id': '10', 'conversation_id': '10'}]})
+    ))
+    trees = asyncio.run(x.conversations([1, '10', '1']))
+
+    assert list(trees) == ['1', '10']
+    assert _ids(trees['10']) == ['10', [['11', [['12', []]]]]]
+    assert trees['10']['tweet']['id'] == '10'
+    assert x.trees == trees
+    assert [i['depth'] for i in x.results['conversations']] == [2, 1, 0]
+    assert not x.failures
@@ -0,0 +1,56 @@
+import gzip
+import json
+import os
+import threading
+from apism.dataset import write_dataset
+
+def _videos(ids):
+    return {'videos': [{'id': i, 'statistics.viewCount': n} for n, i in enumerate(ids)]}
+
+def _read(path):
+    with gzip.open(path, 'rt') as f:
+        return [json.loads(i) for i in f]
+
+def test_rows_are_partitioned_and_split_into_parts(tmp_path):
+    ids = [f'v{i}' for i in range(20)]
+    manifest = write_dataset(_videos(ids), str(tmp_path), partition_by=['query', 'hash'], query='FTX collapse', buckets=2, max_rows=3)
+
+    files = manifest['files']
+    assert {tuple(i['partition']) for i in files} == {('query', 'bucket')}
+    assert {i['partition']['query'] for i in files} == {'FTX_collapse'}
+    assert {i['partition']['bucket'] for i in files} <= {'000', '001'}
+    # No part holds more than max_rows rows, and the parts hold every row once
+    assert all(0 < i['rows'] <= 3 for i in files)
+    rows = []
+    for i in files:
+        assert i['path'].startswith(os.path.join('videos', 'query=FTX_collapse', f"bucket={i['partition']['bucket']}"))
+        part = _read(tmp_path / i['path'])
+        assert len(part) == i['rows']
+        rows += part
+    assert sorted(i['id'] for i in rows) == sorted(ids)
+    assert manifest['schema'] == {'videos': ['id', 'statistics.viewCount']}
+
+def test_runs_add_to_the_manifest(tmp_path):
+    first = write_dataset(_videos(['v1', 'v2']), str(tmp_path), max_rows=1)
+    second = write_dataset({'videos': [{'id': 'v3', 'snippet.title': 'New'}]}, str(tmp_path), max_rows=1)
+
+    with open(tmp_path / 'manifest.json') as f:
+        manifest = json.load(f)
+    assert manifest == second
+    assert len(manifest['files']) == 3
+    assert len({i['run'] for i in manifest['files']}) == 2
+    assert manifest['files'][:2] == first['files']
+    assert manifest['schema'] == {'videos': ['id', 'statistics.viewCount', 'snippet.title']}
+    assert sorted(os.listdir(tmp_path)) == ['manifest.json', 'videos']
+
+def test_concurrent_runs_all_reach_the_manifest(tmp_path):
+    threads = [threading.Thread(target=write_dataset, args=(_videos([f'v{i}']), str(tmp_path))) for i in range(8)]
+    for i in threads:
+        i.start()
+    for i in threads:
+        i.join()
+
+    with open(tmp_path / 'manifest.json') as f:
+        manifest = json.load(f)
+    assert len(manifest['files']) == 8
+    assert sorted(_read(tmp_path / i['path'])[0]['id'] for i in manifest['files']) == [f'v{i}' for i in range(8)]
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from apism.engine import Pages, X, YouTube, fetch
+from apism.failures import FetchError, QuotaExceeded
+from apism.transport import _use_transport
+
+URL = 'https://www.googleapis.com/youtube/v3/commentThreads'
+
+def _fake_pages(pages, requested):
+    """
+    A paginated endpoint serving `pages` (token -> (data, next token)), keeping the params of each request.
+    """
+    async def fetch_page(params):
+        requested.append(dict(params))
+        return pages[params.get('pageToken')]
+    return fetch_page
+
+def test_pages_follow_next_page_tokens():
+    requested = []
+    params = {'videoId': 'v1'}
+    pages = Pages(_fake_pages({None: ({'items': [1]}, 'p2'), 'p2': ({'items': [2]}, 'p3'), 'p3': ({'items': [3]}, None)}, requested), params, YouTube())
+
+    async def run():
+        seen = []
+        async for data in pages:
+            seen.append((data['items'], pages.page_token, pages.next_token))
+        return seen
+
+    assert asyncio.run(run()) == [([1], None, 'p2'), ([2], 'p2', 'p3'), ([3], 'p3', None)]
+    assert [i.get('pageToken') for i in requested] == [None, 'p2', 'p3']
+    assert pages.pages == 3
+    # The params of the caller are left alone
+    assert params == {'videoId': 'v1'}
+
+def test_pages_stop_at_max_pages_and_take_param_changes():
+    requested = []
+
+    async def fetch_page(params):
+        requested.append(dict(params))
+        return {'data': [len(requested)]}, f"n{len(requested) + 1}"
+    pages = Pages(fetch_page, {'query': 'ftx'}, X(), max_pages=2)
+
+    async def run():
+        async for data in pages:
+            pages.params['max_results'] = 100
+        return pages.next_token
+
+    assert asyncio.run(run()) == 'n3'
+    assert requested == [{'query': 'ftx'}, {'query': 'ftx', 'max_results': 100, 'next_token': 'n2'}]
+
+def test_pages_skip_empty_pages_and_expose_the_failing_token():
+    async def fetch_page(params):
+        if params.get('pageToken') == 'p3':
+            raise FetchError(URL, 500, 3)
+        return (None, 'p3') if params.get('pageToken') else ({'items': [1]}, 'p2')
+
+    pages = Pages(fetch_page, {}, YouTube())
+    seen = []
+
+    async def run():
+        async for data in pages:
+            seen.append(data)
+
+    try:
+        asyncio.run(run())
+    except FetchError:
+        pass
+    assert seen == [{'items': [1]}]
+    assert pages.page_token == 'p3'
+
+def _fetch(cassette, params, retry_limit=3):
+    async def run():
+        with _use_transport(cassette):
+            return await fetch(YouTube(), URL, params, retry_limit=retry_limit, retry_delay=0)
+    return asyncio.run(run())
+
+def test_fetch_retries_server_errors(cassette):
+    replay = cassette(
+        (URL, {'videoId': 'v1'}, {'error': {'code': 503}}, 503),
+        (URL, {'videoId': 'v1'}, {'error': {'code': 500}}, 500),
+        (URL, {'videoId': 'v1'}, {'items': [{'id': 't1'}], 'nextPageToken': 'p2'})
+    )
+    assert _fetch(replay, {'videoId': 'v1'}) == ({'items': [{'id': 't1'}], 'nextPageToken': 'p2'}, 'p2')
+    assert len(replay.requests) == 3
+
+def test_fetch_gives_up_after_the_retry_limit(cassette):
+    replay = cassette((URL, {'videoId': 'v1'}, {'error': {'code': 500}}, 500))
+    try:
+        _fetch(replay, {'videoId': 'v1'}, retry_limit=2)
+    except FetchError as e:
+        assert (e.url, e.status, e.attempts) == (URL, 500, 2)
+    else:
+        assert False, "FetchError was not raised"
+    assert len(replay.requests) == 2
+
+def test_fetch_does_not_retry_exhausted_quota(cassette, capsys):
+    replay = cassette((URL, {'videoId': 'v1'}, {'error': {'code': 403, 'errors': [{'reason': 'quotaExceeded'}]}}, 403))
+    try:
+        _fetch(replay, {'videoId': 'v1'})
+    except QuotaExceeded as e:
+        assert (e.status, e.attempts) == (403, 1)
+    else:
+        assert False, "QuotaExceeded was not raised"
+    assert len(replay.requests) == 1
+    assert 'API quota exceeded' in capsys.readouterr().out
+
+def test_fetch_gives_up_quietly_on_disabled_comments(cassette):
+    replay = cassette((URL, {'videoId': 'v1'}, {'error': {'code': 403, 'message': 'The video identified by the <code><a href="/youtube/v3/docs/commentThreads/list#videoId">videoId</a></code> parameter has disabled comments.'}}, 403))
+    assert _fetch(replay, {'videoId': 'v1'}) == (None, None)
+    assert len(replay.requests) == 1
+
+class _Response:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+def test_x_waits_for_the_rate_limit_window_to_reset():
+    assert X().throttle_wait(_Response(200), 1) is None
+    assert X().throttle_wait(_Response(429), 7) == 7
+    assert 60 < X().throttle_wait(_Response(429, {'x-rate-limit-reset': str(time.time() + 60)}), 1) <= 61
+    assert YouTube().throttle_wait(_Response(429), 1) is None
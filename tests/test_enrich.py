@@ -0,0 +1,98 @@
+import asyncio
+import csv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import apism.youtube.comment_threads as ct
+from apism import YouTubeAPI
+from apism.enrich import Enricher
+
+def _thread(video_id, text):
+    return {
+        'kind': 'youtube#commentThread',
+        'id': f'{video_id}-thread',
+        'snippet': {
+            'videoId': video_id,
+            'topLevelComment': {'id': f'{video_id}-comment', 'snippet': {'textOriginal': text}}
+        }
+    }
+
+async def _fetch(url, params, *args):
+    return {'items': [_thread(params['videoId'], 'x' * int(params['videoId'][1:]))]}, None
+
+def _length(records):
+    return [{'length': len(i['snippet']['topLevelComment']['snippet']['textOriginal'])} for i in records]
+
+def test_enriched_fields_are_written_with_default_columns(monkeypatch, tmp_path):
+    monkeypatch.setattr(ct, '_fetch_with_retries', _fetch)
+
+    with ThreadPoolExecutor(2) as pool:
+        yt = YouTubeAPI('key', enrich=Enricher(_length, executor=pool, batch_size=1))
+        yt.results['videos'] = [{'id': 'v3', 'statistics': {'commentCount': 1}}, {'id': 'v5', 'statistics': {'commentCount': 1}}]
+        asyncio.run(yt.comment_threads())
+    yt.to_csv(str(tmp_path), default_cols=True)
+
+    with open(tmp_path / 'commentThreads.csv', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert {i['id']: i['length'] for i in rows} == {'v3-thread': '3', 'v5-thread': '5'}
+    assert list(rows[0])[-1] == 'length'
+    assert 'snippet.topLevelComment.snippet.textOriginal' in rows[0]
+
+def test_at_most_max_in_flight_batches_wait_in_the_pool():
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow(records):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return [{'seen': True} for i in records]
+
+    async def main(enricher, records):
+        queued = []
+        for start in range(0, len(records), 2):
+            await enricher.submit(records[start:start + 2])
+            # Batches (of one record) submitted but not yet merged
+            queued.append(start + 2 - enricher.records)
+        await enricher.drain()
+        return queued
+
+    records = [{'id': i} for i in range(12)]
+    with ThreadPoolExecutor(8) as pool:
+        enricher = Enricher(slow, executor=pool, batch_size=1, max_in_flight=3)
+        queued = asyncio.run(main(enricher, records))
+    assert max(queued) == 3
+    assert peak[0] <= 3
+    assert enricher.records == 12 and enricher.errors == 0
+    assert all(i['seen'] for i in records)
+
+def test_new_fields_are_merged_into_their_records():
+    records = [{'id': 1, 'text': 'a'}, 'not a record', {'id': 2, 'text': 'bcd'}]
+    with ThreadPoolExecutor(2) as pool:
+        enricher = Enricher(lambda batch: [{'length': len(i['text'])} for i in batch], executor=pool, batch_size=1)
+        async def main():
+            await enricher.submit(records)
+            await enricher.drain()
+        asyncio.run(main())
+    assert records[0] == {'id': 1, 'text': 'a', 'length': 1}
+    assert records[2] == {'id': 2, 'text': 'bcd', 'length': 3}
+    assert list(enricher.fields) == ['length']
+
+def test_failed_batches_are_counted_and_left_unchanged():
+    records = [{'id': 1}]
+    with ThreadPoolExecutor(1) as pool:
+        enricher = Enricher(lambda batch: 1 / 0, executor=pool)
+        async def main():
+            await enricher.submit(records)
+            await enricher.drain()
+        asyncio.run(main())
+    assert records == [{'id': 1}]
+    assert enricher.errors == 1
+
+def test_enrich_requires_full_records():
+    with pytest.raises(AssertionError):
+        YouTubeAPI('key', compact=True, enrich=Enricher(_length, executor='thread'))
@@ -0,0 +1,57 @@
+import asyncio
+from apism import xAPI
+from apism.x.expansions import _index_includes, _hydrate
+
+_url = 'https://api.twitter.com/2/tweets/search/recent'
+_params = {'query': 'apism', 'max_results': 10, 'expansions': 'author_id,attachments.media_keys,referenced_tweets.id'}
+
+def test_includes_are_indexed_by_their_key():
+    index = _index_includes({'users': [{'id': 'u1', 'username': 'old'}], 'media': [{'media_key': 'm1'}]})
+    _index_includes({'users': [{'id': 'u1', 'username': 'new'}, {'id': 'u2'}]}, index)
+    assert index == {'users': {'u1': {'id': 'u1', 'username': 'new'}, 'u2': {'id': 'u2'}}, 'media': {'m1': {'media_key': 'm1'}}}
+
+def test_hydrate_joins_every_expansion():
+    index = _index_includes({
+        'users': [{'id': 'u1'}],
+        'media': [{'media_key': 'm1'}, {'media_key': 'm2'}],
+        'places': [{'id': 'p1'}],
+        'polls': [{'id': 'q1'}],
+        'tweets': [{'id': 't0'}]
+    })
+    tweet = {
+        'id': 't1', 'author_id': 'u1', 'geo': {'place_id': 'p1'},
+        'attachments': {'media_keys': ['m2', 'missing', 'm1'], 'poll_ids': ['q1']},
+        'referenced_tweets': [{'type': 'quoted', 'id': 't0'}, {'type': 'replied_to', 'id': 'deleted'}]
+    }
+    _hydrate([tweet], index)
+    assert tweet['author'] == {'id': 'u1'}
+    assert [i['media_key'] for i in tweet['media']] == ['m2', 'm1']
+    assert tweet['place'] == {'id': 'p1'} and tweet['poll'] == {'id': 'q1'}
+    assert tweet['referenced_tweets'] == [{'type': 'quoted', 'id': 't0', 'tweet': {'id': 't0'}}, {'type': 'replied_to', 'id': 'deleted'}]
+    # Tweets without expansions are left as they are
+    assert _hydrate([{'id': 't2', 'author_id': 'u9'}], index) == [{'id': 't2', 'author_id': 'u9'}]
+
+def test_search_joins_includes_across_pages(cassette):
+    x = xAPI('token', {'search_tweets': _params}, cassette=cassette(
+        (_url, _params, {
+            'data': [{'id': '2', 'author_id': 'u1', 'attachments': {'media_keys': ['m1']}}],
+            'includes': {'users': [{'id': 'u1', 'username': 'a'}], 'media': [{'media_key': 'm1', 'type': 'photo'}]},
+            'meta': {'next_token': 'n2'}
+        }),
+        (_url, dict(_params, next_token='n2'), {
+            # The author was only included on the first page
+            'data': [{'id': '1', 'author_id': 'u1', 'referenced_tweets': [{'type': 'quoted', 'id': '0'}]}],
+            'includes': {'users': [{'id': 'u1', 'username': 'a'}], 'tweets': [{'id': '0', 'text': 'quoted'}]},
+            'meta': {}
+        })
+    ))
+    tweets = asyncio.run(x.search_tweets('recent'))
+
+    assert [i['id'] for i in tweets] == ['2', '1']
+    assert tweets[1]['author']['username'] == 'a'
+    assert tweets[0]['media'] == [{'media_key': 'm1', 'type': 'photo'}]
+    assert tweets[1]['referenced_tweets'][0]['tweet'] == {'id': '0', 'text': 'quoted'}
+    # Each included object once
+    assert x.results['users'] == [{'id': 'u1', 'username': 'a'}]
+    assert x.results['media'] == [{'media_key': 'm1', 'type': 'photo'}]
+    assert not x.failures
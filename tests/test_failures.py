@@ -0,0 +1,79 @@
+import asyncio
+import json
+from apism import YouTubeAPI
+from apism.failures import FailureLedger, FetchError, QuotaExceeded
+
+_videos = 'https://www.googleapis.com/youtube/v3/videos'
+_comment_threads = 'https://www.googleapis.com/youtube/v3/commentThreads'
+
+def _threads(video_id, ids, page_token=None, next_token=None, status=200):
+    params = {'part': 'id,replies,snippet', 'order': 'time', 'videoId': video_id}
+    if page_token:
+        params['pageToken'] = page_token
+    body = {'items': [{'id': i, 'snippet': {'videoId': video_id}} for i in ids]}
+    if next_token:
+        body['nextPageToken'] = next_token
+    return _comment_threads, params, body if status == 200 else {'error': {'code': status}}, status
+
+def test_ledger_records_skips_and_takes_units_of_work():
+    ledger = FailureLedger()
+    ledger.record('commentThreads', 'v1', 'p2', FetchError(_comment_threads, 500, 3), params={'order': 'time'})
+    ledger.record('videos', 'v2', error=QuotaExceeded(_videos, 403, 1, 'quotaExceeded'))
+    ledger.skip('videos', 'v3')
+
+    entry = ledger.entries[0]
+    assert {k: entry[k] for k in ['endpoint', 'id', 'pageToken', 'status', 'error', 'attempts', 'params']} == {
+        'endpoint': 'commentThreads', 'id': 'v1', 'pageToken': 'p2', 'status': 500, 'error': 'FetchError', 'attempts': 3, 'params': {'order': 'time'}
+    }
+    # An exhausted quota stops the run: later units are skipped, not sent
+    assert isinstance(ledger.stopped, QuotaExceeded)
+    assert ledger.entries[2]['error'] is None and 'quotaExceeded' in ledger.entries[2]['skipped']
+
+    assert [i['id'] for i in ledger.take('videos')] == ['v2', 'v3']
+    assert ledger.stopped is None
+    assert [i['id'] for i in ledger.entries] == ['v1']
+
+def test_ledger_is_saved_next_to_the_output_and_reloaded(tmp_path):
+    ledger = FailureLedger()
+    ledger.record('videos', 'v1', error=FetchError(_videos, 500, 3))
+    ledger.save(str(tmp_path))
+
+    assert [i['id'] for i in json.loads((tmp_path / 'failures.json').read_text())] == ['v1']
+    assert FailureLedger(str(tmp_path)).entries == ledger.entries
+    assert FailureLedger(str(tmp_path / 'failures.json')).entries == ledger.entries
+
+    # Once nothing fails, a stale ledger is removed
+    FailureLedger().save(str(tmp_path))
+    assert not (tmp_path / 'failures.json').exists()
+
+def test_comment_pages_are_replayed_from_the_page_that_failed(cassette):
+    yt = YouTubeAPI('key', retry_limit=1, retry_delay=0, cassette=cassette(
+        _threads('v1', ['t1', 't2'], next_token='p2'),
+        _threads('v1', [], page_token='p2', status=500)
+    ))
+    asyncio.run(yt.comment_threads('v1'))
+    assert [i['id'] for i in yt.results['commentThreads']] == ['t1', 't2']
+    assert [(i['endpoint'], i['id'], i['pageToken'], i['status']) for i in yt.failures.entries] == [('commentThreads', 'v1', 'p2', 500)]
+
+    yt.transport = cassette(_threads('v1', ['t3'], page_token='p2'))
+    assert asyncio.run(yt.replay_failures()) == 0
+    # Only the failed page was requested again
+    assert yt.transport.requests == [(_comment_threads, {'part': 'id,replies,snippet', 'order': 'time', 'videoId': 'v1', 'pageToken': 'p2', 'key': 'key'})]
+    assert [i['id'] for i in yt.results['commentThreads']] == ['t1', 't2', 't3']
+    assert not yt.failures
+
+def test_saved_failures_are_replayed_by_a_later_run(tmp_path, cassette):
+    yt = YouTubeAPI('key', retry_limit=1, retry_delay=0, cassette=cassette(
+        (_videos, {'part': 'id,statistics,topicDetails', 'id': 'v1'}, {'items': [{'id': 'v1', 'statistics': {}}]}),
+        (_videos, {'part': 'id,statistics,topicDetails', 'id': 'v2'}, {'error': {'code': 500}}, 500)
+    ))
+    asyncio.run(yt.videos(['v1', 'v2']))
+    yt.failures.save(str(tmp_path))
+
+    later = YouTubeAPI('key', cassette=cassette(
+        (_videos, {'part': 'id,statistics,topicDetails', 'id': 'v2'}, {'items': [{'id': 'v2', 'statistics': {}}]})
+    ))
+    assert asyncio.run(later.replay_failures(str(tmp_path))) == 0
+    assert [i['id'] for i in later.results['videos']] == ['v2']
+    later.failures.save(str(tmp_path))
+    assert not (tmp_path / 'failures.json').exists()
@@ -0,0 +1,32 @@
+import asyncio
+from apism import YouTubeAPI
+from apism.youtube.utils import _fields_mask
+
+def test_mask_nests_flattened_columns():
+    mask = _fields_mask(['snippet.thumbnails.default.url', 'id.videoId', 'snippet.title'])
+    assert mask == 'nextPageToken,items(id(videoId),snippet(title,thumbnails(default(url))))'
+
+def test_a_column_keeps_its_whole_object():
+    assert _fields_mask(['snippet.title', 'snippet', 'id'], top_level=()) == 'items(id,snippet)'
+
+def test_client_masks_add_replies_and_required_fields():
+    yt = YouTubeAPI('key', fields={'commentThreads': ['snippet.topLevelComment.snippet.textOriginal'], 'commentThreadsreplies': ['snippet.textOriginal']})
+    assert yt._fields('commentThreads') == 'nextPageToken,items(id,snippet(videoId,topLevelComment(snippet(textOriginal))),replies(comments(snippet(textOriginal))))'
+    # Endpoints without columns are not masked
+    assert yt._fields('videos') is None
+    assert YouTubeAPI('key')._fields('search') is None
+
+def test_default_masks_cover_the_default_columns():
+    mask = YouTubeAPI('key', fields=True)._fields('search')
+    assert mask.startswith('nextPageToken,items(')
+    assert 'id(kind,videoId)' in mask and 'title' in mask
+
+def test_requests_carry_the_mask(cassette):
+    yt = YouTubeAPI('key', fields={'videos': ['statistics.viewCount']}, cassette=cassette((
+        'https://www.googleapis.com/youtube/v3/videos',
+        {'part': 'id,statistics,topicDetails', 'fields': 'nextPageToken,items(id,statistics)', 'id': 'v1'},
+        {'items': [{'id': 'v1', 'statistics': {'viewCount': '5'}}]}
+    )))
+    asyncio.run(yt.videos(['v1']))
+    assert yt.results['videos'] == [{'id': 'v1', 'statistics': {'viewCount': 5, 'likeCount': 0, 'favoriteCount': 0, 'commentCount': 0}}]
+    assert not yt.failures
@@ -0,0 +1,48 @@
+import asyncio
+import aiohttp
+from apism.limiter import AdaptiveLimiter
+
+async def _request(limiter, latency=0.01, error=None):
+    async with limiter.slot():
+        await asyncio.sleep(latency)
+        if error is not None:
+            raise error
+
+def _run(limiter, *requests):
+    async def main():
+        for request in requests:
+            try:
+                await _request(limiter, **request)
+            except Exception:
+                pass
+    asyncio.run(main())
+
+def test_healthy_requests_grow_the_limit():
+    limiter = AdaptiveLimiter(initial=4)
+    _run(limiter, *[{}] * 20)
+    assert limiter.limit > 4
+    assert limiter.stats()['errors'] == 0
+
+def test_server_errors_cut_the_limit():
+    limiter = AdaptiveLimiter(initial=8)
+    error = aiohttp.ClientResponseError(None, (), status=503)
+    _run(limiter, {}, {'error': error}, {'error': error})
+    assert limiter.limit < 8
+    assert limiter.errors == 2
+    assert limiter.error_rate > limiter.error_tolerance
+
+def test_client_errors_do_not_cut_the_limit():
+    limiter = AdaptiveLimiter(initial=8)
+    error = aiohttp.ClientResponseError(None, (), status=404)
+    _run(limiter, *[{'error': error}] * 5)
+    assert limiter.limit > 8
+    assert limiter.errors == 0
+
+def test_endpoints_keep_their_own_latency_baseline():
+    limiter = AdaptiveLimiter(initial=4)
+    _run(limiter.endpoint('fast'), *[{'latency': 0.01}] * 10)
+    _run(limiter.endpoint('slow'), *[{'latency': 0.05}] * 10)
+    fast, slow = limiter.endpoint('fast'), limiter.endpoint('slow')
+    assert fast.limit > 4 and slow.limit > 4
+    assert fast.min_latency < slow.min_latency
+    assert set(limiter.stats()['endpoints']) == {'fast', 'slow'}
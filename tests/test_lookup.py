@@ -0,0 +1,60 @@
+import asyncio
+from apism import xAPI
+
+_tweets = 'https://api.twitter.com/2/tweets'
+_users = 'https://api.twitter.com/2/users'
+_params = {'expansions': 'author_id'}
+
+def _batch(ids, found, errors=()):
+    body = {
+        'data': [{'id': i, 'author_id': f'u{i}'} for i in found],
+        'includes': {'users': [{'id': f'u{i}'} for i in found]}
+    }
+    if errors:
+        body['errors'] = [{'value': i, 'resource_id': i, 'title': 'Not Found Error'} for i in errors]
+    return _tweets, dict(_params, ids=','.join(ids)), body
+
+def test_ids_are_looked_up_100_per_request(cassette):
+    ids = [str(i) for i in range(205)]
+    replay = cassette(
+        _batch(ids[:100], ids[:99], ids[99:100]),
+        _batch(ids[100:200], ids[100:200]),
+        _batch(ids[200:], ids[200:])
+    )
+    x = xAPI('token', {'tweets_lookup': _params}, cassette=replay)
+    tweets = asyncio.run(x.tweets_lookup(ids + ids[:10] + [int(ids[0])]))
+
+    # Unique IDs, in batch order
+    assert len(replay.requests) == 3
+    assert [i['id'] for i in tweets] == ids[:99] + ids[100:]
+    assert x.results['tweets_lookup_errors'] == [{'value': '99', 'resource_id': '99', 'title': 'Not Found Error'}]
+    # Expansions are joined
+    assert tweets[0]['author'] == {'id': 'u0'}
+    assert not x.failures
+
+def test_failed_batches_are_reported_and_replayed(cassette):
+    ids = [str(i) for i in range(150)]
+    x = xAPI('token', {'tweets_lookup': _params}, cassette=cassette(_batch(ids[:100], ids[:100])))
+    tweets = asyncio.run(x.tweets_lookup(ids))
+
+    assert len(tweets) == 100
+    errors = x.results['tweets_lookup_errors']
+    assert [i['value'] for i in errors] == ids[100:]
+    assert {i['title'] for i in errors} == {'Request Failed'}
+    entry, = x.failures.entries
+    assert (entry['endpoint'], entry['id'], entry['lookup'], entry['results']) == (_tweets, ','.join(ids[100:]), True, 'tweets_lookup')
+
+    x.transport = cassette(_batch(ids[100:], ids[100:149], ids[149:]))
+    assert asyncio.run(x.replay_failures()) == 0
+    assert [i['id'] for i in x.results['tweets_lookup']] == ids[:149]
+    # The failed batch's errors are replaced by the API's answer
+    assert [(i['value'], i['title']) for i in x.results['tweets_lookup_errors']] == [('149', 'Not Found Error')]
+
+def test_users_default_to_the_authors_of_the_search(cassette):
+    replay = cassette((_users, {'ids': 'u1,u2'}, {'data': [{'id': 'u1'}, {'id': 'u2'}]}))
+    x = xAPI('token', {}, cassette=replay)
+    x.results['search_tweets'] = [{'id': '1', 'author_id': 'u1'}, {'id': '2', 'author_id': 'u2'}, {'id': '3', 'author_id': 'u1'}, {'id': '4'}]
+    users = asyncio.run(x.users_lookup())
+
+    assert [i['id'] for i in users] == ['u1', 'u2']
+    assert x.results['users_lookup_errors'] == []
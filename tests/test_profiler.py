@@ -0,0 +1,67 @@
+import aiohttp
+import asyncio
+import json
+import tracemalloc
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from apism import profiler as pr
+from apism.engine import fetch
+from apism.profiler import Profiler, _phase, _use_profiler
+from apism.youtube.utils import _youtube
+
+async def _mock_api():
+    async def videos(request):
+        await asyncio.sleep(0.02)
+        return web.json_response({'items': [{'id': request.query['id']}]})
+
+    app = web.Application()
+    app.router.add_get('/youtube/v3/videos', videos)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+def test_concurrent_phases_export_their_spans_and_summaries(tmp_path):
+    profiler = Profiler(top=5)
+
+    async def method(name, url, session):
+        # A top-level phase with a nested one, requesting two videos at once
+        with _phase(name):
+            with _phase(f'{name}.flatten'):
+                pass
+            await asyncio.gather(*[fetch(_youtube, url, {'id': f'{name}{i}'}, session=session) for i in range(2)])
+
+    async def run():
+        server = await _mock_api()
+        try:
+            async with aiohttp.ClientSession() as session:
+                with _use_profiler(profiler):
+                    url = str(server.make_url('/youtube/v3/videos'))
+                    await asyncio.gather(method('videos', url, session), method('channels', url, session))
+        finally:
+            await server.close()
+
+    asyncio.run(run())
+    profiler.export(str(tmp_path / 'trace.json'))
+    with open(tmp_path / 'trace.json') as f:
+        trace = json.load(f)
+
+    # Both overlapping phases are top-level; the nested ones are not
+    assert sorted(i['phase'] for i in profiler.phases) == ['channels', 'videos']
+    for i in profiler.phases:
+        assert i['cpu'] and len(i['cpu']) <= 5
+        assert i['memory_peak'] > 0
+    # Profiling stopped with the last phase
+    assert pr._cpu_users == 0 and pr._cpu_profile is None
+    assert not tracemalloc.is_tracing()
+
+    events = [i for i in trace['traceEvents'] if i['ph'] == 'X']
+    phases = [i for i in events if i['cat'] == 'phase']
+    requests = [i for i in events if i['cat'] == 'request']
+    assert sorted(i['name'] for i in phases) == ['channels', 'channels.flatten', 'videos', 'videos.flatten']
+    assert {i['tid'] for i in phases} == {'phases'}
+    assert len(requests) == 4
+    assert all(i['name'] == 'GET' and i['args']['status'] == 200 for i in requests)
+    # Concurrent requests are drawn on separate lanes, each named by a metadata event
+    lanes = {i['tid'] for i in requests}
+    assert len(lanes) == 4
+    assert {i['tid'] for i in trace['traceEvents'] if i['ph'] == 'M'} == lanes | {'phases'}
@@ -0,0 +1,62 @@
+import asyncio
+import json
+from apism import YouTubeAPI
+from apism.youtube.records import VideoRecord, CommentThreadRecord, CommentRecord
+
+def _comment(id, video_id, text, parent=None):
+    snippet = {'videoId': video_id, 'authorDisplayName': 'a', 'authorChannelId': {'value': 'UC1'}, 'textOriginal': text, 'textDisplay': text, 'likeCount': 1, 'publishedAt': '2024-01-01T00:00:00Z', 'updatedAt': '2024-01-01T00:00:00Z'}
+    if parent:
+        snippet['parentId'] = parent
+    return {'kind': 'youtube#comment', 'etag': 'e', 'id': id, 'snippet': snippet}
+
+_thread = {
+    'kind': 'youtube#commentThread', 'etag': 'e', 'id': 't1',
+    'snippet': {'videoId': 'v1', 'channelId': 'UC0', 'totalReplyCount': 1, 'canReply': True, 'isPublic': True, 'topLevelComment': _comment('t1', 'v1', 'first')},
+    'replies': {'comments': [_comment('t1.r1', 'v1', 'reply', 't1')]}
+}
+_video = {'kind': 'youtube#video', 'etag': 'e', 'id': 'v1', 'statistics': {'viewCount': '10', 'likeCount': '2', 'commentCount': '7'}, 'topicDetails': {'topicCategories': ['https://en.wikipedia.org/wiki/Music']}}
+
+def _interactions():
+    return (
+        ('https://www.googleapis.com/youtube/v3/videos', {'part': 'id,statistics,topicDetails', 'id': 'v1'}, {'items': [_video]}),
+        ('https://www.googleapis.com/youtube/v3/commentThreads', {'part': 'id,replies,snippet', 'order': 'time', 'videoId': 'v1'}, {'items': [_thread]})
+    )
+
+def _collect(cassette, path, compact):
+    yt = YouTubeAPI('key', compact=compact, cassette=cassette(*_interactions()))
+    asyncio.run(yt.videos(['v1']))
+    asyncio.run(yt.comment_threads())
+    path.mkdir()
+    yt.to_json(str(path))
+    rows = {}
+    for k in ['videos', 'commentThreads', 'commentThreadsreplies']:
+        with open(path / f'{k}.json') as f:
+            rows[k] = json.load(f)
+    return yt, rows
+
+def test_compact_records_hold_the_items(cassette, tmp_path):
+    yt, __ = _collect(cassette, tmp_path / 'compact', True)
+    video, = yt.results['videos']
+    thread, = yt.results['commentThreads'][0]
+    assert video == VideoRecord('v1', 10, 2, 0, 7, ['https://en.wikipedia.org/wiki/Music'])
+    assert isinstance(thread, CommentThreadRecord)
+    assert (thread.videoId, thread.textOriginal, thread.totalReplyCount) == ('v1', 'first', 1)
+    assert thread.replies == (CommentRecord.from_item(_thread['replies']['comments'][0]),)
+    # Identifiers are interned
+    assert thread.videoId is video.id
+    assert yt._video_ids(5) == ['v1']
+
+def test_compact_records_write_the_same_rows(cassette, tmp_path):
+    __, compact = _collect(cassette, tmp_path / 'compact', True)
+    __, full = _collect(cassette, tmp_path / 'full', False)
+    columns = {
+        'videos': VideoRecord._columns.values(),
+        'commentThreads': CommentThreadRecord._columns.values(),
+        'commentThreadsreplies': CommentRecord._columns.values()
+    }
+    for k, cols in columns.items():
+        assert len(compact[k]) == len(full[k]) == 1
+        assert {i: compact[k][0].get(i) for i in cols} == {i: full[k][0].get(i) for i in cols}
+    assert compact['commentThreads'][0]['snippet.topLevelComment.snippet.textOriginal'] == 'first'
+    assert compact['commentThreadsreplies'][0]['snippet.parentId'] == 't1'
+    assert compact['videos'][0]['topicDetails.topicCategories'] == 'Music'
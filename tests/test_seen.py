@@ -0,0 +1,74 @@
+import asyncio
+import json
+from apism import YouTubeAPI
+from apism.youtube.seen import SeenIndex
+
+_videos = 'https://www.googleapis.com/youtube/v3/videos'
+_comment_threads = 'https://www.googleapis.com/youtube/v3/commentThreads'
+
+def _video(video_id):
+    return _videos, {'part': 'id,statistics,topicDetails', 'id': video_id}, {'items': [{'kind': 'youtube#video', 'id': video_id, 'statistics': {'commentCount': '1'}}]}
+
+def _threads(video_id, ids):
+    items = [{'kind': 'youtube#commentThread', 'id': i, 'snippet': {'videoId': video_id, 'topLevelComment': {'id': i, 'snippet': {'textOriginal': i}}}} for i in ids]
+    return _comment_threads, {'part': 'id,replies,snippet', 'order': 'time', 'videoId': video_id}, {'items': items}
+
+def _rows(path, entity):
+    with open(path / f'{entity}.json') as f:
+        return [i['id'] for i in json.load(f)]
+
+def _run(cassette, path, duplicates, ids, interactions):
+    replay = cassette(*interactions)
+    yt = YouTubeAPI('key', seen=str(path / 'seen'), duplicates=duplicates, cassette=replay)
+    asyncio.run(yt.videos(ids))
+    out = path / f'out-{duplicates}-{len(ids)}'
+    out.mkdir()
+    yt.to_json(str(out))
+    return [i[1]['id'] for i in replay.requests], out
+
+def test_skip_does_not_fetch_or_write_videos_seen_before(cassette, tmp_path):
+    interactions = [_video('v1'), _video('v2'), _video('v3')]
+    requested, out = _run(cassette, tmp_path, 'skip', ['v1', 'v2'], interactions)
+    assert sorted(requested) == ['v1', 'v2']
+    assert sorted(_rows(out, 'videos')) == ['v1', 'v2']
+
+    requested, out = _run(cassette, tmp_path, 'skip', ['v1', 'v2', 'v3'], interactions)
+    assert requested == ['v3']
+    assert _rows(out, 'videos') == ['v3']
+    with open(tmp_path / 'seen' / 'videos.ids') as f:
+        assert sorted(f.read().split()) == ['v1', 'v2', 'v3']
+
+def test_refresh_fetches_and_writes_them_again(cassette, tmp_path):
+    interactions = [_video('v1'), _video('v2')]
+    _run(cassette, tmp_path, 'skip', ['v1'], interactions)
+    requested, out = _run(cassette, tmp_path, 'refresh', ['v1', 'v2'], interactions)
+    assert sorted(requested) == ['v1', 'v2']
+    assert sorted(_rows(out, 'videos')) == ['v1', 'v2']
+    # Each ID is recorded once
+    with open(tmp_path / 'seen' / 'videos.ids') as f:
+        assert sorted(f.read().split()) == ['v1', 'v2']
+
+def test_writing_twice_emits_the_same_rows(cassette, tmp_path):
+    yt = YouTubeAPI('key', seen=str(tmp_path / 'seen'), duplicates='skip', cassette=cassette(_video('v1')))
+    asyncio.run(yt.videos(['v1']))
+    yt.to_json(str(tmp_path))
+    yt.to_csv(str(tmp_path))
+    assert _rows(tmp_path, 'videos') == ['v1']
+    with open(tmp_path / 'videos.csv') as f:
+        assert len(f.read().splitlines()) == 2
+
+def test_seen_comment_threads_are_dropped_and_their_videos_optionally_skipped(cassette, tmp_path):
+    seen = SeenIndex(str(tmp_path / 'seen'))
+    seen.add('commentThreads', ['t1'])
+    seen.add('commentThreads.videoId', ['v1'])
+
+    replay = cassette(_threads('v1', ['t1', 't2']), _threads('v2', ['t3']))
+    yt = YouTubeAPI('key', seen=SeenIndex(str(tmp_path / 'seen')), duplicates='skip', cassette=replay)
+    # Comment threads of every video are fetched unless asked otherwise
+    asyncio.run(yt.comment_threads(['v1', 'v2']))
+    yt.to_json(str(tmp_path))
+    assert sorted(_rows(tmp_path, 'commentThreads')) == ['t2', 't3']
+
+    replay.requests.clear()
+    asyncio.run(yt.comment_threads(['v1', 'v2'], skip_seen_videos=True))
+    assert [i[1]['videoId'] for i in replay.requests] == ['v2']
@@ -0,0 +1,59 @@
+import asyncio
+import csv
+import json
+from apism import YouTubeAPI
+
+_url = 'https://www.googleapis.com/youtube/v3/videos'
+
+def _request(ids, body):
+    return _url, {'id': ','.join(ids), 'part': 'statistics', 'fields': 'items(id,statistics)'}, body
+
+def _item(video_id, views, comments=None):
+    statistics = {'viewCount': str(views), 'likeCount': '1'}
+    if comments is not None:
+        statistics['commentCount'] = str(comments)
+    return {'id': video_id, 'statistics': statistics}
+
+def _store(path):
+    with open(path / 'snapshots.csv', newline='') as f:
+        return list(csv.DictReader(f))
+
+def test_snapshots_are_batched_by_50_videos(cassette, tmp_path):
+    ids = [f'v{i:02d}' for i in range(51)]
+    yt = YouTubeAPI('key', cassette=cassette(
+        _request(ids[:50], {'items': [_item(i, 10, 2) for i in ids[:50]]}),
+        _request(ids[50:], {'items': [_item(ids[50], 7)]})
+    ))
+    asyncio.run(yt.snapshot(ids + ['v00'], str(tmp_path)))
+
+    rows = yt.results['snapshots']
+    assert [i['videoId'] for i in rows] == ids
+    assert len({i['collectedAt'] for i in rows}) == 1
+    # Missing statistics are recorded as 0
+    assert rows[-1] == dict(rows[-1], viewCount=7, likeCount=1, favoriteCount=0, commentCount=0)
+    assert len(_store(tmp_path)) == 51
+    assert not yt.failures
+
+def test_deltas_only_append_changed_videos(cassette, tmp_path):
+    ids = ['v1', 'v2', 'v3']
+    yt = YouTubeAPI('key', cassette=cassette(
+        _request(ids, {'items': [_item('v1', 10), _item('v2', 20), _item('v3', 30)]}),
+        _request(ids, {'items': [_item('v1', 10), _item('v2', 25), _item('v3', 30)]})
+    ))
+    asyncio.run(yt.snapshot(ids, str(tmp_path), deltas=True))
+    asyncio.run(yt.snapshot(ids, str(tmp_path), deltas=True))
+
+    assert [i['videoId'] for i in yt.results['snapshots']] == ['v2']
+    store = _store(tmp_path)
+    assert [(i['videoId'], i['viewCount']) for i in store] == [('v1', '10'), ('v2', '20'), ('v3', '30'), ('v2', '25')]
+    with open(tmp_path / 'snapshots.latest.json') as f:
+        assert json.load(f)['v2'] == [25, 1, 0, 0]
+
+def test_failed_batches_are_recorded_for_replay(cassette, tmp_path):
+    yt = YouTubeAPI('key', cassette=cassette(_request(['v1'], {'items': [_item('v1', 10)]})))
+    asyncio.run(yt.snapshot(['v2', 'v3'], str(tmp_path), deltas=True))
+
+    assert yt.results['snapshots'] == []
+    assert [(i['endpoint'], i['id'], i['file_path'], i['deltas']) for i in yt.failures.entries] == [
+        ('snapshot', 'v2', str(tmp_path), True), ('snapshot', 'v3', str(tmp_path), True)
+    ]
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import apism.x.stream as st
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from apism import xAPI
+
+def _message(id):
+    return (json.dumps({'data': {'id': id, 'author_id': 'u1'}, 'includes': {'users': [{'id': 'u1', 'username': 'apism'}]}}) + '\r\n').encode()
+
+async def _mock_stream(connections):
+    """
+    A filtered stream endpoint: the first connection sends a keep-alive, a tweet, a malformed line and
+    another tweet, then stalls; the next connection sends one more tweet and closes.
+    """
+    async def stream(request):
+        connections.append(request.headers.get('Authorization'))
+        response = web.StreamResponse()
+        await response.prepare(request)
+        if len(connections) == 1:
+            await response.write(b'\r\n')
+            await response.write(_message('1'))
+            await response.write(b'{"data": {"id": \r\n')
+            await response.write(_message('2'))
+            await asyncio.sleep(5)
+        else:
+            await response.write(_message('3'))
+        return response
+
+    app = web.Application()
+    app.router.add_get('/2/tweets/search/stream', stream)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+def test_stream_skips_malformed_lines_and_reconnects_after_a_stall(monkeypatch, capsys):
+    monkeypatch.setattr(st, '_backoff', lambda kind, failures: 0)
+    connections = []
+
+    async def run():
+        server = await _mock_stream(connections)
+        try:
+            x = xAPI('token', {}, stream_url=str(server.make_url('/2/tweets/search/stream')))
+            delivered = await x.stream(max_tweets=3, stall_timeout=0.2)
+            return delivered, x.results['stream']
+        finally:
+            await server.close()
+
+    delivered, tweets = asyncio.run(run())
+    assert delivered == 3
+    assert [i['id'] for i in tweets] == ['1', '2', '3']
+    assert tweets[0]['author']['username'] == 'apism'
+    # The malformed line did not drop the connection; only the stall did
+    assert connections == ['Bearer token', 'Bearer token']
+    assert 'Skipping malformed stream message' in capsys.readouterr().out
@@ -0,0 +1,49 @@
+import asyncio
+from apism import YouTubeAPI
+
+_channels = 'https://www.googleapis.com/youtube/v3/channels'
+_playlist_items = 'https://www.googleapis.com/youtube/v3/playlistItems'
+
+def _channel(channel_id):
+    return {'id': channel_id, 'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + channel_id[2:]}}}
+
+def _item(video_id, channel_id):
+    return {'id': f'pi-{video_id}', 'snippet': {'videoOwnerChannelId': channel_id}, 'contentDetails': {'videoId': video_id}}
+
+def _page(playlist_id, items, page_token=None, next_token=None):
+    params = {'part': 'contentDetails,snippet', 'maxResults': 50, 'playlistId': playlist_id}
+    if page_token:
+        params['pageToken'] = page_token
+    body = {'items': items}
+    if next_token:
+        body['nextPageToken'] = next_token
+    return _playlist_items, params, body
+
+def test_uploads_page_through_each_channels_playlist(cassette):
+    yt = YouTubeAPI('key', cassette=cassette(
+        # One channels request resolves the uploads playlists; unknown channels are left out
+        (_channels, {'part': 'contentDetails', 'id': 'UC1,UC2,UCx', 'maxResults': 50}, {'items': [_channel('UC1'), _channel('UC2')]}),
+        _page('UU1', [_item('a1', 'UC1'), _item('a2', 'UC1')], next_token='p2'),
+        _page('UU1', [_item('a3', 'UC1')], page_token='p2'),
+        _page('UU2', [_item('b1', 'UC2')])
+    ))
+    asyncio.run(yt.uploads(['UC1', 'UC2', 'UCx', 'UC1']))
+
+    assert [i['contentDetails']['videoId'] for i in yt.results['playlistItems']] == ['a1', 'a2', 'a3', 'b1']
+    assert sorted(yt._discovered_video_ids()) == ['a1', 'a2', 'a3', 'b1']
+    assert yt._channel_ids() == ['UC1', 'UC2']
+    assert not yt.failures
+
+def test_failed_pages_and_channels_are_recorded(cassette):
+    yt = YouTubeAPI('key', cassette=cassette(_page('UU1', [_item('a1', 'UC1')], next_token='p2')))
+    asyncio.run(yt.playlist_items(['UU1']))
+    # The pages before the failure are kept
+    assert [i['id'] for i in yt.results['playlistItems']] == ['pi-a1']
+    asyncio.run(yt.uploads('UC2'))
+
+    assert yt.results['playlistItems'] == []
+    assert [(i['endpoint'], i['id'], i['pageToken']) for i in yt.failures.entries] == [
+        # The playlist resumes from the page that failed
+        ('playlistItems', 'UU1', 'p2'),
+        ('uploads', 'UC2', None)
+    ]
@@ -0,0 +1,70 @@
+import asyncio
+import apism.x.XAPI as xapi
+import apism.youtube.YouTubeAPI as ytapi
+from apism import xAPI, YouTubeAPI
+from apism.watermark import Watermarks
+
+SEARCH_URL = 'https://api.twitter.com/2/tweets/search/recent'
+
+def test_watermarks_are_saved_and_reloaded(tmp_path):
+    path = str(tmp_path / 'marks' / 'watermarks.json')
+    marks = Watermarks(path)
+    assert marks.get('x/recent/ftx', {}) == {}
+
+    marks.set('x/recent/ftx', {'since_id': '5', 'until': '2026-01-02T00:00:00Z'})
+    marks.set('youtube/search/ftx', '2026-01-02T00:00:00Z')
+
+    assert Watermarks(path).marks == marks.marks
+    # Written to a temporary file, then renamed over the previous one
+    assert sorted(i.name for i in (tmp_path / 'marks').iterdir()) == ['watermarks.json']
+
+def test_incremental_x_search_continues_from_the_newest_tweet(monkeypatch, tmp_path, cassette):
+    path = str(tmp_path / 'watermarks.json')
+    params = {'search_tweets': {'query': 'ftx', 'start_time': '2026-01-01T00:00:00Z', 'end_time': '2026-01-01T12:00:00Z'}}
+
+    # First run: from start_time up to now
+    monkeypatch.setattr(xapi, '_now', lambda: '2026-01-02T00:00:00Z')
+    x = xAPI('token', params, watermarks=path, cassette=cassette(
+        (SEARCH_URL, {'query': 'ftx', 'start_time': '2026-01-01T00:00:00Z'}, {'data': [{'id': '12'}, {'id': '7'}], 'meta': {}})
+    ))
+    asyncio.run(x.search_tweets('recent', incremental=True))
+    assert Watermarks(path).get('x/recent/ftx') == {'since_id': '12', 'until': '2026-01-02T00:00:00Z'}
+
+    # Second run: only tweets newer than the last one seen; a run that finds nothing keeps since_id
+    monkeypatch.setattr(xapi, '_now', lambda: '2026-01-03T00:00:00Z')
+    x = xAPI('token', params, watermarks=path, cassette=cassette(
+        (SEARCH_URL, {'query': 'ftx', 'since_id': '12'}, {'meta': {'result_count': 0}})
+    ))
+    asyncio.run(x.search_tweets('recent', incremental=True))
+    assert x.results['search_tweets'] == []
+    assert Watermarks(path).get('x/recent/ftx') == {'since_id': '12', 'until': '2026-01-03T00:00:00Z'}
+
+def test_incremental_x_search_keeps_the_watermark_after_a_failure(monkeypatch, tmp_path, cassette):
+    path = str(tmp_path / 'watermarks.json')
+    Watermarks(path).set('x/recent/ftx', {'since_id': None, 'until': '2026-01-02T00:00:00Z'})
+    monkeypatch.setattr(xapi, '_now', lambda: '2026-01-03T00:00:00Z')
+
+    x = xAPI('token', {'search_tweets': {'query': 'ftx'}}, watermarks=path, retry_limit=1, retry_delay=0, cassette=cassette(
+        (SEARCH_URL, {'query': 'ftx', 'start_time': '2026-01-02T00:00:00Z'}, {'data': [{'id': '20'}], 'meta': {'next_token': 'n2'}}),
+        (SEARCH_URL, {'query': 'ftx', 'start_time': '2026-01-02T00:00:00Z', 'next_token': 'n2'}, {'title': 'Service Unavailable'}, 503)
+    ))
+    asyncio.run(x.search_tweets('recent', incremental=True))
+
+    assert [i['id'] for i in x.results['search_tweets']] == ['20']
+    assert [i['pageToken'] for i in x.failures.entries] == ['n2']
+    assert Watermarks(path).get('x/recent/ftx') == {'since_id': None, 'until': '2026-01-02T00:00:00Z'}
+
+def test_incremental_youtube_search_starts_at_the_end_of_the_last_one(monkeypatch, tmp_path, cassette):
+    path = str(tmp_path / 'watermarks.json')
+    Watermarks(path).set('youtube/search/ftx', '2026-01-02T00:00:00Z')
+    monkeypatch.setattr(ytapi, '_now', lambda: '2026-01-03T00:00:00Z')
+
+    yt = YouTubeAPI('key', {'search': {'part': 'id', 'type': 'video', 'publishedAfter': '2026-01-01T00:00:00Z'}}, watermarks=path, cassette=cassette(
+        ('https://www.googleapis.com/youtube/v3/search', {'part': 'id', 'type': 'video', 'publishedAfter': '2026-01-02T00:00:00Z', 'publishedBefore': '2026-01-03T00:00:00Z', 'q': 'ftx'}, {
+            'items': [{'id': {'videoId': 'v1'}}]
+        })
+    ))
+    asyncio.run(yt.search('ftx', incremental=True))
+
+    assert [i['id']['videoId'] for i in yt.results['search']] == ['v1']
+    assert Watermarks(path).get('youtube/search/ftx') == '2026-01-03T00:00:00Z'
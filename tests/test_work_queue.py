@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sqlite3
+import time
+import apism.youtube.videos as vd
+from apism import YouTubeAPI
+from apism.youtube.work_queue import WorkQueue, run_worker
+
+def _queue(tmp_path, **kwargs):
+    queue = WorkQueue(str(tmp_path / 'queue.db'), **kwargs)
+    queue.put('videos', ['v1', 'v2', 'v3'], shard_size=2)
+    return queue
+
+def test_expired_leases_are_claimed_again(tmp_path):
+    queue = _queue(tmp_path, lease_seconds=0.1)
+    first = queue.claim('w1')
+    second = queue.claim('w2')
+    assert first == (1, 'videos', ['v1', 'v2'])
+    assert second == (2, 'videos', ['v3'])
+    assert queue.claim('w3') is None
+
+    assert queue.complete(2, 'w2')
+    time.sleep(0.15)
+    # w1's lease expired: the shard goes to w3, and w1 can neither renew nor complete it
+    assert queue.claim('w3') == first
+    assert not queue.renew(1, 'w1')
+    assert not queue.complete(1, 'w1')
+    assert queue.renew(1, 'w3')
+    assert queue.complete(1, 'w3')
+    assert queue.status() == {'done': 2}
+
+def test_shards_fail_after_max_attempts(tmp_path):
+    queue = _queue(tmp_path, lease_seconds=0.05, max_attempts=2)
+    queue.claim('w1', 'videos')
+    queue.fail(1, 'w1', 'error')
+    assert queue.status() == {'pending': 2}
+
+    # Second attempt: the lease expires
+    assert queue.claim('w1', 'videos')[0] == 1
+    time.sleep(0.1)
+    assert queue.claim('w2', 'videos')[0] == 2
+    assert queue.claim('w3', 'videos') is None
+    assert queue.status() == {'failed': 1, 'leased': 1}
+
+def _api(monkeypatch, delay=0):
+    async def fetch(url, params, *args):
+        await asyncio.sleep(delay)
+        return {'items': [{'id': params['id'], 'statistics': {}}]}, None
+    monkeypatch.setattr(vd, '_fetch_with_retries', fetch)
+    return YouTubeAPI('key')
+
+def test_worker_publishes_the_shards_it_holds(monkeypatch, tmp_path):
+    queue = _queue(tmp_path)
+    completed = asyncio.run(run_worker(_api(monkeypatch), queue, str(tmp_path / 'out'), worker_id='w1'))
+
+    assert completed == 2
+    assert queue.status() == {'done': 2}
+    assert sorted(os.listdir(tmp_path / 'out' / 'videos')) == ['shard-000001', 'shard-000002']
+    assert os.path.exists(tmp_path / 'out' / 'videos' / 'shard-000001' / 'videos.json')
+
+def test_worker_stops_a_shard_whose_lease_was_lost(monkeypatch, tmp_path, capsys):
+    queue = WorkQueue(str(tmp_path / 'queue.db'), lease_seconds=0.3)
+    queue.put('videos', ['v1'])
+
+    async def steal():
+        # Another worker takes the shard while w1 is still fetching it
+        await asyncio.sleep(0.05)
+        with sqlite3.connect(queue.path) as conn:
+            conn.execute("UPDATE shards SET worker = 'w2'")
+
+    async def run():
+        asyncio.ensure_future(steal())
+        return await run_worker(_api(monkeypatch, delay=1), queue, str(tmp_path / 'out'), worker_id='w1')
+
+    started = time.monotonic()
+    assert asyncio.run(run()) == 0
+    # Cancelled at the first renewal instead of running to the end
+    assert time.monotonic() - started < 0.5
+    assert 'w1 lost the lease on videos shard 1' in capsys.readouterr().out
+    assert not os.path.exists(tmp_path / 'out')
+    assert queue.status() == {'leased': 1}